@@ -2,10 +2,13 @@ import streamlit as st
 import numpy as np
 import pandas as pd
 import math
+import json
 import plotly.graph_objs as go
-from plotly.subplots import make_subplots
-from motor_graphs_powertrain import EngineGearRatioCalculator, TorqueSpeedGraph, PowerSpeedGraph
-from inverter_model import inverter_model
+from powertrain.incremental import IncrementalPipeline
+from powertrain.inverter import inverter_model, inverter_model_batch
+from powertrain.pwm import inverter_model_pwm
+from powertrain.cache import memoize, cache_stats, clear_caches
+from powertrain.profiling import Profiler, stage, use_profiler
 
 st.set_page_config(
       page_title="Powertrain calculator",
@@ -13,6 +16,75 @@ st.set_page_config(
       layout="wide"
       )
 
+# Stage profiling is configured before any stage runs and covers one rerun;
+# every session keeps its own profiler, so concurrent sessions do not mix
+with st.sidebar:
+    profile_enabled = st.checkbox("Profile pipeline stages", value=False)
+    profile_allocations = st.checkbox("Track allocations", value=False, disabled=not profile_enabled)
+    if profile_enabled and st.button("Profile a cold rerun", help="Clears the stage caches so every stage runs."):
+        clear_caches()
+        st.session_state.pop('gear_pipeline', None)
+if 'profiler' not in st.session_state:
+    st.session_state.profiler = Profiler()
+profiler = st.session_state.profiler
+profiler.configure(profile_enabled, profile_allocations)
+profiler.reset()
+use_profiler(profiler)
+
+## Cached Pipeline Stages
+# Each stage is keyed on the content of its own inputs, so a widget change only
+# recomputes the stages that depend on it. The gear-ratio table and graphs are
+# instead updated row by row from table edits (IncrementalPipeline below).
+
+@memoize('inverter_metrics')
+def compute_inverter_metrics(time_domain=False, **params):
+    if time_domain:
+        result = inverter_model_pwm(**params)
+        return {field: result[field].item() for field in result.dtype.names}
+    return inverter_model(**params)
+
+
+@memoize('drive_log_histogram')
+def compute_drive_log_histogram(log_bytes, mass, dt):
+    # Streamed in chunks through the demand histogram; the log itself is never held as one frame
+    import io
+    from powertrain.demand import DemandHistogram
+
+    histogram = DemandHistogram(mass, dt)
+    with stage('drive_log_demand'):
+        for frame in pd.read_csv(io.BytesIO(log_bytes), chunksize=100_000):
+            gradient = frame['gradient'].to_numpy(dtype=float) if 'gradient' in frame else 0.0
+            histogram.update(frame['speed'].to_numpy(dtype=float), gradient)
+    return histogram
+
+
+@memoize('inverter_efficiency_curve')
+def compute_inverter_efficiency_curve(vdc, f_sw, r_on, v_f, e_on, e_off):
+    current_range = np.linspace(5, 200, 50)  # Analyze current from 5A to 200A
+    v_out_rms_plot = vdc * 0.85 / math.sqrt(2) # Assume constant voltage for simplicity
+    with stage('inverter_efficiency_curve'):
+        results = inverter_model_batch(
+            V_dc=vdc,
+            I_out_rms=current_range,
+            f_sw=f_sw,
+            R_on=r_on,
+            V_f=v_f,
+            E_on=e_on,
+            E_off=e_off,
+            V_out_rms=v_out_rms_plot
+        )
+    efficiency_df = pd.DataFrame({
+        'Output Current (A)': current_range,
+        'Efficiency (%)': results['efficiency_percent']
+    })
+
+    fig = go.Figure(data=go.Scatter(x=efficiency_df['Output Current (A)'], y=efficiency_df['Efficiency (%)'], mode='lines+markers'))
+    fig.update_layout(title='Inverter Efficiency vs. Output Current',
+                      xaxis_title='Output Current (A)',
+                      yaxis_title='Efficiency (%)',
+                      yaxis_range=[70, 100])
+    return fig
+
 ## App Layout and Content
 
 st.title("Powertrain Performance Analysis")
@@ -32,8 +104,29 @@ with tab1:
         {'max_speed_vehicle': 442.1, 'torque': 3020, 'power': 139.81, 'max_speed_gearbox': 6, 'condition': 'idle'}
     ])
 
-    # Use st.data_editor for an editable scenarios table
+    # Scenarios can instead be derived from a measured drive log
     st.subheader("Vehicle Scenarios")
+    drive_log = st.file_uploader("Derive scenarios from a drive log", type=['csv'],
+                                 help="CSV with a 'speed' column (km/h) and an optional 'gradient' column (%).")
+    if drive_log is not None:
+        log_col1, log_col2, log_col3 = st.columns(3)
+        log_mass = log_col1.number_input("Vehicle mass (kg)", min_value=100.0, value=2000.0, step=50.0)
+        log_dt = log_col2.number_input("Sample period (s)", min_value=0.001, value=1.0, format="%.3f")
+        log_min_time = log_col3.number_input("Min. time per cell (s)", min_value=0.0, value=0.0, step=1.0,
+                                             help="Speed/torque cells visited for less time are ignored, "
+                                                  "so glitches in the log do not set the scenarios.")
+        try:
+            log_histogram = compute_drive_log_histogram(drive_log.getvalue(), log_mass, log_dt)
+            log_scenarios = log_histogram.scenarios(min_time=log_min_time)
+        except (KeyError, ValueError) as error:
+            log_scenarios = None
+            st.warning(f"Could not read the drive log: {error}")
+        if log_scenarios:
+            scenarios_df = pd.DataFrame(log_scenarios, columns=scenarios_df.columns)
+        elif log_scenarios is not None:
+            st.warning("The drive log has no traction samples; keeping the default scenarios.")
+
+    # Use st.data_editor for an editable scenarios table
     edited_scenarios_df = st.data_editor(
         scenarios_df,
         num_rows="dynamic",  # Allows adding or removing rows
@@ -108,8 +201,8 @@ with tab1:
         ),
     }
 )
-    # Convert the edited DataFrame back to the required dictionary format
-    user_engines = edited_engines_df.set_index('Engine').T.to_dict()
+    # Engines indexed by name; unnamed rows are skipped and the last of duplicate names wins
+    user_engines = edited_engines_df.dropna(subset=['Engine']).drop_duplicates('Engine', keep='last').set_index('Engine')
 
     # ---
     st.divider()
@@ -118,29 +211,12 @@ with tab2:
     ## Plotting Graphs
     
 
-    # Create instances of necessary classes using the user-defined data
-    calculator = EngineGearRatioCalculator(user_engines, user_scenarios)
-    gear_ratios = calculator.calculate_gear_ratios()
-    torque_speed_graph = TorqueSpeedGraph(user_engines, user_scenarios, gear_ratios)
-    power_speed_graph = PowerSpeedGraph(user_engines, user_scenarios, gear_ratios)
-
-    # Plot torque-speed and power-speed graphs
-    fig_torque_speed = torque_speed_graph.plot()
-    fig_power_speed = power_speed_graph.plot()
-
-    # Combine the two graphs into a single subplot figure
-    combined_fig = make_subplots(rows=1, cols=2, subplot_titles=('Torque-Speed Graph', 'Power-Speed Graph'))
-
-    for trace in fig_torque_speed['data']:
-        combined_fig.add_trace(trace, row=1, col=1)
-
-    for trace in fig_power_speed['data']:
-        combined_fig.add_trace(trace, row=1, col=2)
-
-    combined_fig.update_xaxes(title_text='Speed (RPM)', row=1, col=1)
-    combined_fig.update_yaxes(title_text='Torque (Nm)', row=1, col=1)
-    combined_fig.update_xaxes(title_text='Speed (RPM)', row=1, col=2)
-    combined_fig.update_yaxes(title_text='Power (kW)', row=1, col=2)
+    # Figures and table are patched from the rows edited since the last rerun
+    if 'gear_pipeline' not in st.session_state:
+        st.session_state.gear_pipeline = IncrementalPipeline()
+    gear_pipeline = st.session_state.gear_pipeline
+    gear_pipeline.update(user_engines, user_scenarios)
+    combined_fig = gear_pipeline.figure
 
     st.plotly_chart(combined_fig, use_container_width=True)
 
@@ -151,10 +227,8 @@ with tab2:
     ## Gear Ratios Table
     st.header("Gear Ratios Table")
 
-    headers, rows = calculator.create_table()
-    
-    # Convert the list of tuples to a Pandas DataFrame
-    df = pd.DataFrame(rows, columns=headers)
+    # Vectorized engines x scenarios table, built directly as a DataFrame
+    df = gear_pipeline.table
    
     # Display the styled DataFrame
     st.dataframe(df, use_container_width=True)
@@ -176,6 +250,8 @@ with tab3:
         e_off = st.number_input("Off-state Energy Loss (E_off) [mJ]", min_value=0.1, max_value=10e3, value=1.0, format="%.2f") * 1e-3
         f_sw_khz = st.selectbox("Switching Frequency (f_sw) [kHz]", [10, 20, 50, 100], index=1)
         mod_index=st.number_input("Modulation index", min_value=0.1, max_value=2.0, value=0.85, format="%.2f")
+        time_domain = st.checkbox("Time-domain PWM losses", value=False,
+                                  help="Simulate sinusoidal PWM over one 50 Hz period instead of the analytic estimate.")
         f_sw = f_sw_khz * 1000
 
     with col2:
@@ -204,7 +280,8 @@ with tab3:
                 i_out_rms = required_ac_power_watt / (math.sqrt(3) * v_out_rms * pf)
                 
                 # Run the inverter model with the corrected parameters
-                inverter_metrics = inverter_model(
+                inverter_metrics = compute_inverter_metrics(
+                    time_domain=time_domain,
                     V_dc=vdc,
                     I_out_rms=i_out_rms,
                     f_sw=f_sw,
@@ -230,34 +307,25 @@ with tab3:
     st.subheader("Inverter Efficiency Curve")
     st.markdown("This graph shows the inverter's efficiency across a range of output currents.")
 
-    current_range = np.linspace(5, 200, 50)  # Analyze current from 5A to 200A
-    efficiency_values = []
-    
-    for i_rms in current_range:
-        v_out_rms_plot = vdc * 0.85 / math.sqrt(2) # Assume constant voltage for simplicity
-        results = inverter_model(
-            V_dc=vdc,
-            I_out_rms=i_rms,
-            f_sw=f_sw,
-            R_on=r_on,
-            V_f=v_f,
-            E_on=e_on,
-            E_off=e_off,
-            V_out_rms=v_out_rms_plot
-        )
-        efficiency_values.append(results['efficiency_percent'])
-
-    efficiency_df = pd.DataFrame({
-        'Output Current (A)': current_range,
-        'Efficiency (%)': efficiency_values
-    })
-
-    fig = go.Figure(data=go.Scatter(x=efficiency_df['Output Current (A)'], y=efficiency_df['Efficiency (%)'], mode='lines+markers'))
-    fig.update_layout(title='Inverter Efficiency vs. Output Current',
-                      xaxis_title='Output Current (A)',
-                      yaxis_title='Efficiency (%)',
-                      yaxis_range=[70, 100])
+    fig = compute_inverter_efficiency_curve(vdc, f_sw, r_on, v_f, e_on, e_off)
     
     st.plotly_chart(fig, use_container_width=True)
 
-
+with st.sidebar:
+    with st.expander("Cache statistics"):
+        st.caption("Per-stage hits and misses of the memoized pipeline since the server started.")
+        st.dataframe(pd.DataFrame(cache_stats()), use_container_width=True, hide_index=True)
+        st.caption("Last update of the gear-ratio table and graphs:")
+        st.json(gear_pipeline.last_update, expanded=False)
+
+    if profiler.enabled:
+        with st.expander("Stage profile", expanded=True):
+            st.caption("Stages executed in this rerun; stages served from the cache do not appear.")
+            profile = profiler.summary()
+            if profile:
+                st.dataframe(pd.DataFrame(profile), use_container_width=True, hide_index=True)
+            else:
+                st.write("No stage ran in this rerun.")
+            st.download_button("Download JSON", profiler.to_json(), file_name="stage_profile.json", mime="application/json")
+            st.download_button("Download Chrome trace", json.dumps(profiler.chrome_trace()),
+                               file_name="stage_trace.json", mime="application/json")
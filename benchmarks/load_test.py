@@ -0,0 +1,172 @@
+"""
+Load test for the local evaluation service (powertrain.service).
+
+Opens `--connections` keep-alive connections to the service and sends
+`--requests` random model requests over them as fast as they are answered
+(a fraction `--repeat` re-sends earlier payloads to exercise the result
+cache). Prints client-side throughput and latency percentiles, then the
+service's own /v1/metrics.
+
+    python -m powertrain.service --port 8765 &
+    python benchmarks/load_test.py --port 8765 --requests 20000 --connections 64
+
+    python benchmarks/load_test.py --spawn --workers 2   # starts and stops its own service
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ENDPOINTS = ('/v1/inverter', '/v1/dynamics')
+
+
+def make_payload(rng, endpoint):
+    if endpoint == '/v1/inverter':
+        V_dc = float(rng.uniform(300, 800))
+        return {'V_dc': V_dc, 'I_out_rms': float(rng.uniform(10, 400)), 'f_sw': float(rng.choice([8e3, 10e3, 16e3, 20e3])),
+                'R_on': float(rng.uniform(0.005, 0.05)), 'V_f': float(rng.uniform(0.8, 2.0)),
+                'E_on': float(rng.uniform(1e-4, 5e-3)), 'E_off': float(rng.uniform(1e-4, 5e-3)),
+                'V_out_rms': V_dc * 0.85 / np.sqrt(2)}
+    return {'speed': float(rng.uniform(0, 180)), 'gradient': float(rng.uniform(-10, 30)),
+            'acceleration': float(rng.uniform(-2, 4)), 'mass': float(rng.uniform(1000, 3000))}
+
+
+def make_requests(n, repeat, seed):
+    rng = np.random.default_rng(seed)
+    requests = []
+    for _ in range(n):
+        if requests and rng.random() < repeat:
+            requests.append(requests[rng.integers(len(requests))])
+        else:
+            endpoint = ENDPOINTS[rng.integers(len(ENDPOINTS))]
+            requests.append((endpoint, json.dumps(make_payload(rng, endpoint)).encode()))
+    return requests
+
+
+async def _request(reader, writer, host, method, path, body=b''):
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def _connection(host, port, queue, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            try:
+                path, body = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            start = time.perf_counter()
+            status, _ = await _request(reader, writer, host, 'POST', path, body)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, requests, connections):
+    queue = asyncio.Queue()
+    for request in requests:
+        queue.put_nowait(request)
+    latencies, statuses = [], {}
+    start = time.perf_counter()
+    await asyncio.gather(*(_connection(host, port, queue, latencies, statuses) for _ in range(connections)))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(host, port)
+    _, metrics = await _request(reader, writer, host, 'GET', '/v1/metrics')
+    writer.close()
+
+    latencies = np.array(latencies) * 1000
+    return {
+        'requests': len(latencies),
+        'connections': connections,
+        'elapsed_s': elapsed,
+        'throughput_rps': len(latencies) / elapsed,
+        'latency_ms': {f'p{q}': float(np.percentile(latencies, q)) for q in (50, 95, 99)},
+        'statuses': statuses,
+        'service': json.loads(metrics),
+    }
+
+
+async def wait_ready(host, port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+            continue
+        status, _ = await _request(reader, writer, host, 'GET', '/v1/health')
+        writer.close()
+        if status == 200:
+            return
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--connections', type=int, default=64)
+    parser.add_argument('--repeat', type=float, default=0.2, help='fraction of requests repeating an earlier payload')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--spawn', action='store_true', help='start (and stop) a service for the test')
+    parser.add_argument('--workers', type=int, default=1, help='service workers with --spawn')
+    parser.add_argument('--max-delay-ms', type=float, default=2.0, help='service micro-batch delay with --spawn')
+    parser.add_argument('--output', help='also write the report to this JSON file')
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.spawn:
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        server = subprocess.Popen([sys.executable, '-m', 'powertrain.service', '--host', args.host,
+                                   '--port', str(args.port), '--workers', str(args.workers),
+                                   '--max-delay-ms', str(args.max_delay_ms)], cwd=root)
+    try:
+        asyncio.run(wait_ready(args.host, args.port))
+        requests = make_requests(args.requests, args.repeat, args.seed)
+        report = asyncio.run(run_load(args.host, args.port, requests, args.connections))
+    finally:
+        if server is not None:
+            server.send_signal(signal.SIGINT)
+            server.wait()
+
+    print(f"{report['requests']} requests over {report['connections']} connections in {report['elapsed_s']:.2f} s: "
+          f"{report['throughput_rps']:.0f} req/s")
+    latency = report['latency_ms']
+    print(f"latency p50 {latency['p50']:.2f} ms  p95 {latency['p95']:.2f} ms  p99 {latency['p99']:.2f} ms  "
+          f"statuses {report['statuses']}")
+    for path, metrics in report['service']['endpoints'].items():
+        if metrics['requests']:
+            print(f"  {path}: {metrics['requests']} requests, {metrics['cache_hits']} cache hits, "
+                  f"{metrics['coalesced']} coalesced, {metrics['batches']} batches (mean {metrics['mean_batch']:.1f}, "
+                  f"max {metrics['max_batch']}), compute {metrics['compute_s']:.2f} s")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0 if set(report['statuses']) == {200} else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
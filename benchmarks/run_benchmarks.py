@@ -0,0 +1,285 @@
+"""
+Benchmark harness for the powertrain models.
+
+Times every stage over growing input sizes and writes throughput, p50/p95
+latency and peak traced memory to JSON. `compare` fails (exit code 1) when a
+stage got slower than a stored baseline by more than a threshold.
+
+    python benchmarks/run_benchmarks.py run --output bench.json [--quick] [--stages inverter_model_batch ...]
+    python benchmarks/run_benchmarks.py compare baseline.json bench.json --threshold 0.25
+    python benchmarks/run_benchmarks.py run --output bench.json --baseline baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from powertrain.acceleration import acceleration_performance
+from powertrain.dynamics import drive_cycle_dynamics, longitudinal_dynamics
+from powertrain.envelope import MotorEnvelope
+from powertrain.gearing import EngineGearRatioCalculator
+from powertrain.inverter import inverter_model, inverter_model_batch
+from powertrain.plots import PowerSpeedGraph, TorqueSpeedGraph
+
+POINT_SIZES = [1, 10, 100, 1_000, 10_000, 100_000, 1_000_000]
+MOTOR_SIZES = [8, 100, 1_000, 10_000]
+QUICK_POINT_SIZES = [1, 100, 10_000]
+QUICK_MOTOR_SIZES = [8, 100]
+
+# Ratios tried with every motor by the acceleration stage (motors x 10 candidates)
+ACCELERATION_GEAR_RATIOS = np.linspace(4, 13, 10)
+
+# Scalar per-call stages are Python loops; larger sizes only measure the loop
+SCALAR_LOOP_LIMIT = 10_000
+
+DEFAULT_SCENARIOS = [
+    {'max_speed_vehicle': 1768.39, 'torque': 352, 'power': 65.167, 'max_speed_gearbox': 6, 'condition': 'high_speed'},
+    {'max_speed_vehicle': 88.42, 'torque': 6530, 'power': 60.467, 'max_speed_gearbox': 6, 'condition': 'low_speed'},
+    {'max_speed_vehicle': 442.1, 'torque': 3020, 'power': 139.81, 'max_speed_gearbox': 6, 'condition': 'idle'},
+]
+
+
+# ---
+## Inputs
+
+def make_operating_points(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        'speed': rng.uniform(0, 180, n),
+        'gradient': rng.uniform(-5, 15, n),
+        'acceleration': rng.uniform(-3, 3, n),
+        'current': rng.uniform(5, 300, n),
+    }
+
+
+def make_engines(n, seed=0):
+    rng = np.random.default_rng(seed)
+    low_speed = rng.uniform(1000, 5000, n)
+    return {
+        f'Engine{i + 1}': {
+            'low_speed': low_speed[i],
+            'high_speed': low_speed[i] + rng.uniform(3000, 10000),
+            'high_torque': rng.uniform(150, 1000),
+            'low_torque': rng.uniform(40, 150),
+        }
+        for i in range(n)
+    }
+
+
+# ---
+## Stages: name -> (size axis, setup(size) -> callable)
+
+def _longitudinal_dynamics(n):
+    p = make_operating_points(n)
+    args = list(zip(p['speed'].tolist(), p['gradient'].tolist(), p['acceleration'].tolist()))
+    return lambda: [longitudinal_dynamics(s, g, a, 2000) for s, g, a in args]
+
+
+def _drive_cycle_dynamics(n):
+    p = make_operating_points(n)
+    return lambda: drive_cycle_dynamics(p['speed'], p['gradient'], 2000, 0.1)
+
+
+def _inverter_model(n):
+    currents = make_operating_points(n)['current'].tolist()
+    return lambda: [inverter_model(400, i, 2e4, 0.01, 1.0, 1.5e-3, 1e-3, 240) for i in currents]
+
+
+def _inverter_model_batch(n):
+    current = make_operating_points(n)['current']
+    return lambda: inverter_model_batch(400, current, 2e4, 0.01, 1.0, 1.5e-3, 1e-3, 240)
+
+
+def _calculate_gear_ratios(n):
+    calculator = EngineGearRatioCalculator(make_engines(n), DEFAULT_SCENARIOS)
+    return calculator.calculate_gear_ratios
+
+
+def _create_table(n):
+    calculator = EngineGearRatioCalculator(make_engines(n), DEFAULT_SCENARIOS)
+    return calculator.create_table
+
+
+def _create_table_frame(n):
+    calculator = EngineGearRatioCalculator(make_engines(n), DEFAULT_SCENARIOS)
+    return calculator.create_table_frame
+
+
+def _torque_speed_plot(n):
+    engines = make_engines(n)
+    envelope = MotorEnvelope.from_engines(engines)
+    return TorqueSpeedGraph(engines, DEFAULT_SCENARIOS, None, envelope).plot
+
+
+def _power_speed_plot(n):
+    engines = make_engines(n)
+    calculator = EngineGearRatioCalculator(engines, DEFAULT_SCENARIOS)
+    gear_ratios = calculator.calculate_gear_ratios()
+    return PowerSpeedGraph(engines, DEFAULT_SCENARIOS, gear_ratios, calculator.envelope).plot
+
+
+def _acceleration_performance(n):
+    engines = make_engines(n)
+    return lambda: acceleration_performance(engines, ACCELERATION_GEAR_RATIOS)
+
+
+STAGES = {
+    'longitudinal_dynamics': ('points', _longitudinal_dynamics),
+    'drive_cycle_dynamics': ('points', _drive_cycle_dynamics),
+    'inverter_model': ('points', _inverter_model),
+    'inverter_model_batch': ('points', _inverter_model_batch),
+    'calculate_gear_ratios': ('motors', _calculate_gear_ratios),
+    'create_table': ('motors', _create_table),
+    'create_table_frame': ('motors', _create_table_frame),
+    'torque_speed_plot': ('motors', _torque_speed_plot),
+    'power_speed_plot': ('motors', _power_speed_plot),
+    'acceleration_performance': ('motors', _acceleration_performance),
+}
+
+SCALAR_STAGES = {'longitudinal_dynamics', 'inverter_model'}
+
+
+# ---
+## Measurement
+
+def measure(func, min_time=0.2, min_repeats=3, max_repeats=50):
+    """Latency samples (s) and peak traced memory (bytes) of `func`."""
+    func()  # warm-up: imports, caches, first-touch allocation
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    samples = []
+    start = time.perf_counter()
+    while len(samples) < max_repeats and (len(samples) < min_repeats or time.perf_counter() - start < min_time):
+        t0 = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - t0)
+    return np.array(samples), peak
+
+
+def run(stages, point_sizes, motor_sizes, min_time, progress=print):
+    results = []
+    for stage in stages:
+        axis, setup = STAGES[stage]
+        sizes = point_sizes if axis == 'points' else motor_sizes
+        if stage in SCALAR_STAGES:
+            sizes = [n for n in sizes if n <= SCALAR_LOOP_LIMIT]
+        for n in sizes:
+            samples, peak = measure(setup(n), min_time=min_time)
+            p50, p95 = np.percentile(samples, [50, 95])
+            record = {
+                'stage': stage,
+                'size': n,
+                'unit': axis,
+                'repeats': len(samples),
+                'p50_s': float(p50),
+                'p95_s': float(p95),
+                'throughput_per_s': float(n / p50) if p50 > 0 else float('inf'),
+                'peak_mem_bytes': int(peak),
+            }
+            results.append(record)
+            progress(f"{stage:<24} {n:>9} {axis:<6} p50 {p50 * 1e3:10.3f} ms  p95 {p95 * 1e3:10.3f} ms  "
+                     f"{record['throughput_per_s']:14.0f} {axis}/s  peak {peak / 1e6:8.2f} MB")
+    return results
+
+
+def metadata():
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+# ---
+## Regression gate
+
+def compare(baseline, current, threshold, memory_threshold=None):
+    """
+    Regressions of `current` against `baseline` (both result lists).
+
+    A (stage, size) pair regresses when its p50 latency grew by more than
+    `threshold` (fraction), or its peak memory by more than
+    `memory_threshold` when given. Pairs missing from either side are skipped.
+    """
+    base = {(r['stage'], r['size']): r for r in baseline}
+    regressions = []
+    for r in current:
+        b = base.get((r['stage'], r['size']))
+        if b is None:
+            continue
+        time_ratio = r['p50_s'] / b['p50_s'] if b['p50_s'] > 0 else 1.0
+        mem_ratio = r['peak_mem_bytes'] / b['peak_mem_bytes'] if b['peak_mem_bytes'] > 0 else 1.0
+        if time_ratio > 1 + threshold:
+            regressions.append({'stage': r['stage'], 'size': r['size'], 'metric': 'p50_s',
+                                'baseline': b['p50_s'], 'current': r['p50_s'], 'ratio': time_ratio})
+        if memory_threshold is not None and mem_ratio > 1 + memory_threshold:
+            regressions.append({'stage': r['stage'], 'size': r['size'], 'metric': 'peak_mem_bytes',
+                                'baseline': b['peak_mem_bytes'], 'current': r['peak_mem_bytes'], 'ratio': mem_ratio})
+    return regressions
+
+
+def _load_results(path):
+    with open(path) as f:
+        return json.load(f)['results']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = sub.add_parser('run', help='run the benchmarks and write JSON results')
+    run_parser.add_argument('--output', '-o', default='bench.json')
+    run_parser.add_argument('--stages', nargs='+', choices=sorted(STAGES), default=list(STAGES))
+    run_parser.add_argument('--quick', action='store_true', help='small sizes only (smoke run)')
+    run_parser.add_argument('--min-time', type=float, default=0.2, help='minimum timing window per size (s)')
+    run_parser.add_argument('--baseline', help='compare against this results file after the run')
+    run_parser.add_argument('--threshold', type=float, default=0.25, help='allowed p50 slowdown (fraction)')
+    run_parser.add_argument('--memory-threshold', type=float, default=None, help='allowed peak memory growth (fraction)')
+
+    cmp_parser = sub.add_parser('compare', help='fail on regressions against a baseline')
+    cmp_parser.add_argument('baseline')
+    cmp_parser.add_argument('current')
+    cmp_parser.add_argument('--threshold', type=float, default=0.25, help='allowed p50 slowdown (fraction)')
+    cmp_parser.add_argument('--memory-threshold', type=float, default=None, help='allowed peak memory growth (fraction)')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        point_sizes = QUICK_POINT_SIZES if args.quick else POINT_SIZES
+        motor_sizes = QUICK_MOTOR_SIZES if args.quick else MOTOR_SIZES
+        results = run(args.stages, point_sizes, motor_sizes, args.min_time)
+        with open(args.output, 'w') as f:
+            json.dump({'meta': metadata(), 'results': results}, f, indent=2)
+        print(f"wrote {len(results)} results to {args.output}")
+        if not args.baseline:
+            return 0
+        regressions = compare(_load_results(args.baseline), results, args.threshold, args.memory_threshold)
+    else:
+        regressions = compare(_load_results(args.baseline), _load_results(args.current),
+                              args.threshold, args.memory_threshold)
+
+    for r in regressions:
+        print(f"REGRESSION {r['stage']} size={r['size']} {r['metric']}: "
+              f"{r['baseline']:.6g} -> {r['current']:.6g} (x{r['ratio']:.2f})")
+    if regressions:
+        return 1
+    print("no regressions")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+Headless powertrain models: vehicle dynamics, gear-ratio selection and
+inverter losses, usable without Streamlit.
+
+Submodules are imported on first attribute access, so `import powertrain`
+itself costs almost nothing and only the models actually used pull in NumPy.
+Plotly and SciPy are loaded by `powertrain.plots` only when a figure is built.
+"""
+
+import importlib
+
+# Public name -> submodule that defines it
+_EXPORTS = {
+    "propulsion_demand": "dynamics",
+    "longitudinal_dynamics": "dynamics",
+    "drive_cycle_dynamics": "dynamics",
+    "iter_drive_cycle_chunks": "dynamics",
+    "simulate_drive_cycle": "dynamics",
+    "simulate_drive_cycle_chunks": "dynamics",
+    "inverter_model": "inverter",
+    "inverter_model_batch": "inverter",
+    "INVERTER_RESULT_DTYPE": "inverter",
+    "inverter_model_pwm": "pwm",
+    "DeviceCurve": "devices",
+    "SemiconductorDevice": "devices",
+    "PWM_RESULT_DTYPE": "pwm",
+    "FosterNetwork": "thermal",
+    "inverter_cycle_losses": "thermal",
+    "simulate_junction_temperature": "thermal",
+    "EngineGearRatioCalculator": "gearing",
+    "optimize_gear_sets": "gearbox",
+    "gear_sets_frame": "gearbox",
+    "MotorEnvelope": "envelope",
+    "LossMap": "lossmap",
+    "LossMapStore": "lossmap",
+    "drive_cycle_energy": "lossmap",
+    "IncrementalPipeline": "incremental",
+    "ComponentLibrary": "library",
+    "write_library": "library",
+    "TorqueSpeedGraph": "plots",
+    "PowerSpeedGraph": "plots",
+    "SweepSpace": "sweep",
+    "run_sweep": "sweep",
+    "pareto_mask": "sweep",
+    "front_to_frame": "sweep",
+    "memoize": "cache",
+    "content_hash": "cache",
+    "cache_stats": "cache",
+    "clear_caches": "cache",
+    "Profiler": "profiling",
+    "PROFILER": "profiling",
+    "use_profiler": "profiling",
+    "run_batch": "cli",
+    "run_monte_carlo": "montecarlo",
+    "monte_carlo_frame": "montecarlo",
+    "RunningStats": "montecarlo",
+    "QuantileSketch": "montecarlo",
+    "EvaluationService": "service",
+    "DemandHistogram": "demand",
+    "demand_from_log": "demand",
+    "acceleration_performance": "acceleration",
+    "best_candidates": "acceleration",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{module}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
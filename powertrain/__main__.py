@@ -0,0 +1,5 @@
+import sys
+
+from powertrain.cli import main
+
+sys.exit(main())
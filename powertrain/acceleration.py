@@ -0,0 +1,191 @@
+"""
+Acceleration performance of motor x gear-ratio candidates (no UI dependencies).
+
+Every candidate is one motor envelope driving the wheels through one fixed
+ratio. Time-to-speed runs (0-100 km/h, 80-120 km/h overtaking) integrate
+m * dv/dt = F_wheel(v) - F_resistance(v) with a fixed-step Heun scheme,
+advancing the speed of all candidates together as one array: the wheel force
+is the full-load motor torque (`MotorEnvelope.torque_at`) through the ratio
+and the driveline efficiency, and the resistance is the aero, rolling and
+grade force of `propulsion_demand`. Finished and stalled candidates leave the
+active set, so each step only touches candidates still accelerating.
+Gradeability is the steepest gradient the wheel force can hold at a given
+speed, solved in closed form.
+"""
+
+import math
+
+import numpy as np
+
+from powertrain import dynamics
+from powertrain.dynamics import propulsion_demand
+from powertrain.envelope import MotorEnvelope
+
+DEFAULT_DT = 0.05  # Integration step (s)
+DEFAULT_T_MAX = 60.0  # Runs slower than this count as not reaching the target (s)
+DRIVELINE_EFFICIENCY = 0.9
+
+# name -> (start km/h, target km/h) of the standard runs
+ACCELERATION_RUNS = {
+    '0-100 km/h': (0.0, 100.0),
+    '80-120 km/h': (80.0, 120.0),
+}
+GRADEABILITY_SPEED = 10.0  # km/h at which gradeability is reported
+
+
+def candidate_grid(engines, gear_ratios):
+    """
+    Every motor with every ratio, motor-major.
+
+    Args:
+        engines: MotorEnvelope, dict of dicts or DataFrame of motors.
+        gear_ratios (array-like): Candidate ratios, shared by all motors.
+
+    Returns:
+        tuple: (MotorEnvelope with one row per candidate, ratio per candidate)
+    """
+    envelope = MotorEnvelope.from_engines(engines)
+    ratios = np.asarray(gear_ratios, dtype=float).reshape(-1)
+    motors = np.repeat(np.arange(len(envelope)), len(ratios))
+    return envelope[motors], np.tile(ratios, len(envelope))
+
+
+def _wheel_speed_rpm(v, r_wheel):
+    return v / r_wheel * 30 / np.pi
+
+
+def time_to_speed(envelope, gear_ratio, v_start, v_end, mass=2000, gradient=0.0, efficiency=DRIVELINE_EFFICIENCY,
+                  dt=DEFAULT_DT, t_max=DEFAULT_T_MAX, **vehicle):
+    """
+    Full-load acceleration time of every candidate from `v_start` to `v_end` (km/h).
+
+    Args:
+        envelope (MotorEnvelope): One motor per candidate.
+        gear_ratio (float or np.ndarray): Motor-to-wheel ratio, one per candidate.
+        mass (float): Vehicle mass in kg.
+        gradient (float): Road gradient in %.
+        efficiency (float): Driveline efficiency.
+        dt, t_max (float): Integration step and time limit (s).
+        **vehicle: Optional Cr, Caero, A_F, rho, r_wheel overrides.
+
+    Returns:
+        tuple: Time (s) and distance (m) per candidate; inf time where the
+               target is not reached within `t_max` (or the motor runs out
+               of speed or force first).
+    """
+    n = len(envelope)
+    ratio = np.broadcast_to(np.asarray(gear_ratio, dtype=float), (n,))
+    r_wheel = vehicle.get('r_wheel', dynamics.r_wheel)
+    theta = math.atan(gradient / 100.0)
+    v_end = v_end / 3.6
+
+    time = np.full(n, np.inf)
+    distance = np.full(n, np.nan)
+    # Candidates whose motor is past high_speed before the target never get
+    # there; left in, they would creep along their speed limit until t_max
+    active = np.flatnonzero(_wheel_speed_rpm(v_end, r_wheel) * ratio <= envelope.high_speed)
+    motors, gain = envelope[active], ratio * efficiency / r_wheel
+    v = np.full(active.size, v_start / 3.6)
+    x = np.zeros(active.size)
+
+    def accel(v):
+        torque = motors.torque_at(_wheel_speed_rpm(v, r_wheel) * ratio[active], outer=False)
+        resistance = propulsion_demand(v, theta, 0.0, mass, **vehicle)[0]
+        return (torque * gain[active] - resistance) / mass
+
+    t = 0.0
+    while active.size and t < t_max:
+        # Heun step for every active candidate at once
+        a0 = accel(v)
+        v_pred = v + dt * a0
+        a1 = accel(v_pred)
+        v_new = v + 0.5 * dt * (a0 + a1)
+        x_new = x + 0.5 * dt * (v + v_new)
+
+        crossed = v_new >= v_end
+        stalled = ~crossed & (v_new <= v)
+        if crossed.any():
+            # Linear interpolation of the crossing inside the step
+            frac = (v_end - v[crossed]) / (v_new[crossed] - v[crossed])
+            time[active[crossed]] = t + frac * dt
+            distance[active[crossed]] = x[crossed] + frac * (x_new[crossed] - x[crossed])
+        t += dt
+        done = crossed | stalled
+        if done.any():
+            keep = ~done
+            active, v, x = active[keep], v_new[keep], x_new[keep]
+            motors = motors[keep]
+        else:
+            v, x = v_new, x_new
+    return time, distance
+
+
+def gradeability(envelope, gear_ratio, speed=GRADEABILITY_SPEED, mass=2000, efficiency=DRIVELINE_EFFICIENCY,
+                 **vehicle):
+    """
+    Steepest gradient (%) every candidate can climb at a steady `speed` (km/h).
+
+    Solves F_wheel - F_aero = m g (Cr cos(theta) + sin(theta)) for theta.
+
+    Returns:
+        np.ndarray: Gradient in % per candidate (inf when the wheel force
+        exceeds what any slope requires, NaN when it cannot even hold level road).
+    """
+    Cr = vehicle.get('Cr', dynamics.Cr)
+    r_wheel = vehicle.get('r_wheel', dynamics.r_wheel)
+    v = speed / 3.6
+    ratio = np.asarray(gear_ratio, dtype=float)
+    torque = envelope.torque_at(np.broadcast_to(_wheel_speed_rpm(v, r_wheel) * ratio, (len(envelope),)), outer=False)
+    F_aero = propulsion_demand(v, 0.0, 0.0, 0.0, **vehicle)[0]
+    available = (torque * ratio * efficiency / r_wheel - F_aero) / (mass * dynamics.g * math.hypot(1.0, Cr))
+    with np.errstate(invalid='ignore'):
+        theta = np.arcsin(np.clip(available, -1.0, 1.0)) - math.atan(Cr)
+        gradient = 100 * np.tan(theta)
+    gradient = np.where(available >= 1.0, np.inf, gradient)
+    return np.where(theta < 0, np.nan, gradient)
+
+
+def acceleration_performance(engines, gear_ratios, mass=2000, efficiency=DRIVELINE_EFFICIENCY, runs=None,
+                             gradeability_speed=GRADEABILITY_SPEED, dt=DEFAULT_DT, t_max=DEFAULT_T_MAX, **vehicle):
+    """
+    Time-to-speed runs and gradeability of every motor x gear-ratio candidate.
+
+    Args:
+        engines: MotorEnvelope, dict of dicts or DataFrame of motors.
+        gear_ratios (array-like): Candidate ratios tried with every motor.
+        mass (float): Vehicle mass in kg.
+        efficiency (float): Driveline efficiency.
+        runs (dict, optional): name -> (start km/h, target km/h); defaults
+            to ACCELERATION_RUNS.
+        gradeability_speed (float): Speed (km/h) of the gradeability figure.
+        dt, t_max (float): Integration step and time limit (s).
+        **vehicle: Optional Cr, Caero, A_F, rho, r_wheel overrides.
+
+    Returns:
+        dict: 'Engine' and 'Gear Ratio' per candidate, '<run> (s)' times,
+              'Gradeability (%)' and 'Speed Limit (km/h)' (where the motor reaches high_speed).
+    """
+    envelope, ratios = candidate_grid(engines, gear_ratios)
+    r_wheel = vehicle.get('r_wheel', dynamics.r_wheel)
+    result = {'Engine': envelope.names, 'Gear Ratio': ratios}
+    for name, (v_start, v_end) in (ACCELERATION_RUNS if runs is None else runs).items():
+        result[f'{name} (s)'] = time_to_speed(envelope, ratios, v_start, v_end, mass, 0.0, efficiency,
+                                              dt, t_max, **vehicle)[0]
+    result['Gradeability (%)'] = gradeability(envelope, ratios, gradeability_speed, mass, efficiency, **vehicle)
+    result['Speed Limit (km/h)'] = envelope.high_speed / ratios * (np.pi / 30) * r_wheel * 3.6
+    return result
+
+
+def best_candidates(result, by='0-100 km/h (s)', n=10, min_gradeability=None):
+    """
+    The `n` best candidates of `acceleration_performance` as a DataFrame,
+    sorted by `by` (ascending for times, descending otherwise), optionally
+    only those that climb at least `min_gradeability` (%).
+    """
+    import pandas as pd
+
+    frame = pd.DataFrame(result)
+    if min_gradeability is not None:
+        frame = frame[frame['Gradeability (%)'] >= min_gradeability]
+    ascending = by.endswith('(s)')
+    return frame.sort_values(by, ascending=ascending, kind='stable').head(n).reset_index(drop=True)
@@ -0,0 +1,175 @@
+"""
+Content-addressed memoization for the app pipeline.
+
+Streamlit re-executes the whole script on every widget change, so caches are
+kept in a module-level registry keyed by stage name: re-running the script
+re-creates the decorated functions but finds the same cache, and each stage
+only recomputes when the content hash of its own inputs changes.
+"""
+
+import hashlib
+import pickle
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+import numpy as np
+
+DEFAULT_MAXSIZE = 16
+
+
+def _update(h, obj):
+    """Feeds a canonical byte encoding of `obj` into hash `h`."""
+    if hasattr(obj, 'columns') and hasattr(obj, 'index'):  # DataFrame
+        import pandas as pd
+        h.update(b'frame')
+        _update(h, [str(c) for c in obj.columns])
+        _update(h, [str(t) for t in obj.dtypes])
+        h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, np.ndarray):
+        h.update(b'array')
+        h.update(str(obj.dtype).encode())
+        h.update(str(obj.shape).encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, dict):
+        # Insertion order is part of the content (it sets table and trace order)
+        h.update(b'dict%d' % len(obj))
+        for key, value in obj.items():
+            _update(h, key)
+            _update(h, value)
+    elif isinstance(obj, (list, tuple)):
+        h.update(b'seq%d' % len(obj))
+        for item in obj:
+            _update(h, item)
+    elif isinstance(obj, bytes):
+        # Raw and length-prefixed: no escaped copy of large uploads
+        h.update(b'bytes%d' % len(obj))
+        h.update(obj)
+    elif isinstance(obj, str):
+        data = obj.encode('utf-8', 'surrogatepass')
+        h.update(b'str%d' % len(data))
+        h.update(data)
+    elif isinstance(obj, (int, float, bool, type(None), np.generic)):
+        h.update(type(obj).__name__.encode())
+        h.update(repr(obj).encode())
+    else:
+        h.update(pickle.dumps(obj))
+
+
+def content_hash(*objs):
+    """Stable hex digest of the contents of `objs` (DataFrames, arrays, containers, scalars)."""
+    h = hashlib.blake2b(digest_size=16)
+    for obj in objs:
+        _update(h, obj)
+    return h.hexdigest()
+
+
+class ContentCache:
+    """Bounded LRU mapping of content hash -> value with hit/miss/eviction counters."""
+
+    def __init__(self, name, maxsize=DEFAULT_MAXSIZE):
+        self.name = name
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+
+        value = compute()
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def get(self, key, default=None):
+        """Cached value of `key` (counted as a hit or miss), else `default`."""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'stage': self.name,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': len(self._data),
+            'maxsize': self.maxsize,
+            'evictions': self.evictions,
+        }
+
+
+# Stage name -> cache, shared across script reruns
+CACHES = {}
+
+
+def get_cache(name, maxsize=DEFAULT_MAXSIZE):
+    cache = CACHES.get(name)
+    if cache is None:
+        cache = CACHES[name] = ContentCache(name, maxsize)
+    cache.maxsize = maxsize
+    return cache
+
+
+def memoize(name, maxsize=DEFAULT_MAXSIZE):
+    """
+    Decorator caching a stage on the content hash of its arguments.
+
+    The cache lives in CACHES under `name`, so a function re-defined on every
+    Streamlit rerun keeps its cached results.
+    """
+    def decorator(func):
+        cache = get_cache(name, maxsize)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = content_hash(args, kwargs)
+            return cache.get_or_compute(key, lambda: func(*args, **kwargs))
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+def clear_caches():
+    """Empties every registered cache (e.g. to profile a cold run)."""
+    for cache in CACHES.values():
+        cache.clear()
+
+
+def cache_stats():
+    """Counters of every registered cache, one dict per stage."""
+    return [cache.stats() for cache in CACHES.values()]
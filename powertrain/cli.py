@@ -0,0 +1,279 @@
+"""
+Headless batch runs: stream motor tables and inverter parameter sets from
+CSV/Parquet through the gear-ratio and inverter models into CSV/Parquet.
+
+The large table (motors, or inverter sets) is read in chunks of
+`--chunk-size` rows. Each chunk is evaluated against every scenario, possibly
+on a process pool, and appended to the output in input order, so memory
+stays bounded by a few chunks however many rows the input has. Scenario
+tables are small and read whole.
+
+    python -m powertrain gear-ratios --motors motors.parquet --scenarios scenarios.csv --output gear.parquet
+    python -m powertrain inverter --inverters sets.csv --scenarios scenarios.csv --output inverter.parquet --workers 4
+    python -m powertrain demand --log drive_log.parquet --dt 0.1 --mass 1800 --output scenarios.csv
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from powertrain.envelope import ENVELOPE_FIELDS
+from powertrain.gearing import EngineGearRatioCalculator
+from powertrain.inverter import INVERTER_RESULT_DTYPE, inverter_model_batch
+
+DEFAULT_CHUNK_SIZE = 100_000  # Input rows per task
+
+SCENARIO_FIELDS = ('max_speed_vehicle', 'torque', 'power', 'condition')
+INVERTER_FIELDS = ('V_dc', 'f_sw', 'R_on', 'V_f', 'E_on', 'E_off')
+
+# Operating assumptions of the app's inverter tab, overridable per set by
+# optional 'mod_index' and 'pf' columns
+MOTOR_EFFICIENCY = 0.90
+MOD_INDEX = 0.85
+POWER_FACTOR = 0.9
+
+
+# ---
+## Chunked I/O
+
+def read_table(path, columns=None):
+    """Whole CSV/Parquet table as a DataFrame."""
+    import pandas as pd
+
+    if str(path).endswith('.parquet'):
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_csv(path, usecols=columns)
+
+
+def iter_table(path, chunk_size=DEFAULT_CHUNK_SIZE, columns=None):
+    """Yields a CSV/Parquet table as DataFrames of at most `chunk_size` rows."""
+    if str(path).endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        import pandas as pd
+
+        yield from pd.read_csv(path, chunksize=chunk_size, usecols=columns)
+
+
+class ResultWriter:
+    """Appends DataFrames to one CSV or Parquet file (picked by extension)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        self._parquet = str(path).endswith('.parquet')
+        self._writer = None
+        self._schema = None
+
+    def write(self, frame):
+        import pyarrow as pa
+
+        # Categories differ between chunks; plain strings keep one schema
+        for column in frame.columns:
+            if frame[column].dtype == 'category':
+                frame[column] = frame[column].astype(str)
+        table = pa.Table.from_pandas(frame, schema=self._schema, preserve_index=False)
+        if self._writer is None:
+            self._schema = table.schema
+            if self._parquet:
+                import pyarrow.parquet as pq
+                self._writer = pq.ParquetWriter(self.path, self._schema)
+            else:
+                import pyarrow.csv as csv
+                self._writer = csv.CSVWriter(self.path, self._schema)
+        self._writer.write_table(table)
+        self.rows += len(frame)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+# ---
+## Per-chunk models (run in worker processes)
+
+def gear_ratio_chunk(motors, scenarios):
+    """Gear-ratio table rows of one motor chunk against every scenario."""
+    if 'Engine' in motors.columns:
+        motors = motors.set_index('Engine')
+    motors.index = motors.index.astype(str)
+    return EngineGearRatioCalculator(motors, scenarios).create_table_frame()
+
+
+def inverter_chunk(sets, scenarios):
+    """
+    Inverter losses of one chunk of parameter sets at every scenario's power,
+    one row per (set, scenario) in set-major order.
+    """
+    import pandas as pd
+
+    n_sets, n_scenarios = len(sets), len(scenarios)
+    column = lambda name, default: (sets[name].to_numpy(dtype=float) if name in sets.columns
+                                    else np.full(n_sets, default))
+    v_dc = sets['V_dc'].to_numpy(dtype=float)[:, None]
+    mod_index = column('mod_index', MOD_INDEX)[:, None]
+    pf = column('pf', POWER_FACTOR)[:, None]
+    power_w = scenarios['power'].to_numpy(dtype=float)[None, :] * 1000 / MOTOR_EFFICIENCY
+
+    # Same operating point as the app: V_out from the DC link, I_out from power
+    v_out_rms = v_dc * mod_index / math.sqrt(2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        i_out_rms = power_w / (math.sqrt(3) * v_out_rms * pf)
+    params = {name: sets[name].to_numpy(dtype=float)[:, None] for name in INVERTER_FIELDS}
+    params['V_dc'] = v_dc
+    results = inverter_model_batch(I_out_rms=i_out_rms, V_out_rms=v_out_rms, pf=pf, **params)
+
+    set_ids = sets['Device'].to_numpy() if 'Device' in sets.columns else sets.index.to_numpy()
+    frame = pd.DataFrame({
+        'Set': np.repeat(set_ids, n_scenarios),
+        'Condition': np.tile(scenarios['condition'].to_numpy(), n_sets),
+        'Required power (kW)': np.tile(scenarios['power'].to_numpy(dtype=float), n_sets),
+        **{name: np.repeat(params[name][:, 0], n_scenarios) for name in INVERTER_FIELDS},
+        'V_out_rms': np.broadcast_to(v_out_rms, i_out_rms.shape).reshape(-1),
+        'I_out_rms': i_out_rms.reshape(-1),
+    })
+    for field in INVERTER_RESULT_DTYPE.names:
+        frame[field] = results[field].reshape(-1)
+    return frame
+
+
+def _run_chunk(task):
+    kind, chunk, scenarios = task
+    return TASKS[kind](chunk, scenarios)
+
+
+TASKS = {
+    'gear-ratios': gear_ratio_chunk,
+    'inverter': inverter_chunk,
+}
+
+
+# ---
+## Driver
+
+def run_batch(kind, chunks, scenarios, writer, workers=1, progress=None):
+    """
+    Evaluates `chunks` (iterable of DataFrames) with TASKS[kind] and appends
+    each result to `writer` in input order.
+
+    With more than one worker, at most 2 * workers chunks are in flight, so
+    neither the reader nor the pool runs ahead of the writer.
+
+    Returns:
+        dict: 'input_rows', 'output_rows', 'chunks' and 'elapsed_s'.
+    """
+    start = time.perf_counter()
+    stats = {'input_rows': 0, 'output_rows': 0, 'chunks': 0}
+
+    def write(result, n_input):
+        writer.write(result)
+        stats['input_rows'] += n_input
+        stats['output_rows'] += len(result)
+        stats['chunks'] += 1
+        if progress is not None:
+            progress(stats)
+
+    if workers <= 1:
+        for chunk in chunks:
+            write(TASKS[kind](chunk, scenarios), len(chunk))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append((pool.submit(_run_chunk, (kind, chunk, scenarios)), len(chunk)))
+                if len(pending) >= 2 * workers:
+                    future, n_input = pending.popleft()
+                    write(future.result(), n_input)
+            while pending:
+                future, n_input = pending.popleft()
+                write(future.result(), n_input)
+
+    stats['elapsed_s'] = time.perf_counter() - start
+    return stats
+
+
+def demand_main(args):
+    """Streams a drive log through a DemandHistogram and writes its scenario table."""
+    import pandas as pd
+
+    from powertrain.demand import DemandHistogram
+
+    histogram = DemandHistogram(args.mass, args.dt)
+    for frame in iter_table(args.log, args.chunk_size):
+        gradient = frame['gradient'].to_numpy(dtype=float) if 'gradient' in frame else 0.0
+        histogram.update(frame['speed'].to_numpy(dtype=float), gradient)
+
+    scenarios = histogram.scenarios(args.min_time)
+    with ResultWriter(args.output) as writer:
+        writer.write(pd.DataFrame(scenarios, columns=list(SCENARIO_FIELDS) + ['max_speed_gearbox']))
+    summary = histogram.summary()
+    print(f"wrote {len(scenarios)} scenarios to {args.output} ({summary['samples']} samples, "
+          f"{summary['energy_kwh']:.2f} kWh traction, {summary['clipped']} clipped)")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m powertrain', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    def add_common(p):
+        p.add_argument('--scenarios', required=True, help='CSV/Parquet with ' + ', '.join(SCENARIO_FIELDS))
+        p.add_argument('--output', '-o', required=True, help='result file (.csv or .parquet)')
+        p.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='input rows per chunk')
+        p.add_argument('--workers', type=int, default=1, help='worker processes (0: one per CPU)')
+        p.add_argument('--quiet', action='store_true')
+
+    gear = sub.add_parser('gear-ratios', help='gear-ratio table of every motor x scenario')
+    gear.add_argument('--motors', required=True, help='CSV/Parquet with Engine, ' + ', '.join(ENVELOPE_FIELDS))
+    add_common(gear)
+
+    inverter = sub.add_parser('inverter', help='inverter losses of every parameter set x scenario')
+    inverter.add_argument('--inverters', required=True,
+                          help='CSV/Parquet with ' + ', '.join(INVERTER_FIELDS) + ' (optional Device, mod_index, pf)')
+    add_common(inverter)
+
+    demand = sub.add_parser('demand', help='scenario table from a measured speed/gradient log')
+    demand.add_argument('--log', required=True, help='CSV/Parquet with speed (km/h) and optional gradient (%%)')
+    demand.add_argument('--output', '-o', required=True, help='scenario file (.csv or .parquet)')
+    demand.add_argument('--mass', type=float, default=2000, help='vehicle mass (kg)')
+    demand.add_argument('--dt', type=float, default=1.0, help='sample period (s)')
+    demand.add_argument('--min-time', type=float, default=0.0,
+                        help='ignore histogram cells with less time (s) in the envelope')
+    demand.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='log rows per chunk')
+
+    args = parser.parse_args(argv)
+    if args.command == 'demand':
+        return demand_main(args)
+
+    scenarios = read_table(args.scenarios, columns=list(SCENARIO_FIELDS))
+    source = args.motors if args.command == 'gear-ratios' else args.inverters
+    chunks = iter_table(source, args.chunk_size)
+    workers = args.workers or os.cpu_count() or 1
+
+    def progress(stats):
+        if not args.quiet:
+            print(f"{stats['chunks']:>6} chunks  {stats['input_rows']:>12} rows in  "
+                  f"{stats['output_rows']:>12} rows out", file=sys.stderr)
+
+    with ResultWriter(args.output) as writer:
+        stats = run_batch(args.command, chunks, scenarios, writer, workers, progress)
+    print(f"wrote {stats['output_rows']} rows to {args.output} "
+          f"({stats['input_rows']} input rows, {stats['elapsed_s']:.2f} s)")
+    return 0
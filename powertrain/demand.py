@@ -0,0 +1,240 @@
+"""
+Traction demand extracted from measured speed/gradient logs (no UI dependencies).
+
+A `DemandHistogram` streams a log through `drive_cycle_dynamics` one chunk at
+a time and accumulates, on a fixed wheel-speed x wheel-torque grid, the time
+spent in every cell and the largest speed, torque and power and the lowest
+torque seen in it. Memory is set by the grid,
+not the log length, chunks can arrive as they are recorded, and histograms of
+separate logs merge. The result replaces hand-entered scenarios:
+`scenarios()` gives the app's scenario dicts for `EngineGearRatioCalculator`,
+`demand()` the weighted points for `optimize_gear_sets` and `demand_curve()`
+the vehicle power curve of the power-speed graph.
+
+    demand = DemandHistogram(mass=2000, dt=0.1)
+    for speed, gradient in log_chunks:
+        demand.update(speed, gradient)
+    EngineGearRatioCalculator(engines, demand.scenarios())
+"""
+
+import numpy as np
+
+from powertrain.dynamics import DEFAULT_CHUNK_SIZE, drive_cycle_dynamics, iter_drive_cycle_chunks
+
+MAX_WHEEL_RPM = 2000.0  # Upper edge of the wheel-speed axis (rpm); ~226 km/h on a 0.3 m wheel
+MAX_WHEEL_TORQUE = 10000.0  # Torque axis spans +-this (Nm)
+RPM_BINS = 100
+TORQUE_BINS = 200
+
+MAX_SPEED_GEARBOX = 6  # Gear count written into the scenario dicts, as in the app's table
+
+
+class DemandHistogram:
+    """
+    Streaming wheel speed x wheel torque histogram of a drive log.
+
+    Samples outside the grid are counted in the edge cells (and in
+    `clipped`) with their speed and torque capped at the grid edges, so a
+    glitch cannot stretch the envelope past the grid; non-finite samples are
+    skipped (and counted in `skipped`).
+
+    Args:
+        mass (float): Vehicle mass in kg.
+        dt (float): Sample period in seconds.
+        max_rpm, rpm_bins: Wheel-speed axis 0..max_rpm (rpm) and its bin count.
+        max_torque, torque_bins: Wheel-torque axis -max_torque..max_torque (Nm).
+        chunk_size (int): Samples evaluated per vectorized pass.
+        **vehicle: Optional Cr, Caero, A_F, rho, r_wheel overrides.
+    """
+
+    def __init__(self, mass=2000, dt=1.0, max_rpm=MAX_WHEEL_RPM, rpm_bins=RPM_BINS,
+                 max_torque=MAX_WHEEL_TORQUE, torque_bins=TORQUE_BINS, chunk_size=DEFAULT_CHUNK_SIZE, **vehicle):
+        self.mass = mass
+        self.dt = float(dt)
+        self.chunk_size = chunk_size
+        self.vehicle = vehicle
+        self.rpm_edges = np.linspace(0.0, max_rpm, rpm_bins + 1)
+        self.torque_edges = np.linspace(-max_torque, max_torque, torque_bins + 1)
+
+        shape = (rpm_bins, torque_bins)
+        self.counts = np.zeros(shape, dtype=np.int64)  # Samples per cell
+        self.cell_rpm = np.full(shape, -np.inf)  # Largest speed / torque / power (kW) seen per cell
+        self.cell_torque = np.full(shape, -np.inf)
+        self.cell_power = np.full(shape, -np.inf)
+        self.cell_min_torque = np.full(shape, np.inf)  # Lowest torque seen per cell (regeneration)
+
+        self.samples = 0
+        self.clipped = 0
+        self.skipped = 0
+        self.energy_kwh = 0.0
+        self.regen_kwh = 0.0
+        self.v_prev = None  # Last speed (m/s), so chunk boundaries do not break the acceleration
+
+    @property
+    def shape(self):
+        return self.counts.shape
+
+    @property
+    def time_s(self):
+        """Time spent in every cell (s)."""
+        return self.counts * self.dt
+
+    def _index(self, values, edges):
+        n = len(edges) - 1
+        position = (values - edges[0]) * (n / (edges[-1] - edges[0]))
+        outside = (position < 0) | (position >= n)
+        return np.clip(position, 0, n - 1).astype(np.intp), outside
+
+    def _accumulate(self, speed, gradient):
+        result = drive_cycle_dynamics(speed, gradient, self.mass, self.dt, self.v_prev, **self.vehicle)
+        if not result['v_ms'].size:
+            return
+        self.v_prev = result['v_ms'][-1]
+
+        rpm, torque, power = result['w_rpm'], result['Torque'], result['Power']
+        finite = np.isfinite(rpm) & np.isfinite(torque)
+        if not finite.all():
+            self.skipped += int(np.count_nonzero(~finite))
+            rpm, torque, power = rpm[finite], torque[finite], power[finite]
+            if not np.isfinite(self.v_prev):
+                self.v_prev = None
+
+        i, rpm_outside = self._index(rpm, self.rpm_edges)
+        j, torque_outside = self._index(torque, self.torque_edges)
+        cell = i * self.shape[1] + j
+        outside = rpm_outside | torque_outside
+        cell_rpm, cell_torque, cell_power = rpm, torque, power
+        if outside.any():
+            # Edge cells record out-of-grid samples at the edge, with the power of the capped point
+            self.clipped += int(np.count_nonzero(outside))
+            cell_rpm = np.clip(rpm, self.rpm_edges[0], self.rpm_edges[-1])
+            cell_torque = np.clip(torque, self.torque_edges[0], self.torque_edges[-1])
+            cell_power = np.where(outside, cell_torque * cell_rpm * (np.pi / 30) / 1000, power)
+
+        self.counts += np.bincount(cell, minlength=self.counts.size).reshape(self.shape)
+        np.maximum.at(self.cell_rpm.reshape(-1), cell, cell_rpm)
+        np.maximum.at(self.cell_torque.reshape(-1), cell, cell_torque)
+        np.maximum.at(self.cell_power.reshape(-1), cell, cell_power)
+        np.minimum.at(self.cell_min_torque.reshape(-1), cell, cell_torque)
+
+        self.samples += rpm.size
+        traction = float(np.maximum(power, 0.0).sum())
+        self.energy_kwh += traction * self.dt / 3600
+        self.regen_kwh += (float(power.sum()) - traction) * self.dt / 3600
+
+    def update(self, speed, gradient=0.0):
+        """
+        Adds the next samples of the log (speed in km/h, gradient in % as
+        scalar or array), in `chunk_size` slices so memory-mapped logs stay
+        on disk. Returns the histogram.
+        """
+        return self.update_chunks(iter_drive_cycle_chunks(speed, gradient, self.chunk_size))
+
+    def update_chunks(self, chunks):
+        """Adds (speed, gradient) chunks in time order (see `update`)."""
+        for speed, gradient in chunks:
+            self._accumulate(np.asarray(speed, dtype=float), gradient)
+        return self
+
+    def merge(self, other):
+        """Adds the histogram of a separate log on the same grid. Returns this histogram."""
+        if not (np.array_equal(self.rpm_edges, other.rpm_edges) and np.array_equal(self.torque_edges, other.torque_edges)
+                and self.dt == other.dt):
+            raise ValueError("histograms must share the same speed and torque bins and sample period")
+        self.counts += other.counts
+        np.maximum(self.cell_rpm, other.cell_rpm, out=self.cell_rpm)
+        np.maximum(self.cell_torque, other.cell_torque, out=self.cell_torque)
+        np.maximum(self.cell_power, other.cell_power, out=self.cell_power)
+        np.minimum(self.cell_min_torque, other.cell_min_torque, out=self.cell_min_torque)
+        self.samples += other.samples
+        self.clipped += other.clipped
+        self.skipped += other.skipped
+        self.energy_kwh += other.energy_kwh
+        self.regen_kwh += other.regen_kwh
+        return self
+
+    # ---
+    ## Views
+
+    def envelope(self, min_time=0.0):
+        """
+        Max-demand envelope over the occupied speed bins, in speed order.
+
+        Args:
+            min_time (float): Cells with less time (s) are ignored, to drop
+                rare outliers from the envelope.
+
+        Returns:
+            dict: Arrays 'rpm' (largest wheel speed in the bin), 'torque'
+                  (peak wheel torque, Nm), 'power' (peak power, kW),
+                  'min_torque' (deepest regenerative torque, Nm) and 'time_s',
+                  all over the cells kept by `min_time`.
+        """
+        occupied = (self.time_s > 0) & (self.time_s >= min_time)
+        bins = np.flatnonzero(occupied.any(axis=1))
+        occupied = occupied[bins]
+        kept = lambda cells, empty: np.where(occupied, cells[bins], empty)
+        return {
+            'rpm': kept(self.cell_rpm, -np.inf).max(axis=1),
+            'torque': kept(self.cell_torque, -np.inf).max(axis=1),
+            'power': kept(self.cell_power, -np.inf).max(axis=1),
+            'min_torque': kept(self.cell_min_torque, np.inf).min(axis=1),
+            'time_s': kept(self.time_s, 0.0).sum(axis=1),
+        }
+
+    def demand_curve(self, min_time=0.0):
+        """(wheel rpm, peak power kW) of the envelope, for the power-speed graph."""
+        envelope = self.envelope(min_time)
+        return envelope['rpm'], envelope['power']
+
+    def demand(self, min_time=0.0):
+        """
+        Traction demand points (rpm, torque Nm, weight s) for
+        `optimize_gear_sets`: one per occupied cell with positive torque, at
+        the largest speed and torque seen in it, weighted by its time.
+        """
+        cells = (self.time_s > 0) & (self.time_s >= min_time) & (self.cell_torque > 0)
+        return self.cell_rpm[cells], self.cell_torque[cells], self.time_s[cells]
+
+    def scenarios(self, min_time=0.0, max_speed_gearbox=MAX_SPEED_GEARBOX):
+        """
+        Scenario dicts in the app's format from the traction envelope: the
+        top-speed point ('high_speed'), the peak-torque point ('low_speed')
+        and the peak-power point ('max_power').
+
+        Returns:
+            list: Dicts with max_speed_vehicle (wheel rpm), torque (Nm),
+                  power (kW), max_speed_gearbox and condition; empty if the
+                  log has no traction.
+        """
+        envelope = self.envelope(min_time)
+        traction = np.flatnonzero(envelope['torque'] > 0)
+        if not traction.size:
+            return []
+        picks = (
+            ('high_speed', traction[-1]),
+            ('low_speed', traction[np.argmax(envelope['torque'][traction])]),
+            ('max_power', traction[np.argmax(envelope['power'][traction])]),
+        )
+        return [{
+            'max_speed_vehicle': round(float(envelope['rpm'][k]), 2),
+            'torque': round(float(envelope['torque'][k]), 2),
+            'power': round(float(envelope['power'][k]), 3),
+            'max_speed_gearbox': max_speed_gearbox,
+            'condition': condition,
+        } for condition, k in picks]
+
+    def summary(self):
+        return {
+            'samples': self.samples,
+            'duration_s': self.samples * self.dt,
+            'energy_kwh': self.energy_kwh,
+            'regen_kwh': self.regen_kwh,
+            'clipped': self.clipped,
+            'skipped': self.skipped,
+        }
+
+
+def demand_from_log(speed, gradient=0.0, mass=2000, dt=1.0, **options):
+    """DemandHistogram of a whole speed/gradient log (arrays, possibly memory-mapped)."""
+    return DemandHistogram(mass, dt, **options).update(speed, gradient)
@@ -0,0 +1,151 @@
+"""
+Semiconductor device models with datasheet curves (no UI dependencies).
+
+Datasheets give R_on, V_f, E_on and E_off as curves over current at a few
+junction temperatures. A `DeviceCurve` keeps one such family as sorted
+current and temperature axes plus a (temperatures x currents) value grid;
+batched lookups locate every point on both axes with `searchsorted` and
+interpolate bilinearly in one pass over the points. `SemiconductorDevice`
+groups the four curves and is accepted by `inverter_model` and
+`inverter_model_batch` through their `device=` argument.
+"""
+
+import math
+
+import numpy as np
+
+DEVICE_FIELDS = ('R_on', 'V_f', 'E_on', 'E_off')
+
+
+def _axis(axis, x):
+    """Segment index and fractional position of `x` on a sorted axis (len >= 2)."""
+    index = np.clip(np.searchsorted(axis, x, side='right') - 1, 0, len(axis) - 2)
+    lower = axis[index]
+    return index, (x - lower) / (axis[index + 1] - lower)
+
+
+class DeviceCurve:
+    """
+    One datasheet quantity over (current, junction temperature).
+
+    Values are interpolated linearly in current (and extrapolated from the
+    end segments, never below zero) and linearly in temperature (held at
+    the first/last curve outside the measured range).
+
+    Args:
+        current (array-like): Current axis (A), strictly increasing.
+        temperature (array-like): Junction-temperature axis (C), strictly increasing.
+        values (array-like): Grid of shape (len(temperature), len(current)).
+    """
+
+    def __init__(self, current, temperature, values):
+        self.current = np.asarray(current, dtype=float).reshape(-1)
+        self.temperature = np.asarray(temperature, dtype=float).reshape(-1)
+        self.values = np.asarray(values, dtype=float).reshape(len(self.temperature), len(self.current))
+        for name, axis in (('current', self.current), ('temperature', self.temperature)):
+            if axis.size > 1 and not np.all(np.diff(axis) > 0):
+                raise ValueError(f"{name} axis must be strictly increasing")
+
+    @classmethod
+    def constant(cls, value):
+        return cls([0.0], [25.0], [[value]])
+
+    @classmethod
+    def from_curves(cls, curves):
+        """
+        Curve family from datasheet curves that need not share current points.
+
+        Args:
+            curves (dict): {temperature (C): (currents, values)}. Each curve is
+                resampled onto the union of all current points.
+        """
+        temperatures = sorted(curves)
+        current = np.unique(np.concatenate([np.asarray(curves[t][0], dtype=float) for t in temperatures]))
+        values = []
+        for t in temperatures:
+            x, y = (np.asarray(a, dtype=float) for a in curves[t])
+            order = np.argsort(x)
+            values.append(DeviceCurve(x[order], [t], y[order][None, :])(current, t))
+        return cls(current, temperatures, values)
+
+    def __call__(self, current, temperature=25.0):
+        """Values at broadcastable arrays of current (A) and temperature (C)."""
+        current, temperature = np.broadcast_arrays(np.asarray(current, dtype=float),
+                                                   np.asarray(temperature, dtype=float))
+        n_current, n_temperature = len(self.current), len(self.temperature)
+        if n_current == 1:
+            by_current = self.values[:, 0][:, None] * np.ones_like(current).reshape(1, -1)
+        else:
+            index, weight = _axis(self.current, current.reshape(-1))
+            lower = self.values[:, index]
+            by_current = lower + weight * (self.values[:, index + 1] - lower)
+        if n_temperature == 1:
+            result = by_current[0]
+        else:
+            t = np.clip(temperature.reshape(-1), self.temperature[0], self.temperature[-1])
+            index, weight = _axis(self.temperature, t)
+            points = np.arange(t.size)
+            lower = by_current[index, points]
+            result = lower + weight * (by_current[index + 1, points] - lower)
+        return np.maximum(result, 0.0).reshape(current.shape)
+
+    def to_dict(self):
+        return {'current': self.current.tolist(), 'temperature': self.temperature.tolist(),
+                'values': self.values.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['current'], data['temperature'], data['values'])
+
+
+class SemiconductorDevice:
+    """
+    Switch + diode of one inverter position, described by datasheet curves.
+
+    Args:
+        name (str): Device name.
+        R_on, V_f, E_on, E_off: DeviceCurve or constant (ohm, V, J, J).
+        V_ref (float, optional): DC voltage the switching energies were
+            measured at; energies then scale linearly with V_dc.
+    """
+
+    def __init__(self, name, R_on, V_f, E_on, E_off, V_ref=None):
+        self.name = name
+        self.V_ref = V_ref
+        self.curves = {}
+        for field, curve in zip(DEVICE_FIELDS, (R_on, V_f, E_on, E_off)):
+            self.curves[field] = curve if isinstance(curve, DeviceCurve) else DeviceCurve.constant(curve)
+
+    def parameters(self, I_out_rms, T_j=25.0, V_dc=None):
+        """
+        R_on, V_f, E_on and E_off at an inverter operating point.
+
+        Conduction parameters are read at the RMS phase current; switching
+        energies at the mean switched current |i| = 2*sqrt(2)/pi * I_rms,
+        which averages a linear energy curve exactly over the fundamental.
+
+        Returns:
+            dict: Arrays broadcast over I_out_rms, T_j (and V_dc).
+        """
+        I_out_rms = np.asarray(I_out_rms, dtype=float)
+        switched = I_out_rms * (2 * math.sqrt(2) / math.pi)
+        params = {
+            'R_on': self.curves['R_on'](I_out_rms, T_j),
+            'V_f': self.curves['V_f'](I_out_rms, T_j),
+            'E_on': self.curves['E_on'](switched, T_j),
+            'E_off': self.curves['E_off'](switched, T_j),
+        }
+        if self.V_ref and V_dc is not None:
+            scale = np.asarray(V_dc, dtype=float) / self.V_ref
+            params['E_on'] = params['E_on'] * scale
+            params['E_off'] = params['E_off'] * scale
+        return params
+
+    def to_dict(self):
+        return {'name': self.name, 'V_ref': self.V_ref,
+                **{field: curve.to_dict() for field, curve in self.curves.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        curves = {field: DeviceCurve.from_dict(data[field]) for field in DEVICE_FIELDS}
+        return cls(data['name'], V_ref=data.get('V_ref'), **curves)
@@ -0,0 +1,209 @@
+"""Longitudinal vehicle dynamics and drive-cycle simulation (no UI dependencies)."""
+
+import time
+
+import numpy as np
+
+# Vehicle and road constants
+g = 9.81  # m/s^2
+Cr = 0.01  # Rolling resistance coefficient
+Caero = 0.3 # Aerodynamic drag coefficient
+A_F = 1.88 # Frontal area in m^2
+rho = 1.225 # Air density in kg/m^3
+r_wheel = 0.3 # Wheel radius in meters
+
+DEFAULT_CHUNK_SIZE = 1_000_000  # Samples per chunk for drive-cycle streaming
+
+
+def propulsion_demand(v, theta, acceleration, mass, *, Cr=None, Caero=None, A_F=None, rho=None, r_wheel=None):
+    """
+    Vectorized force balance shared by the scalar and drive-cycle models.
+
+    Args:
+        v (float or np.ndarray): Vehicle speed in m/s.
+        theta (float or np.ndarray): Road angle in radians.
+        acceleration (float or np.ndarray): Vehicle acceleration in m/s^2.
+        mass (float or np.ndarray): Vehicle mass in kg.
+        Cr, Caero, A_F, rho, r_wheel (float or np.ndarray, optional): Overrides
+            of the module's vehicle and road constants; arrays broadcast with
+            the other arguments.
+
+    Returns:
+        tuple: F_prop (N), Power (kW), Torque (Nm) and w_rpm (rpm), unrounded.
+    """
+    Cr = globals()['Cr'] if Cr is None else Cr
+    Caero = globals()['Caero'] if Caero is None else Caero
+    A_F = globals()['A_F'] if A_F is None else A_F
+    rho = globals()['rho'] if rho is None else rho
+    r_wheel = globals()['r_wheel'] if r_wheel is None else r_wheel
+
+    # Force calculations
+    F_aero = 0.5 * rho * A_F * (v**2) * Caero
+    F_rolling = Cr * mass * g * np.cos(theta)
+    F_gravity = g * mass * np.sin(theta)
+    F_inertia = mass * acceleration
+    F_prop = F_aero + F_rolling + F_gravity + F_inertia
+
+    # Power, Torque, and RPM calculations
+    Power = F_prop * v / 1000  # Power in kW
+    Torque = F_prop * r_wheel  # Torque in Nm
+    w_rpm = (v / r_wheel) * 30 / np.pi  # Wheel speed in rpm
+    return F_prop, Power, Torque, w_rpm
+
+
+def longitudinal_dynamics(speed, gradient, acceleration, mass, **vehicle):
+    """
+    Calculates the propulsive force and related metrics for a vehicle.
+
+    Args:
+        speed (float): Vehicle speed in km/h.
+        gradient (float): Road gradient in percentage (%).
+        acceleration (float): Vehicle acceleration in m/s^2.
+        mass (float): Vehicle mass in kg.
+        **vehicle: Optional Cr, Caero, A_F, rho, r_wheel overrides.
+
+    Returns:
+        tuple: A tuple containing F_prop (N), Power (kW), Torque (Nm), 
+               w_rpm (rpm), and v_ms (m/s).
+    """
+    v = speed / 3.6  # Conversion to m/s
+    theta = np.arctan(gradient / 100.0) # Convert % gradient to angle in radians
+    F_prop, Power, Torque, w_rpm = propulsion_demand(v, theta, acceleration, mass, **vehicle)
+    
+    return round(F_prop, 2), round(Power, 2), round(Torque, 2), round(w_rpm, 2), round(v, 2)
+
+# ---
+## Drive-Cycle Simulation
+
+def drive_cycle_dynamics(speed, gradient, mass, dt=1.0, v_prev=None, **vehicle):
+    """
+    Evaluates the longitudinal dynamics over a whole speed/gradient time series.
+
+    Acceleration is the backward difference of the speed trace. Passing the
+    last speed of the previous chunk as `v_prev` makes chunked evaluation
+    give the same result as a single pass; without it the first sample
+    has zero acceleration.
+
+    Args:
+        speed (np.ndarray): Vehicle speed samples in km/h.
+        gradient (float or np.ndarray): Road gradient in percentage (%).
+        mass (float): Vehicle mass in kg.
+        dt (float): Sample period in seconds.
+        v_prev (float, optional): Speed in m/s just before the first sample.
+        **vehicle: Optional Cr, Caero, A_F, rho, r_wheel overrides.
+
+    Returns:
+        dict: Arrays of acceleration (m/s^2), F_prop (N), Power (kW),
+              Torque (Nm), w_rpm (rpm) and v_ms (m/s).
+    """
+    v = np.asarray(speed, dtype=float) / 3.6
+    theta = np.arctan(np.asarray(gradient, dtype=float) / 100.0)
+
+    a = np.empty_like(v)
+    if v.size:
+        a[1:] = np.diff(v) / dt
+        a[0] = 0.0 if v_prev is None else (v[0] - v_prev) / dt
+
+    F_prop, Power, Torque, w_rpm = propulsion_demand(v, theta, a, mass, **vehicle)
+    return {
+        "acceleration": a,
+        "F_prop": F_prop,
+        "Power": Power,
+        "Torque": Torque,
+        "w_rpm": w_rpm,
+        "v_ms": v,
+    }
+
+
+def iter_drive_cycle_chunks(speed, gradient=0.0, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Slices speed/gradient series into (speed, gradient) chunks.
+
+    Slicing keeps memory-mapped inputs (np.memmap, np.load(mmap_mode='r'))
+    on disk until each chunk is evaluated.
+    """
+    n = len(speed)
+    scalar_gradient = np.ndim(gradient) == 0
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        grad = gradient if scalar_gradient else gradient[start:stop]
+        yield speed[start:stop], grad
+
+
+def simulate_drive_cycle_chunks(chunks, mass, dt=1.0):
+    """
+    Streams (speed, gradient) chunks through the dynamics and accumulates
+    energy and peak demand, keeping only one chunk in memory at a time.
+
+    Args:
+        chunks (iterable): (speed [km/h], gradient [%]) array pairs in time order.
+        mass (float): Vehicle mass in kg.
+        dt (float): Sample period in seconds.
+
+    Returns:
+        dict: Cycle summary with traction/regenerative/net energy (kWh),
+              peak power, torque, force and wheel speed, plus the sample
+              count and the throughput in samples per second.
+    """
+    start_time = time.perf_counter()
+    samples = 0
+    traction_kwh = 0.0
+    regen_kwh = 0.0
+    peak_power = -np.inf
+    peak_regen = np.inf
+    peak_torque = -np.inf
+    peak_force = -np.inf
+    max_w_rpm = 0.0
+    v_prev = None
+
+    for speed, gradient in chunks:
+        result = drive_cycle_dynamics(speed, gradient, mass, dt, v_prev)
+        power = result["Power"]
+        if power.size == 0:
+            continue
+        samples += power.size
+        v_prev = result["v_ms"][-1]
+
+        traction_kwh += np.sum(power, where=power > 0) * dt / 3600
+        regen_kwh += np.sum(power, where=power < 0) * dt / 3600
+        peak_power = max(peak_power, power.max())
+        peak_regen = min(peak_regen, power.min())
+        peak_torque = max(peak_torque, result["Torque"].max())
+        peak_force = max(peak_force, result["F_prop"].max())
+        max_w_rpm = max(max_w_rpm, result["w_rpm"].max())
+
+    elapsed = time.perf_counter() - start_time
+    if samples == 0:
+        peak_power = peak_regen = peak_torque = peak_force = 0.0
+
+    return {
+        "samples": samples,
+        "duration_s": samples * dt,
+        "energy_kwh": float(traction_kwh),
+        "regen_kwh": float(regen_kwh),
+        "net_energy_kwh": float(traction_kwh + regen_kwh),
+        "peak_power_kw": float(peak_power),
+        "peak_regen_kw": float(peak_regen),
+        "peak_torque_nm": float(peak_torque),
+        "peak_force_n": float(peak_force),
+        "max_w_rpm": float(max_w_rpm),
+        "elapsed_s": elapsed,
+        "samples_per_s": samples / elapsed if elapsed > 0 else float("inf"),
+    }
+
+
+def simulate_drive_cycle(speed, gradient=0.0, mass=2000, dt=1.0, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Drive-cycle simulation over whole speed/gradient arrays.
+
+    Args:
+        speed (np.ndarray): Vehicle speed samples in km/h (may be memory-mapped).
+        gradient (float or np.ndarray): Road gradient in percentage (%).
+        mass (float): Vehicle mass in kg.
+        dt (float): Sample period in seconds.
+        chunk_size (int): Samples evaluated per vectorized pass.
+
+    Returns:
+        dict: See `simulate_drive_cycle_chunks`.
+    """
+    return simulate_drive_cycle_chunks(iter_drive_cycle_chunks(speed, gradient, chunk_size), mass, dt)
@@ -0,0 +1,165 @@
+"""
+Motor torque/power envelopes for whole catalogs, stored as one array per field.
+
+The envelope read from the four catalog numbers is: constant `high_torque`
+from standstill to `low_speed` (base speed), then torque falling linearly to
+`low_torque` at `high_speed`, and zero above `high_speed`.
+"""
+
+import numpy as np
+
+ENVELOPE_FIELDS = ('low_speed', 'high_speed', 'high_torque', 'low_torque')
+
+
+class MotorEnvelope:
+    """
+    Torque-speed envelopes of N motors, precomputed once and shared by the
+    gear-ratio calculator, the sweep and the graphs.
+
+    Queries broadcast over motors: with `outer=True` (default) the result has
+    shape (n_motors,) + rpm.shape; with `outer=False` the leading axis of
+    `rpm` is matched against the motors instead (one operating point, or one
+    row of points, per motor).
+    """
+
+    __slots__ = ('names', 'low_speed', 'high_speed', 'high_torque', 'low_torque', '_slope')
+
+    def __init__(self, names, low_speed, high_speed, high_torque, low_torque):
+        self.names = np.asarray(names)
+        self.low_speed = np.asarray(low_speed, dtype=float)
+        self.high_speed = np.asarray(high_speed, dtype=float)
+        self.high_torque = np.asarray(high_torque, dtype=float)
+        self.low_torque = np.asarray(low_torque, dtype=float)
+        # Torque slope of the field-weakening segment (Nm/rpm)
+        span = self.high_speed - self.low_speed
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self._slope = np.where(span > 0, (self.low_torque - self.high_torque) / span, 0.0)
+
+    @classmethod
+    def from_engines(cls, engines):
+        """
+        Builds the envelope from the app's engine table: a dict of dicts keyed
+        by engine name, or a DataFrame indexed by engine name. An existing
+        MotorEnvelope is returned as is.
+        """
+        if isinstance(engines, cls):
+            return engines
+        if hasattr(engines, 'columns'):
+            return cls(np.asarray(engines.index),
+                       *(engines[field].to_numpy(dtype=float) for field in ENVELOPE_FIELDS))
+        names = np.array(list(engines.keys()))
+        columns = [np.fromiter((c[field] for c in engines.values()), dtype=float, count=len(names))
+                   for field in ENVELOPE_FIELDS]
+        return cls(names, *columns)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, key):
+        """Subset by position, slice, boolean mask, index array or engine name."""
+        if isinstance(key, str):
+            key = int(np.flatnonzero(self.names == key)[0])
+        if np.ndim(key) == 0 and not isinstance(key, slice):
+            key = [key]
+        return MotorEnvelope(self.names[key], self.low_speed[key], self.high_speed[key],
+                             self.high_torque[key], self.low_torque[key])
+
+    def columns(self):
+        """Characteristic fields as a dict of 1-D arrays."""
+        return {field: getattr(self, field) for field in ENVELOPE_FIELDS}
+
+    # ---
+    ## Vectorized queries
+
+    def _params(self, rpm, outer):
+        rpm = np.asarray(rpm, dtype=float)
+        if outer:
+            shape = (len(self),) + (1,) * rpm.ndim
+            rpm = rpm[None, ...]
+        else:
+            shape = (len(self),) + (1,) * max(rpm.ndim - 1, 0)
+        fields = (self.low_speed, self.high_speed, self.high_torque, self._slope)
+        return rpm, [f.reshape(shape) for f in fields]
+
+    def torque_at(self, rpm, outer=True):
+        """Maximum motor torque (Nm) at motor speed `rpm`."""
+        rpm, (low_speed, high_speed, high_torque, slope) = self._params(rpm, outer)
+        torque = high_torque + slope * np.maximum(rpm - low_speed, 0.0)
+        return np.where((rpm >= 0) & (rpm <= high_speed), torque, 0.0)
+
+    def power_at(self, rpm, outer=True):
+        """Maximum motor power (kW) at motor speed `rpm`."""
+        rpm_arr = np.asarray(rpm, dtype=float)
+        rpm_b = rpm_arr[None, ...] if outer else rpm_arr
+        return self.torque_at(rpm_arr, outer) * rpm_b * (2 * np.pi / 60) / 1000
+
+    def feasible(self, rpm, torque, gear_ratio=1.0, efficiency=1.0, outer=True):
+        """
+        Whether each motor can deliver `torque` at `rpm` through `gear_ratio`.
+
+        `rpm` and `torque` are demand at the gearbox output (wheel side); with
+        the default ratio of 1 they are motor-side. `gear_ratio` may be a
+        scalar, one ratio per motor, or (with outer=False) an array matching
+        the per-motor points.
+        """
+        rpm = np.asarray(rpm, dtype=float)
+        torque = np.asarray(torque, dtype=float)
+        ratio = np.asarray(gear_ratio, dtype=float)
+        if ratio.ndim == 1:
+            ratio = ratio.reshape((len(self),) + (1,) * (rpm.ndim if outer else max(rpm.ndim - 1, 0)))
+        if ratio.ndim:
+            motor_rpm = (rpm[None, ...] if outer else rpm) * ratio
+            available = self.torque_at(motor_rpm, outer=False)
+        else:
+            available = self.torque_at(rpm * ratio, outer)
+        return available * ratio * efficiency >= (torque[None, ...] if outer else torque)
+
+    def meets(self, rpm, torque, gear_ratio=1.0, efficiency=1.0):
+        """Motors that satisfy every demand point, e.g. a whole drive cycle (n_motors,)."""
+        feasible = self.feasible(rpm, torque, gear_ratio, efficiency)
+        return feasible.reshape(len(self), -1).all(axis=1)
+
+    # ---
+    ## Derived quantities
+
+    def peak_power_point(self):
+        """
+        (speed, torque) of maximum power per motor. Power grows linearly up to
+        `low_speed`; on the field-weakening segment it is the parabola
+        (high_torque + slope * (n - low_speed)) * n, whose vertex is clipped
+        to [low_speed, high_speed] (or high_speed itself if torque does not fall).
+        """
+        slope = self._slope
+        with np.errstate(divide='ignore', invalid='ignore'):
+            vertex = (slope * self.low_speed - self.high_torque) / (2 * slope)
+        speed = np.where(slope < 0, np.clip(vertex, self.low_speed, self.high_speed), self.high_speed)
+        return speed, self.high_torque + slope * np.maximum(speed - self.low_speed, 0.0)
+
+    @property
+    def peak_power_kw(self):
+        """Maximum power over the whole envelope in kW (see `peak_power_point`)."""
+        speed, torque = self.peak_power_point()
+        return torque * speed * (2 * np.pi / 60) / 1000
+
+    def corner(self, condition):
+        """
+        (speed, torque) corner used to size a gear ratio for `condition`:
+        (high_speed, low_torque) for 'high_speed', (low_speed, high_torque)
+        for every other condition.
+        """
+        if condition == 'high_speed':
+            return self.high_speed, self.low_torque
+        return self.low_speed, self.high_torque
+
+    def speed_grid(self, points_per_segment=3, base_points=None):
+        """
+        Per-motor speed samples over the constant-torque and field-weakening
+        segments, shape (n_motors, base_points + points_per_segment).
+        `base_points` defaults to `points_per_segment`.
+        """
+        base_points = points_per_segment if base_points is None else base_points
+        t_base = np.linspace(0.0, 1.0, base_points)
+        t = np.linspace(0.0, 1.0, points_per_segment)
+        base = t_base[None, :] * self.low_speed[:, None]
+        weakening = self.low_speed[:, None] + t[None, :] * (self.high_speed - self.low_speed)[:, None]
+        return np.concatenate((base, weakening), axis=1)
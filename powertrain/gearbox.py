@@ -0,0 +1,294 @@
+"""
+Multi-speed gearbox ratio optimizer.
+
+For every motor it picks an N-speed ratio set that can deliver every demand
+point (scenario corners and, optionally, a binned drive cycle) and has the
+lowest time-weighted motor loss or the smallest spread. Ratio sets are
+geometric, g_k = g_1 * spread ** (-k / (N - 1)), so a candidate is the pair
+(first gear, spread). Each motor evaluates its losses once on a ratio grid
+x demand points and scores whole grids of candidates by array lookups, first
+strided and then at full resolution around the strided optimum. Motors are
+split across a process pool.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from powertrain.envelope import ENVELOPE_FIELDS, MotorEnvelope
+
+DEFAULT_N_GEARS = 6
+MAX_GEAR_RATIO = 30.0
+MAX_SPREAD = 10.0
+RATIO_GRID_POINTS = 384   # Log-spaced ratios every gear is chosen from
+COARSE_STRIDE = 4         # Grid stride of the first search pass
+BLOCK_ELEMENTS = 1 << 20  # Candidates x gears x points evaluated at once
+
+# Per-unit motor loss proxy, relative to peak power: copper loss grows with
+# (torque / peak torque)^2, iron loss with (speed / max speed)^1.5
+COPPER_LOSS_PU = 0.05
+IRON_LOSS_PU = 0.02
+
+OBJECTIVES = ('loss', 'spread')
+
+
+def _envelope(motor):
+    """MotorEnvelope of a dict of envelope fields (scalars, or arrays broadcasting with the operating points)."""
+    return MotorEnvelope([None], *(motor[field] for field in ENVELOPE_FIELDS))
+
+
+def motor_loss_proxy(motor, rpm, torque):
+    """
+    Default loss model (kW) of one motor at motor speed `rpm` and torque
+    `torque` (arrays of any shape). `motor` is a dict of the envelope fields.
+    """
+    peak_kw = _envelope(motor).peak_power_kw
+    return peak_kw * (COPPER_LOSS_PU * (torque / motor['high_torque']) ** 2
+                      + IRON_LOSS_PU * (rpm / motor['high_speed']) ** 1.5)
+
+
+# ---
+## Demand points: (output rpm, output torque Nm, weight)
+
+def scenario_demand(scenarios):
+    """Demand points of the scenario table (list of dicts, DataFrame or scenario arrays), weight 1 each."""
+    if hasattr(scenarios, 'columns'):
+        scenarios = {field: scenarios[field].to_numpy() for field in ('max_speed_vehicle', 'torque')}
+    elif not isinstance(scenarios, dict):
+        scenarios = {field: np.array([s[field] for s in scenarios]) for field in ('max_speed_vehicle', 'torque')}
+    rpm = np.asarray(scenarios['max_speed_vehicle'], dtype=float)
+    return rpm, np.asarray(scenarios['torque'], dtype=float), np.ones(len(rpm))
+
+
+def drive_cycle_demand(speed, gradient=0.0, mass=2000, dt=1.0, bins=16):
+    """
+    Traction demand of a drive cycle (speed in km/h, gradient in %), binned
+    on a `bins` x `bins` grid of wheel speed and wheel torque. Each occupied
+    bin becomes one point at its largest speed and torque (so feasibility is
+    conservative) weighted by the time spent in it (s).
+    """
+    from powertrain.dynamics import drive_cycle_dynamics
+
+    result = drive_cycle_dynamics(speed, gradient, mass, dt)
+    traction = result['Torque'] > 0
+    rpm, torque = result['w_rpm'][traction], result['Torque'][traction]
+    if not rpm.size:
+        return np.empty(0), np.empty(0), np.empty(0)
+
+    edges = lambda values: np.linspace(values.min(), values.max(), bins + 1)[1:-1]
+    cell = np.digitize(rpm, edges(rpm)) * bins + np.digitize(torque, edges(torque))
+    cells, inverse, counts = np.unique(cell, return_inverse=True, return_counts=True)
+    rpm_max = np.full(len(cells), -np.inf)
+    torque_max = np.full(len(cells), -np.inf)
+    np.maximum.at(rpm_max, inverse, rpm)
+    np.maximum.at(torque_max, inverse, torque)
+    return rpm_max, torque_max, counts * float(dt)
+
+
+def combine_demand(*demands):
+    """Concatenates (rpm, torque, weight) demand tuples."""
+    return tuple(np.concatenate(parts) for parts in zip(*demands))
+
+
+# ---
+## Per-motor search
+
+def geometric_ratios(first_gear, spread, n_gears):
+    """Ratio sets (candidates, n_gears) from broadcastable first-gear and spread arrays."""
+    steps = np.arange(n_gears) / max(n_gears - 1, 1)
+    first_gear, spread = np.broadcast_arrays(np.asarray(first_gear, dtype=float), np.asarray(spread, dtype=float))
+    return first_gear.reshape(-1, 1) * spread.reshape(-1, 1) ** -steps[None, :]
+
+
+def point_losses(motor, ratios, demand, efficiency=1.0, loss_model=motor_loss_proxy):
+    """
+    Motor loss (kW) at every demand point in every gear ratio, shape
+    ratios.shape + (points,); inf where the motor cannot deliver the point
+    in that ratio.
+    """
+    rpm, torque, _ = demand
+    g = np.asarray(ratios, dtype=float)[..., None]
+    motor_rpm = g * rpm
+    motor_torque = torque / (g * efficiency)
+    available = _envelope(motor).torque_at(motor_rpm)[0]
+    covered = (motor_rpm <= motor['high_speed']) & (available >= motor_torque)
+    return np.where(covered, loss_model(motor, motor_rpm, motor_torque), np.inf)
+
+
+def _weighted_mean(losses, weight):
+    with np.errstate(invalid='ignore'):
+        return (losses * weight).sum(axis=-1) / weight.sum()
+
+
+def score_ratio_sets(motor, ratios, demand, efficiency=1.0, loss_model=motor_loss_proxy):
+    """
+    Time-weighted mean loss (kW) of ratio sets (candidates, n_gears), each
+    demand point running in its least-loss gear; inf when a point is not
+    covered by any gear.
+    """
+    return _weighted_mean(point_losses(motor, ratios, demand, efficiency, loss_model).min(axis=-2), demand[2])
+
+
+def _grid_scores(table, weight, first, step, n_gears):
+    """Scores of grid ratio sets: gear k of a candidate is grid row first - k * step."""
+    scores = np.empty(len(first))
+    block = max(1, BLOCK_ELEMENTS // max(n_gears * table.shape[1], 1))
+    gears = np.arange(n_gears)
+    for start in range(0, len(first), block):
+        rows = first[start:start + block, None] - step[start:start + block, None] * gears
+        scores[start:start + block] = _weighted_mean(table[rows].min(axis=1), weight)
+    return scores
+
+
+def _pick(scores, spread, objective):
+    """Index of the best feasible candidate, or -1."""
+    feasible = np.flatnonzero(np.isfinite(scores))
+    if not feasible.size:
+        return -1
+    keys = (spread[feasible], scores[feasible])
+    if objective == 'spread':
+        keys = keys[::-1]
+    return int(feasible[np.lexsort(keys)[0]])  # last key is primary
+
+
+def optimize_motor(motor, demand, n_gears=DEFAULT_N_GEARS, objective='loss', efficiency=1.0,
+                   max_gear_ratio=MAX_GEAR_RATIO, max_spread=MAX_SPREAD, resolution=RATIO_GRID_POINTS,
+                   loss_model=motor_loss_proxy):
+    """
+    Best geometric ratio set of one motor (dict of envelope fields).
+
+    All gears are taken from one log-spaced ratio grid of `resolution`
+    points, so losses are evaluated once per (grid ratio, demand point) and a
+    candidate set (first gear row, row step between gears) is scored by
+    lookups. A strided search is refined at full resolution around its
+    optimum; when it finds nothing feasible, the full grid is searched.
+
+    Returns:
+        tuple: (ratios (n_gears,), mean loss kW, spread); NaN ratios and inf
+        loss when no candidate covers every demand point.
+    """
+    infeasible = np.full(n_gears, np.nan), np.inf, np.nan
+    _, torque, weight = demand
+    # The first gear alone must reach the peak demand torque at peak motor torque
+    low = max(torque.max(initial=0.0) / (efficiency * motor['high_torque']), 1e-3)
+    if low > max_gear_ratio:
+        return infeasible
+
+    log_spread = np.log(max_spread) if n_gears > 1 else 0.0
+    log_grid = np.linspace(np.log(low) - log_spread, np.log(max_gear_ratio), resolution)
+    delta = log_grid[1] - log_grid[0]
+    table = point_losses(motor, np.exp(log_grid), demand, efficiency, loss_model)
+    if not np.isfinite(table).any(axis=0).all():
+        return infeasible  # some demand point is out of reach in every ratio
+
+    first_min = min(int(np.ceil((np.log(low) - log_grid[0]) / delta - 1e-9)), resolution - 1)
+    max_step = int(log_spread / ((n_gears - 1) * delta) + 1e-9) if n_gears > 1 else 0
+
+    def search(first, step):
+        first, step = (a.ravel() for a in np.meshgrid(first, step, indexing='ij'))
+        valid = first - (n_gears - 1) * step >= 0
+        first, step = first[valid], step[valid]
+        scores = _grid_scores(table, weight, first, step, n_gears)
+        best = _pick(scores, step, objective)
+        return None if best < 0 else (int(first[best]), int(step[best]), scores[best])
+
+    stride = COARSE_STRIDE
+    coarse = search(np.arange(first_min, resolution, stride), np.arange(0, max_step + 1, stride))
+    if coarse is None:
+        found = search(np.arange(first_min, resolution), np.arange(0, max_step + 1))
+    else:
+        first, step, _ = coarse
+        found = search(np.arange(max(first - stride + 1, first_min), min(first + stride, resolution)),
+                       np.arange(max(step - stride + 1, 0), min(step + stride, max_step + 1)))
+    if found is None:
+        return infeasible
+    first, step, score = found
+    rows = first - step * np.arange(n_gears)
+    return np.exp(log_grid[rows]), score, float(np.exp((n_gears - 1) * step * delta))
+
+
+# ---
+## Catalog driver
+
+def _optimize_chunk(task):
+    columns, demand, options = task
+    n = len(columns['low_speed'])
+    n_gears = options['n_gears']
+    ratios = np.full((n, n_gears), np.nan)
+    loss = np.full(n, np.inf)
+    spread = np.full(n, np.nan)
+    for i in range(n):
+        motor = {field: float(columns[field][i]) for field in ENVELOPE_FIELDS}
+        ratios[i], loss[i], spread[i] = optimize_motor(motor, demand, **options)
+    return ratios, loss, spread
+
+
+def optimize_gear_sets(engines, demand, n_gears=DEFAULT_N_GEARS, objective='loss', efficiency=1.0,
+                       max_gear_ratio=MAX_GEAR_RATIO, max_spread=MAX_SPREAD, resolution=RATIO_GRID_POINTS,
+                       loss_model=motor_loss_proxy, workers=1, chunk_size=64):
+    """
+    Optimizes an N-speed geometric ratio set for every motor.
+
+    Args:
+        engines: MotorEnvelope, dict of dicts or DataFrame of motors.
+        demand (tuple): (output rpm, output torque Nm, weight) arrays, e.g.
+            from scenario_demand / drive_cycle_demand / combine_demand.
+        n_gears (int): Gears per set.
+        objective (str): 'loss' (time-weighted mean loss, then spread) or
+            'spread' (smallest spread, then loss).
+        efficiency (float): Driveline efficiency between motor and output.
+        max_gear_ratio, max_spread (float): Search bounds.
+        resolution (int): Points of the log-spaced ratio grid.
+        loss_model (callable): loss_model(motor_fields, rpm, torque) -> kW;
+            must be picklable (module level) when workers > 1.
+        workers (int): Process count; 1 runs in the calling process, 0 uses
+            one per CPU.
+        chunk_size (int): Motors per task.
+
+    Returns:
+        dict: 'Engine', 'Gear Ratios' (motors x n_gears), 'First Gear',
+              'Top Gear', 'Spread', 'Mean Loss (kW)' and 'Feasible'.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"objective must be one of {OBJECTIVES}, got {objective!r}")
+    envelope = MotorEnvelope.from_engines(engines)
+    demand = tuple(np.asarray(part, dtype=float) for part in demand)
+    options = dict(n_gears=n_gears, objective=objective, efficiency=efficiency, max_gear_ratio=max_gear_ratio,
+                   max_spread=max_spread, resolution=resolution, loss_model=loss_model)
+    columns = envelope.columns()
+    tasks = [({field: values[start:start + chunk_size] for field, values in columns.items()}, demand, options)
+             for start in range(0, len(envelope), chunk_size)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) <= 1:
+        results = [_optimize_chunk(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_optimize_chunk, tasks))
+
+    ratios = np.concatenate([r[0] for r in results]) if results else np.empty((0, n_gears))
+    loss = np.concatenate([r[1] for r in results]) if results else np.empty(0)
+    spread = np.concatenate([r[2] for r in results]) if results else np.empty(0)
+    return {
+        'Engine': envelope.names,
+        'Gear Ratios': ratios,
+        'First Gear': ratios[:, 0],
+        'Top Gear': ratios[:, -1],
+        'Spread': spread,
+        'Mean Loss (kW)': loss,
+        'Feasible': np.isfinite(loss),
+    }
+
+
+def gear_sets_frame(result):
+    """One row per motor with a column per gear."""
+    import pandas as pd
+
+    ratios = result['Gear Ratios']
+    frame = pd.DataFrame({'Engine': result['Engine']})
+    for k in range(ratios.shape[1]):
+        frame[f'Gear {k + 1}'] = np.round(ratios[:, k], 3)
+    for field in ('Spread', 'Mean Loss (kW)', 'Feasible'):
+        frame[field] = result[field]
+    return frame
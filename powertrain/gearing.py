@@ -0,0 +1,202 @@
+"""Gear-ratio selection for a set of engines over vehicle scenarios."""
+
+import math
+
+import numpy as np
+
+from powertrain.envelope import MotorEnvelope
+from powertrain.profiling import stage
+
+
+class EngineGearRatioCalculator:
+    def __init__(self, engines, scenarios, envelope=None):
+        self.engines = engines
+        self.scenarios = scenarios
+        self.max_speed_gearbox = 6
+        self._envelope = envelope
+
+    @property
+    def envelope(self):
+        """Shared MotorEnvelope of `engines`, built on first use."""
+        if self._envelope is None:
+            self._envelope = MotorEnvelope.from_engines(self.engines)
+        return self._envelope
+        
+    def calculate_gear_ratios(self):
+        gear_ratios = {}
+        envelope = self.envelope
+        
+        with stage('calculate_gear_ratios'):
+            for scenario_index, scenario in enumerate(self.scenarios):
+                gear_ratios[scenario_index] = {}
+                output_speed = scenario['max_speed_vehicle']
+                output_torque = scenario['torque']
+                condition = scenario['condition']
+                driveline_efficiency = 1
+                # Sizing corner of every engine for this condition
+                corner_speed, corner_torque = envelope.corner(condition)
+                for engine_index, engine in enumerate(envelope.names.tolist()):
+                    speed = corner_speed[engine_index].item()
+                    torque = corner_torque[engine_index].item()
+                    # Calculate gear ratio
+                    #gear_ratio = round((output_torque/ torque) * driveline_efficiency)
+                    gear_ratio=math.ceil((output_torque)/torque)-0.5
+                    eta=0.86
+                    speed /=gear_ratio
+                    torque *= gear_ratio
+                    power_kw = torque * (2 * np.pi / 60) * speed/(eta*1000)
+                    gear_ratios.setdefault(engine, {})[scenario_index] = {
+                        'Gear Ratio': round(gear_ratio,2),
+                        'Engine Speed': round(speed),
+                        'Engine Torque': round(torque),
+                        'Condition': condition,
+                        'vehicle power': scenario['power'],
+                        'Output Speed': round(output_speed),
+                        'Output Torque': round(output_torque),
+                    }
+
+        return gear_ratios
+
+    def optimize_gear_sets(self, drive_cycle=None, objective='loss', workers=1, **options):
+        """
+        Optimized `max_speed_gearbox`-speed ratio set per engine covering every
+        scenario and, optionally, a drive cycle (see powertrain.gearbox).
+
+        Args:
+            drive_cycle (dict or DemandHistogram, optional): drive_cycle_demand
+                keyword arguments (speed km/h, gradient %, mass, dt, bins), or
+                the histogram of a streamed drive log.
+            objective (str): 'loss' or 'spread'.
+            workers (int): Process count (0: one per CPU).
+            **options: Further optimize_gear_sets arguments (efficiency,
+                max_gear_ratio, max_spread, resolution, loss_model).
+
+        Returns:
+            dict: See powertrain.gearbox.optimize_gear_sets.
+        """
+        from powertrain.gearbox import combine_demand, drive_cycle_demand, optimize_gear_sets, scenario_demand
+
+        demand = scenario_demand(self.scenario_arrays())
+        if hasattr(drive_cycle, 'demand'):
+            demand = combine_demand(demand, drive_cycle.demand())
+        elif drive_cycle is not None:
+            demand = combine_demand(demand, drive_cycle_demand(**drive_cycle))
+        return optimize_gear_sets(self.envelope, demand, n_gears=self.max_speed_gearbox,
+                                  objective=objective, workers=workers, **options)
+
+    def acceleration_performance(self, gear_ratios, **options):
+        """
+        0-100 km/h, 80-120 km/h and gradeability of every engine with every
+        ratio in `gear_ratios` (see powertrain.acceleration).
+
+        Args:
+            gear_ratios (array-like): Candidate ratios tried with every engine.
+            **options: Further acceleration_performance arguments (mass,
+                efficiency, runs, gradeability_speed, dt, t_max, vehicle overrides).
+
+        Returns:
+            dict: See powertrain.acceleration.acceleration_performance.
+        """
+        from powertrain.acceleration import acceleration_performance
+
+        return acceleration_performance(self.envelope, gear_ratios, **options)
+
+    def create_table(self):
+        gear_ratios = self.calculate_gear_ratios()
+        headers = ['Engine',   'Engine Speed (RPM)', 'Engine Torque (Nm)', 'Torque Gear Ratio','Condition','vehicle power (kW)', 'Output Speed (RPM)', 'Output Torque (Nm)']
+        rows = []
+
+        for engine, scenarios in gear_ratios.items():
+            for scenario, data in scenarios.items():
+                rows.append([engine,data['Engine Speed'], data['Engine Torque'], data['Gear Ratio'],   data['Condition'], data['vehicle power'], data['Output Speed'], data['Output Torque']])
+
+        return headers, rows
+
+    # ---
+    ## Vectorized (engines x scenarios) mode
+
+    TABLE_HEADERS = ['Engine', 'Engine Speed (RPM)', 'Engine Torque (Nm)', 'Torque Gear Ratio', 'Condition', 'vehicle power (kW)', 'Output Speed (RPM)', 'Output Torque (Nm)']
+
+    def engine_arrays(self):
+        """Engine names and characteristic columns as 1-D arrays, from the shared envelope."""
+        return self.envelope.names, self.envelope.columns()
+
+    def scenario_arrays(self):
+        """Scenario columns as 1-D arrays; `scenarios` may be a list of dicts or a DataFrame."""
+        if hasattr(self.scenarios, 'columns'):
+            get = lambda field: self.scenarios[field].to_numpy()
+        else:
+            get = lambda field: np.array([scenario[field] for scenario in self.scenarios])
+        return {
+            'max_speed_vehicle': get('max_speed_vehicle').astype(float),
+            'torque': get('torque').astype(float),
+            'power': get('power').astype(float),
+            'condition': get('condition').astype(str),
+        }
+
+    def calculate_gear_ratio_matrix(self):
+        """
+        Vectorized `calculate_gear_ratios`: evaluates every engine against
+        every scenario in one pass, without per-cell rounding.
+
+        Returns:
+            dict: 'Engine' names and per-scenario 'Condition', 'vehicle power',
+                  'Output Speed' and 'Output Torque' (1-D), plus 'Gear Ratio',
+                  'Engine Speed' and 'Engine Torque' as (engines x scenarios) arrays.
+        """
+        envelope = self.envelope
+        scenario = self.scenario_arrays()
+
+        # Same sizing corners as calculate_gear_ratios (MotorEnvelope.corner)
+        high = (scenario['condition'] == 'high_speed')[None, :]
+        high_speed, low_torque = envelope.corner('high_speed')
+        low_speed, high_torque = envelope.corner('low_speed')
+        speed = np.where(high, high_speed[:, None], low_speed[:, None])
+        torque = np.where(high, low_torque[:, None], high_torque[:, None])
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            gear_ratio = np.ceil(scenario['torque'][None, :] / torque) - 0.5
+            speed /= gear_ratio
+            torque *= gear_ratio
+
+        return {
+            'Engine': envelope.names,
+            'Condition': scenario['condition'],
+            'vehicle power': scenario['power'],
+            'Output Speed': scenario['max_speed_vehicle'],
+            'Output Torque': scenario['torque'],
+            'Gear Ratio': gear_ratio,
+            'Engine Speed': speed,
+            'Engine Torque': torque,
+        }
+
+    def create_table_frame(self, matrix=None):
+        """
+        Tidy DataFrame equivalent of `create_table`, one row per engine and
+        scenario in the same (engine-major) order and with the same rounding.
+        """
+        import pandas as pd
+
+        if matrix is None:
+            matrix = self.calculate_gear_ratio_matrix()
+        n_engines, n_scenarios = matrix['Gear Ratio'].shape
+
+        def rounded(values, decimals=0):
+            values = np.round(values.reshape(-1), decimals)
+            if decimals == 0 and np.isfinite(values).all():
+                return values.astype(np.int64)
+            return values
+
+        per_scenario = lambda values: np.tile(values, n_engines)
+        conditions, condition_codes = np.unique(matrix['Condition'], return_inverse=True)
+        return pd.DataFrame({
+            'Engine': pd.Categorical.from_codes(np.repeat(np.arange(n_engines), n_scenarios),
+                                                categories=pd.Index(matrix['Engine'])),
+            'Engine Speed (RPM)': rounded(matrix['Engine Speed']),
+            'Engine Torque (Nm)': rounded(matrix['Engine Torque']),
+            'Torque Gear Ratio': rounded(matrix['Gear Ratio'], 2),
+            'Condition': pd.Categorical.from_codes(per_scenario(condition_codes), categories=conditions),
+            'vehicle power (kW)': per_scenario(matrix['vehicle power']),
+            'Output Speed (RPM)': per_scenario(rounded(matrix['Output Speed'])),
+            'Output Torque (Nm)': per_scenario(rounded(matrix['Output Torque'])),
+        }, columns=self.TABLE_HEADERS)
@@ -0,0 +1,40 @@
+"""
+Measures cold import time of the compute modules, each in a fresh interpreter.
+
+    python -m powertrain.importtime [module ...]
+"""
+
+import subprocess
+import sys
+
+DEFAULT_MODULES = [
+    "powertrain",
+    "powertrain.dynamics",
+    "powertrain.inverter",
+    "powertrain.gearing",
+    "powertrain.plots",
+]
+
+_PROBE = "import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+
+
+def cold_import_time(module, repeat=5):
+    """Best-of-`repeat` cold import time of `module` in seconds."""
+    times = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module)],
+            check=True, capture_output=True, text=True,
+        )
+        times.append(float(out.stdout.strip().splitlines()[-1]))
+    return min(times)
+
+
+def main(argv=None):
+    modules = (argv if argv is not None else sys.argv[1:]) or DEFAULT_MODULES
+    for module in modules:
+        print(f"{module:<32} {cold_import_time(module) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+Gear-ratio table and combined torque/power figure kept up to date from row
+diffs of the app's editable tables.
+
+`IncrementalPipeline.update` compares the engine and scenario tables with
+the previous call. Only added or edited engines (all scenarios) and edited
+scenarios (all engines) go through the gear-ratio model again; their table
+rows are overwritten in place and only their figure traces are replaced, so
+an edit costs the same whatever the catalog size.
+"""
+
+import numpy as np
+
+from powertrain import plots
+from powertrain.envelope import ENVELOPE_FIELDS, MotorEnvelope
+from powertrain.gearing import EngineGearRatioCalculator
+from powertrain.profiling import stage
+
+SCENARIO_KEYS = ('max_speed_vehicle', 'torque', 'power', 'condition')
+
+# Matrix entries per (engine, scenario) cell and per scenario
+CELL_FIELDS = ('Gear Ratio', 'Engine Speed', 'Engine Torque')
+SCENARIO_FIELDS = {
+    'Condition': 'condition',
+    'vehicle power': 'power',
+    'Output Speed': 'max_speed_vehicle',
+    'Output Torque': 'torque',
+}
+
+
+def _scenario_key(scenario):
+    # repr() so that NaN cells of a half-filled editor row compare equal
+    return repr(tuple(scenario.get(key) for key in SCENARIO_KEYS))
+
+
+def _changed(a, b):
+    return ~((a == b) | (np.isnan(a) & np.isnan(b)))
+
+
+class IncrementalPipeline:
+    """
+    Stateful gear-ratio table (`table`) and combined figure (`figure`) for one
+    app session. Keep one instance per session (e.g. in st.session_state) and
+    call `update` on every rerun.
+
+    Structural changes fall back to a full rebuild: added or removed
+    scenarios, and added, removed or reordered engines in the large-catalog
+    figure mode, whose traces group several motors each.
+    """
+
+    def __init__(self, webgl=None, point_budget=plots.DEFAULT_POINT_BUDGET):
+        self.webgl = webgl
+        self.point_budget = point_budget
+        self.envelope = None
+        self.scenarios = None
+        self.matrix = None
+        self.table = None
+        self.figure = None
+        self.last_update = None
+        self._large = None
+
+    def _is_large(self, n_motors):
+        return n_motors > plots.LARGE_CATALOG_THRESHOLD if self.webgl is None else self.webgl
+
+    def update(self, engines, scenarios):
+        """
+        Brings `table` and `figure` up to date with `engines` (dict of dicts or
+        DataFrame indexed by name) and `scenarios` (list of dicts or DataFrame).
+
+        Returns:
+            dict: What was recomputed: 'full_rebuild', 'engines_added',
+                  'engines_removed', 'engines_changed', 'scenarios_changed',
+                  'cells_recomputed' and 'traces_replaced'.
+        """
+        envelope = MotorEnvelope.from_engines(engines)
+        if hasattr(scenarios, 'columns'):
+            scenarios = scenarios.to_dict('records')
+        scenarios = [dict(scenario) for scenario in scenarios]
+        large = self._is_large(len(envelope))
+
+        old = self.envelope
+        if old is None or len(scenarios) != len(self.scenarios) or large != self._large:
+            return self._rebuild(envelope, scenarios, large)
+
+        # Engine diff: position of each new row in the previous table (-1: added)
+        same_names = np.array_equal(old.names, envelope.names)
+        if same_names:
+            source = np.arange(len(envelope))
+        else:
+            if large or len(np.unique(envelope.names)) != len(envelope):
+                return self._rebuild(envelope, scenarios, large)
+            old_rows = {name: i for i, name in enumerate(old.names.tolist())}
+            source = np.array([old_rows.get(name, -1) for name in envelope.names.tolist()], dtype=np.int64)
+        kept = source >= 0
+        edited = np.zeros(len(envelope), dtype=bool)
+        for field in ENVELOPE_FIELDS:
+            edited[kept] |= _changed(getattr(envelope, field)[kept], getattr(old, field)[source[kept]])
+        engine_rows = np.flatnonzero(~kept | edited)
+        scenario_cols = np.array([j for j, (new, prev) in enumerate(zip(scenarios, self.scenarios))
+                                  if _scenario_key(new) != _scenario_key(prev)], dtype=np.int64)
+
+        summary = {
+            'full_rebuild': False,
+            'engines_added': int((~kept).sum()),
+            'engines_removed': int(len(old) - kept.sum()),
+            'engines_changed': int(edited.sum()),
+            'scenarios_changed': len(scenario_cols),
+            'cells_recomputed': 0,
+            'traces_replaced': 0,
+        }
+        if same_names and not engine_rows.size and not scenario_cols.size:
+            self.last_update = summary
+            return summary
+
+        with stage('incremental.gear_ratios'):
+            previous_ratio = self.matrix['Gear Ratio'][:, 0].copy()
+            self._update_matrix(envelope, scenarios, source, engine_rows, scenario_cols)
+            summary['cells_recomputed'] = len(engine_rows) * len(scenarios) + len(scenario_cols) * len(envelope)
+
+        with stage('incremental.table'):
+            if not (same_names and self._patch_table(envelope, engine_rows, scenario_cols)):
+                self.table = self._calculator(envelope).create_table_frame(self.matrix)
+
+        # Power traces are drawn on the first scenario's gear ratio
+        ratio_changed = np.zeros(len(envelope), dtype=bool)
+        ratio_changed[kept] = _changed(self.matrix['Gear Ratio'][kept, 0], previous_ratio[source[kept]])
+        power_rows = np.union1d(engine_rows, np.flatnonzero(ratio_changed))
+
+        with stage('incremental.figure'):
+            if large:
+                summary['traces_replaced'] = self._patch_grouped_traces(envelope, engine_rows, power_rows)
+            else:
+                summary['traces_replaced'] = self._patch_traces(envelope, source, engine_rows, power_rows)
+            if scenario_cols.size:
+                self.figure.data[-1].update(dict(zip('xy', plots.vehicle_curve(scenarios))))
+                summary['traces_replaced'] += 1
+
+        self.envelope = envelope
+        self.scenarios = scenarios
+        self.last_update = summary
+        return summary
+
+    # ---
+    ## Full rebuild
+
+    def _calculator(self, envelope, scenarios=None):
+        return EngineGearRatioCalculator(None, scenarios if scenarios is not None else self.scenarios, envelope)
+
+    def _rebuild(self, envelope, scenarios, large):
+        with stage('incremental.rebuild'):
+            calculator = self._calculator(envelope, scenarios)
+            self.matrix = calculator.calculate_gear_ratio_matrix()
+            self.table = calculator.create_table_frame(self.matrix)
+
+            # PowerSpeedGraph only reads the first scenario's ratio of each engine
+            ratios = np.round(self.matrix['Gear Ratio'][:, 0], 2).tolist()
+            gear_ratios = {name: {0: {'Gear Ratio': ratio}} for name, ratio in zip(envelope.names.tolist(), ratios)}
+            self.figure = plots.combine_figures(
+                plots.TorqueSpeedGraph(None, scenarios, None, envelope).plot(webgl=large),
+                plots.PowerSpeedGraph(None, scenarios, gear_ratios, envelope).plot(webgl=large,
+                                                                                   point_budget=self.point_budget),
+            )
+        self.envelope = envelope
+        self.scenarios = scenarios
+        self._large = large
+        self.last_update = {
+            'full_rebuild': True,
+            'engines_added': len(envelope),
+            'engines_removed': 0,
+            'engines_changed': 0,
+            'scenarios_changed': len(scenarios),
+            'cells_recomputed': len(envelope) * len(scenarios),
+            'traces_replaced': len(self.figure.data),
+        }
+        return self.last_update
+
+    # ---
+    ## Gear-ratio matrix and table
+
+    def _update_matrix(self, envelope, scenarios, source, engine_rows, scenario_cols):
+        old = self.matrix
+        matrix = {'Engine': envelope.names}
+        scenario_arrays = self._calculator(envelope, scenarios).scenario_arrays()
+        for field, column in SCENARIO_FIELDS.items():
+            matrix[field] = scenario_arrays[column]
+        kept = source >= 0
+        for field in CELL_FIELDS:
+            if kept.all() and len(source) == len(old[field]) and (source == np.arange(len(source))).all():
+                matrix[field] = old[field]  # same engines in the same order: update in place
+                continue
+            values = np.empty((len(envelope), len(scenarios)))
+            values[kept] = old[field][source[kept]]
+            matrix[field] = values
+
+        if engine_rows.size:
+            sub = self._calculator(envelope[engine_rows], scenarios).calculate_gear_ratio_matrix()
+            for field in CELL_FIELDS:
+                matrix[field][engine_rows] = sub[field]
+        if scenario_cols.size:
+            sub = self._calculator(envelope, [scenarios[j] for j in scenario_cols]).calculate_gear_ratio_matrix()
+            for field in CELL_FIELDS:
+                matrix[field][:, scenario_cols] = sub[field]
+        self.matrix = matrix
+
+    def _submatrix(self, rows, cols):
+        sub = {'Engine': self.matrix['Engine'][rows]}
+        for field in SCENARIO_FIELDS:
+            sub[field] = self.matrix[field][cols]
+        for field in CELL_FIELDS:
+            sub[field] = self.matrix[field][np.ix_(rows, cols)]
+        return sub
+
+    def _patch_table(self, envelope, engine_rows, scenario_cols):
+        """
+        Overwrites the table rows of the recomputed cells in place. Returns
+        False when a patch does not fit the existing columns (a new condition
+        category, or a NaN in an integer column); the table is then rebuilt.
+        """
+        n_engines, n_scenarios = self.matrix['Gear Ratio'].shape
+        all_rows, all_cols = np.arange(n_engines), np.arange(n_scenarios)
+        calculator = self._calculator(envelope)
+        for rows, cols in ((engine_rows, all_cols), (all_rows, scenario_cols)):
+            if not rows.size or not cols.size:
+                continue
+            patch = calculator.create_table_frame(self._submatrix(rows, cols))
+            positions = (rows[:, None] * n_scenarios + cols[None, :]).ravel()
+            for k, column in enumerate(self.table.columns):
+                if column == 'Engine':
+                    continue  # Patches only run when the engine names are unchanged
+                current, values = self.table[column], patch[column]
+                if current.dtype == 'category':
+                    if not values.astype(object).isin(current.cat.categories).all():
+                        return False
+                elif current.dtype != values.dtype:
+                    return False
+                self.table.iloc[positions, k] = values.to_numpy()
+        return True
+
+    # ---
+    ## Figure traces
+
+    def _power_points(self, n_motors):
+        return plots.power_curve_points(n_motors, self._large, self.point_budget)
+
+    def _gear_ratio(self, rows):
+        return np.round(self.matrix['Gear Ratio'][rows, 0], 2)
+
+    def _patch_traces(self, envelope, source, engine_rows, power_rows):
+        """One trace per engine and graph: replace edited ones, add new ones, reorder and recolor."""
+        import plotly.graph_objs as go
+
+        fig = self.figure
+        n_old = (len(fig.data) - 1) // 2
+        torque_traces = [fig.data[i] if i >= 0 else None for i in source]
+        power_traces = [fig.data[n_old + i] if i >= 0 else None for i in source]
+        vehicle = fig.data[-1]
+        names = envelope.names.tolist()
+
+        if engine_rows.size:
+            speed, torque = plots.torque_curves(envelope[engine_rows])
+            for k, i in enumerate(engine_rows.tolist()):
+                if torque_traces[i] is None:
+                    fig.add_trace(plots.torque_trace(go, speed[k], torque[k], names[i], i), row=1, col=1)
+                    torque_traces[i] = fig.data[-1]
+                else:
+                    torque_traces[i].update(x=speed[k], y=torque[k])
+        if power_rows.size:
+            speed, power = plots.power_curves(envelope[power_rows], self._gear_ratio(power_rows),
+                                              *self._power_points(len(envelope)))
+            for k, i in enumerate(power_rows.tolist()):
+                if power_traces[i] is None:
+                    fig.add_trace(plots.power_trace(go, speed[k], power[k], names[i], i), row=1, col=2)
+                    power_traces[i] = fig.data[-1]
+                else:
+                    power_traces[i].update(x=speed[k], y=power[k])
+
+        if len(envelope) != n_old or (source != np.arange(len(source))).any():
+            # Colors follow the row position, so rows behind an insert or removal change color
+            for i in np.flatnonzero(source != np.arange(len(source))).tolist():
+                torque_traces[i].line.color = plots.trace_color(i)
+                power_traces[i].line.color = plots.trace_color(i)
+            fig.data = tuple(torque_traces) + tuple(power_traces) + (vehicle,)
+        return len(engine_rows) + len(power_rows)
+
+    def _patch_grouped_traces(self, envelope, engine_rows, power_rows):
+        """
+        Large-catalog mode: overwrite each edited motor's segment inside its
+        color group's trace; motor i sits in group i % len(COLORS) at segment
+        i // len(COLORS), each segment followed by a NaN gap.
+        """
+        n_groups = min(len(plots.COLORS), len(envelope))
+        replaced = 0
+        for offset, rows, curves in (
+            (0, engine_rows, lambda sub, rows: plots.torque_curves(sub, large=True)),
+            (n_groups, power_rows, lambda sub, rows: plots.power_curves(sub, self._gear_ratio(rows),
+                                                                         *self._power_points(len(envelope)))),
+        ):
+            if not rows.size:
+                continue
+            x, y = curves(envelope[rows], rows)
+            width = x.shape[1] + 1
+            groups = rows % len(plots.COLORS)
+            for group in np.unique(groups).tolist():
+                trace = self.figure.data[offset + group]
+                trace_x, trace_y = np.array(trace.x), np.array(trace.y)
+                for k in np.flatnonzero(groups == group).tolist():
+                    start = (rows[k] // len(plots.COLORS)) * width
+                    trace_x[start:start + width - 1] = x[k]
+                    trace_y[start:start + width - 1] = y[k]
+                trace.update(x=trace_x, y=trace_y)
+                replaced += 1
+        return replaced
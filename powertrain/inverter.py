@@ -0,0 +1,184 @@
+"""Three-phase inverter loss model, scalar and batched (no UI dependencies)."""
+
+import math
+
+import numpy as np
+
+from powertrain.devices import DEVICE_FIELDS
+
+
+def _check_device_parameters(device, R_on, V_f, E_on, E_off):
+    """Either all four device parameters or a `device`, never both or neither."""
+    values = dict(zip(DEVICE_FIELDS, (R_on, V_f, E_on, E_off)))
+    if device is None:
+        missing = [name for name, value in values.items() if value is None]
+        if missing:
+            raise TypeError(f"missing device parameters {missing}; pass them or a device")
+    else:
+        given = [name for name, value in values.items() if value is not None]
+        if given:
+            raise TypeError(f"device parameters {given} given together with a device; pass one or the other")
+
+
+def _device_parameters(device, V_dc, I_out_rms, T_j, R_on, V_f, E_on, E_off):
+    """R_on, V_f, E_on, E_off from `device` if given, else the arguments (all required)."""
+    _check_device_parameters(device, R_on, V_f, E_on, E_off)
+    if device is None:
+        return R_on, V_f, E_on, E_off
+    params = device.parameters(I_out_rms, T_j, V_dc)
+    return params['R_on'], params['V_f'], params['E_on'], params['E_off']
+
+
+def inverter_model(
+    V_dc: float,           # DC link voltage (V)
+    I_out_rms: float,      # RMS output phase current (A)
+    f_sw: float,           # Switching frequency (Hz)
+    R_on: float = None,    # On-state resistance per switch (ohms)
+    V_f: float = None,     # Diode forward voltage drop (V)
+    E_on: float = None,    # Energy loss per switch-on event (J)
+    E_off: float = None,   # Energy loss per switch-off event (J)
+    V_out_rms: float = None,  # RMS output phase voltage (V)
+    pf: float = 0.9,      # Power Factor (assumed)
+    device=None,           # SemiconductorDevice supplying R_on, V_f, E_on, E_off
+    T_j: float = 25.0      # Junction temperature for the device curves (C)
+) -> dict:
+    """
+    Models a three-phase inverter to calculate losses and efficiency.
+
+    With `device`, R_on, V_f, E_on and E_off are read from its datasheet
+    curves at this operating point and T_j instead of being passed in
+    (passing both is a TypeError).
+    """
+    R_on, V_f, E_on, E_off = _device_parameters(device, V_dc, I_out_rms, T_j, R_on, V_f, E_on, E_off)
+    if V_out_rms is None:
+        raise TypeError("inverter_model() missing required argument: 'V_out_rms'")
+    if device is not None:
+        R_on, V_f, E_on, E_off = (float(p) for p in (R_on, V_f, E_on, E_off))
+    
+    # 1. Conduction Loss Calculation
+    P_cond_switches = 3 * (I_out_rms**2) * R_on
+    P_cond_diodes = 3 * I_out_rms * V_f
+    P_conduction = P_cond_switches + P_cond_diodes
+
+    # 2. Switching Loss Calculation
+    E_total_switch_cycle = E_on + E_off
+    P_switching = 6 * E_total_switch_cycle * f_sw
+    
+    # 3. Total Loss Calculation
+    P_losses = P_conduction + P_switching
+
+    # 4. Power Calculation
+    P_out_ac = math.sqrt(3) * V_out_rms * I_out_rms * pf
+    P_in_dc = P_out_ac + P_losses
+    
+    efficiency = (P_out_ac / P_in_dc) * 100 if P_in_dc > 0 else 0
+
+    return {
+        "P_conduction": P_conduction,
+        "P_switching": P_switching,
+        "P_losses": P_losses,
+        "P_out_ac": P_out_ac,
+        "P_in_dc": P_in_dc,
+        "efficiency_percent": efficiency,
+    }
+
+# Field layout of the batched result
+INVERTER_RESULT_DTYPE = np.dtype([
+    ("P_conduction", np.float64),
+    ("P_switching", np.float64),
+    ("P_losses", np.float64),
+    ("P_out_ac", np.float64),
+    ("P_in_dc", np.float64),
+    ("efficiency_percent", np.float64),
+])
+
+# Points evaluated per block; keeps the temporaries and the block of output
+# records cache-resident so each record is written while it is still hot.
+BATCH_BLOCK_SIZE = 1 << 15
+
+
+def _inverter_block(out, V_dc, I_out_rms, f_sw, R_on, V_f, E_on, E_off, V_out_rms, pf):
+    # 1. Conduction Loss Calculation: 3*I^2*R_on + 3*I*V_f
+    P_conduction = I_out_rms * R_on
+    P_conduction += V_f
+    P_conduction *= I_out_rms
+    P_conduction *= 3
+
+    # 2. Switching Loss Calculation
+    P_switching = np.add(E_on, E_off) * f_sw
+    P_switching *= 6
+
+    # 3. Total Loss Calculation
+    P_losses = P_conduction + P_switching
+
+    # 4. Power Calculation
+    P_out_ac = V_out_rms * I_out_rms
+    P_out_ac *= pf
+    P_out_ac *= math.sqrt(3)
+    P_in_dc = P_out_ac + P_losses
+
+    efficiency = np.zeros_like(P_in_dc)
+    np.divide(P_out_ac, P_in_dc, out=efficiency, where=P_in_dc > 0)
+    efficiency *= 100
+
+    out["P_conduction"] = P_conduction
+    out["P_switching"] = P_switching
+    out["P_losses"] = P_losses
+    out["P_out_ac"] = P_out_ac
+    out["P_in_dc"] = P_in_dc
+    out["efficiency_percent"] = efficiency
+
+
+def inverter_model_batch(
+    V_dc,                  # DC link voltage (V)
+    I_out_rms,             # RMS output phase current (A)
+    f_sw,                  # Switching frequency (Hz)
+    R_on=None,             # On-state resistance per switch (ohms)
+    V_f=None,              # Diode forward voltage drop (V)
+    E_on=None,             # Energy loss per switch-on event (J)
+    E_off=None,            # Energy loss per switch-off event (J)
+    V_out_rms=None,        # RMS output phase voltage (V)
+    pf=0.9,                # Power Factor (assumed)
+    as_frame: bool = False,
+    device=None,           # SemiconductorDevice supplying R_on, V_f, E_on, E_off
+    T_j=25.0               # Junction temperature for the device curves (C)
+):
+    """
+    Vectorized `inverter_model` over broadcastable arrays of parameters.
+
+    Every argument may be a scalar or an array; all are broadcast together,
+    so e.g. current[:, None, None], voltage[None, :, None] and
+    f_sw[None, None, :] produce a full 3-D efficiency map. With `device`,
+    the four device parameters come from its curves at every point's
+    current and T_j (one searchsorted lookup per curve); passing them as
+    well is a TypeError.
+
+    Returns:
+        np.ndarray: Structured array (INVERTER_RESULT_DTYPE) with the
+        broadcast shape, or a flat pandas DataFrame if `as_frame` is True.
+    """
+    R_on, V_f, E_on, E_off = _device_parameters(device, V_dc, I_out_rms, T_j, R_on, V_f, E_on, E_off)
+    if V_out_rms is None:
+        raise TypeError("inverter_model_batch() missing required argument: 'V_out_rms'")
+    params = [np.asarray(p, dtype=float) for p in
+              (V_dc, I_out_rms, f_sw, R_on, V_f, E_on, E_off, V_out_rms, pf)]
+    shape = np.broadcast_shapes(*(p.shape for p in params))
+    result = np.empty(shape, dtype=INVERTER_RESULT_DTYPE)
+    # Full-shape views (free), so no in-place step of _inverter_block meets
+    # an operand with more dimensions than the array it accumulates into
+    params = [np.broadcast_to(p, shape) for p in params]
+
+    if result.ndim == 0 or result.size <= BATCH_BLOCK_SIZE:
+        _inverter_block(result, *params)
+    else:
+        # Block along the leading axis; broadcast views cost nothing to slice
+        row_size = result[0].size
+        rows = max(1, BATCH_BLOCK_SIZE // max(row_size, 1))
+        for start in range(0, shape[0], rows):
+            stop = start + rows
+            _inverter_block(result[start:stop], *(p[start:stop] for p in params))
+
+    if as_frame:
+        import pandas as pd
+        return pd.DataFrame(result.reshape(-1))
+    return result
@@ -0,0 +1,203 @@
+"""
+Persistent columnar motor/inverter-device library.
+
+A library is a directory holding one uncompressed Arrow IPC file per table
+(`motors.arrow`, `devices.arrow`), opened memory-mapped so columns are read
+from the page cache without copying. Each indexed column has two sidecar
+`.npy` files (row order and sorted values), also memory-mapped, so range
+queries are a `searchsorted` instead of a scan. Nothing is opened until a
+table is first queried.
+"""
+
+import os
+
+import numpy as np
+
+from powertrain.devices import DEVICE_FIELDS
+from powertrain.envelope import ENVELOPE_FIELDS, MotorEnvelope
+
+MOTOR_KEY = 'Engine'
+DEVICE_KEY = 'Device'
+
+# Table -> (key column, value columns, indexed columns)
+TABLES = {
+    'motors': (MOTOR_KEY, ENVELOPE_FIELDS, ('high_torque', 'high_speed', 'low_speed')),
+    'devices': (DEVICE_KEY, DEVICE_FIELDS, ('R_on', 'E_on', 'E_off')),
+}
+
+
+def _table_path(root, table):
+    return os.path.join(root, f'{table}.arrow')
+
+
+def _index_paths(root, table, column):
+    base = os.path.join(root, f'{table}.{column}')
+    return base + '.order.npy', base + '.sorted.npy'
+
+
+def _read_input(source):
+    """DataFrame from a DataFrame, a dict of dicts or a CSV/Parquet path."""
+    import pandas as pd
+
+    if isinstance(source, pd.DataFrame):
+        return source
+    if isinstance(source, dict):
+        return pd.DataFrame.from_dict(source, orient='index').rename_axis(None)
+    if str(source).endswith('.parquet'):
+        return pd.read_parquet(source)
+    return pd.read_csv(source)
+
+
+def write_library(root, motors=None, devices=None):
+    """
+    Writes (or replaces) library tables under directory `root`.
+
+    Args:
+        motors: Motor table with an 'Engine' column (or name index) and the
+            low_speed/high_speed/high_torque/low_torque columns. A DataFrame,
+            the app's dict of dicts, or a CSV/Parquet path.
+        devices: Device table with a 'Device' column (or name index) and
+            R_on (ohm), V_f (V), E_on and E_off (J) columns.
+    """
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    os.makedirs(root, exist_ok=True)
+    for table, source in (('motors', motors), ('devices', devices)):
+        if source is None:
+            continue
+        key, fields, indexed = TABLES[table]
+        frame = _read_input(source)
+        if key not in frame.columns:
+            frame = frame.rename_axis(key).reset_index()
+        frame = frame[[key, *fields]].astype({field: float for field in fields})
+        frame[key] = frame[key].astype(str)
+        feather.write_feather(pa.Table.from_pandas(frame, preserve_index=False),
+                              _table_path(root, table), compression='uncompressed')
+
+        for column in indexed:
+            values = frame[column].to_numpy()
+            order = np.argsort(values, kind='stable')
+            order_path, sorted_path = _index_paths(root, table, column)
+            np.save(order_path, order.astype(np.int64))
+            np.save(sorted_path, values[order])
+
+
+class ComponentLibrary:
+    """
+    Lazily opened, memory-mapped view of a library directory.
+
+    Query methods return row numbers (int arrays), which `motor_envelope`,
+    `motors_frame` and `devices_dict` turn into model inputs.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._tables = {}
+        self._indexes = {}
+
+    def table(self, name):
+        """Arrow table `name`, memory-mapped on first access."""
+        if name not in self._tables:
+            import pyarrow as pa
+
+            source = pa.memory_map(_table_path(self.root, name), 'r')
+            self._tables[name] = pa.ipc.open_file(source).read_all()
+        return self._tables[name]
+
+    def column(self, table, column, rows=None):
+        """Column as a NumPy array (zero-copy for the full numeric column)."""
+        data = self.table(table).column(column)
+        if rows is not None:
+            data = data.take(np.asarray(rows))
+        return data.to_numpy()
+
+    def num_rows(self, table):
+        return self.table(table).num_rows
+
+    def index(self, table, column):
+        """(row order, sorted values) of an indexed column, memory-mapped."""
+        key = (table, column)
+        if key not in self._indexes:
+            order_path, sorted_path = _index_paths(self.root, table, column)
+            self._indexes[key] = (np.load(order_path, mmap_mode='r'), np.load(sorted_path, mmap_mode='r'))
+        return self._indexes[key]
+
+    def range(self, table, column, low=None, high=None):
+        """Rows with low <= column <= high, found by binary search on the index."""
+        order, values = self.index(table, column)
+        start = 0 if low is None else np.searchsorted(values, low, side='left')
+        stop = len(values) if high is None else np.searchsorted(values, high, side='right')
+        return np.sort(order[start:stop])
+
+    # ---
+    ## Motors
+
+    def motor_envelope(self, rows=None):
+        """MotorEnvelope of the selected motors (all motors by default)."""
+        return MotorEnvelope(self.column('motors', MOTOR_KEY, rows),
+                             *(self.column('motors', field, rows) for field in ENVELOPE_FIELDS))
+
+    def motors_frame(self, rows=None):
+        """Selected motors as a DataFrame indexed by engine name (EngineGearRatioCalculator input)."""
+        table = self.table('motors')
+        if rows is not None:
+            table = table.take(np.asarray(rows))
+        return table.to_pandas().set_index(MOTOR_KEY)
+
+    def motors_for_scenario(self, torque, output_speed=None, max_gear_ratio=12.0, efficiency=1.0):
+        """
+        Motors that can meet `torque` (Nm) at `output_speed` (rpm, gearbox
+        output) with some gear ratio <= `max_gear_ratio`.
+
+        The peak-torque index first drops motors whose high_torque is too low
+        even at the maximum ratio; with a speed requirement, the max-speed
+        index drops motors that cannot reach it at the smallest ratio any
+        motor could use. Only the survivors are checked exactly against
+        their envelope.
+        """
+        rows = self.range('motors', 'high_torque', low=torque / (max_gear_ratio * efficiency))
+        if output_speed is None or len(rows) == 0:
+            return rows
+
+        _, peak_torque = self.index('motors', 'high_torque')
+        min_ratio = torque / (efficiency * peak_torque[-1])
+        rows = np.intersect1d(rows, self.range('motors', 'high_speed', low=output_speed * min_ratio),
+                              assume_unique=True)
+        if len(rows) == 0:
+            return rows
+
+        # Wheel torque g * T(output_speed * g) is the motor power at
+        # output_speed * g over output_speed, so the best usable ratio runs
+        # the motor at its peak-power speed, or as close as the top ratio allows.
+        envelope = self.motor_envelope(rows)
+        if output_speed > 0:
+            top = np.minimum(max_gear_ratio, envelope.high_speed / output_speed)
+            ratio = np.minimum(envelope.peak_power_point()[0] / output_speed, top)
+        else:
+            # Standstill (launch): every ratio holds the motor at 0 rpm, so the largest gives the most torque
+            ratio = np.full(len(envelope), float(max_gear_ratio))
+        # Clamp so rounding in output_speed * ratio cannot step past high_speed
+        motor_rpm = np.minimum(output_speed * ratio, envelope.high_speed)
+        wheel_torque = envelope.torque_at(motor_rpm, outer=False) * ratio * efficiency
+        return rows[wheel_torque >= torque]
+
+    # ---
+    ## Inverter devices
+
+    def devices_for(self, max_r_on=None, max_e_on=None, max_e_off=None):
+        """Devices with R_on, E_on and E_off at or below the given limits."""
+        rows = None
+        for column, limit in (('R_on', max_r_on), ('E_on', max_e_on), ('E_off', max_e_off)):
+            if limit is None:
+                continue
+            selected = self.range('devices', column, high=limit)
+            rows = selected if rows is None else np.intersect1d(rows, selected, assume_unique=True)
+        return np.arange(self.num_rows('devices')) if rows is None else rows
+
+    def devices_dict(self, rows=None):
+        """Selected devices as {name: {'R_on', 'V_f', 'E_on', 'E_off'}} (SweepSpace input)."""
+        names = self.column('devices', DEVICE_KEY, rows)
+        columns = {field: self.column('devices', field, rows) for field in DEVICE_FIELDS}
+        return {name: {field: float(columns[field][i]) for field in DEVICE_FIELDS}
+                for i, name in enumerate(names.tolist())}
@@ -0,0 +1,275 @@
+"""
+Motor + inverter loss maps over a (motor speed, motor torque) grid.
+
+A map holds, for one motor and one inverter parameter set, the motor loss,
+the inverter loss, the total loss (kW) and the drive efficiency at every grid
+point, motoring (torque > 0) and generating (torque < 0). Maps are built
+once, saved as `<hash>.npy` (data) plus `<hash>.json` (grid and parameters)
+under a cache directory, and opened memory-mapped afterwards. The hash covers
+every parameter and the model version, so a map is rebuilt only when one of
+them changes. Queries are batched bilinear interpolation.
+"""
+
+import json
+import math
+import os
+import re
+
+import numpy as np
+
+from powertrain.cache import content_hash
+from powertrain.envelope import ENVELOPE_FIELDS, MotorEnvelope
+from powertrain.gearbox import motor_loss_proxy
+from powertrain.inverter import inverter_model_batch
+
+LOSSMAP_VERSION = 2  # Bump when the loss models change so cached maps are rebuilt
+
+FIELDS = ('motor_loss_kw', 'inverter_loss_kw', 'loss_kw', 'efficiency')
+INVERTER_FIELDS = ('V_dc', 'f_sw', 'R_on', 'V_f', 'E_on', 'E_off')
+INVERTER_DEFAULTS = {'mod_index': 0.85, 'pf': 0.9}
+
+DEFAULT_SPEED_POINTS = 201
+DEFAULT_TORQUE_POINTS = 201
+QUERY_BLOCK_SIZE = 1 << 16  # Query points interpolated per block
+
+# Files a store writes: <content hash>.npy / .json, and their temporaries while saving
+_STORE_FILE = re.compile(r'[0-9a-f]{32}\.(npy|json)(\.\d+\.tmp)?')
+
+
+def default_cache_dir():
+    """$POWERTRAIN_LOSSMAP_DIR, else ~/.cache/powertrain/lossmaps."""
+    return os.environ.get('POWERTRAIN_LOSSMAP_DIR',
+                          os.path.join(os.path.expanduser('~'), '.cache', 'powertrain', 'lossmaps'))
+
+
+def _params(motor, inverter, n_speed, n_torque):
+    """Canonical parameter dict a map is keyed on (floats, fixed key order)."""
+    inverter = {**INVERTER_DEFAULTS, **inverter}
+    return {
+        'version': LOSSMAP_VERSION,
+        'motor': {field: float(motor[field]) for field in ENVELOPE_FIELDS},
+        'inverter': {field: float(inverter[field]) for field in (*INVERTER_FIELDS, *INVERTER_DEFAULTS)},
+        'n_speed': int(n_speed),
+        'n_torque': int(n_torque),
+    }
+
+
+def compute_loss_map(params):
+    """
+    Loss-map data (len(FIELDS), n_speed, n_torque) for a parameter dict.
+
+    The motor loss comes from the per-unit copper/iron proxy; the inverter
+    sees the motor's electrical power at V_out = V_dc * mod_index / sqrt(2)
+    and the given power factor. Generating points draw the inverter current
+    from the magnitude of the electrical power.
+    """
+    motor, inverter = params['motor'], params['inverter']
+    speed = np.linspace(0.0, motor['high_speed'], params['n_speed'])[:, None]
+    torque = np.linspace(-motor['high_torque'], motor['high_torque'], params['n_torque'])[None, :]
+
+    p_mech = torque * speed * (2 * np.pi / 60) / 1000  # kW
+    motor_loss = motor_loss_proxy(motor, speed, np.abs(torque))
+    p_elec = p_mech + motor_loss  # kW into the motor terminals (negative when generating)
+
+    v_out_rms = inverter['V_dc'] * inverter['mod_index'] / math.sqrt(2)
+    i_out_rms = np.abs(p_elec) * 1000 / (math.sqrt(3) * v_out_rms * inverter['pf'])
+    inverter_loss = inverter_model_batch(inverter['V_dc'], i_out_rms, inverter['f_sw'], inverter['R_on'],
+                                         inverter['V_f'], inverter['E_on'], inverter['E_off'], v_out_rms,
+                                         inverter['pf'])['P_losses'] / 1000
+    # No current, no switching: an idle drive has no inverter loss
+    inverter_loss = np.where(i_out_rms > 0, inverter_loss, 0.0)
+
+    loss = motor_loss + inverter_loss
+    p_dc = p_mech + loss
+    with np.errstate(divide='ignore', invalid='ignore'):
+        efficiency = np.where(p_mech >= 0, p_mech / p_dc, p_dc / p_mech)
+    # No output power, no efficiency; 0 (rather than NaN) keeps interpolation next to the axes finite
+    efficiency = np.where(p_mech != 0, efficiency, 0.0)
+
+    shape = (params['n_speed'], params['n_torque'])
+    return np.stack([np.broadcast_to(field, shape) for field in (motor_loss, inverter_loss, loss, efficiency)])
+
+
+class LossMap:
+    """One motor + inverter map, usually memory-mapped from the cache."""
+
+    def __init__(self, data, params, key=None):
+        self.data = data
+        self.params = params
+        self.key = key
+        self.speed_max = params['motor']['high_speed']
+        self.torque_max = params['motor']['high_torque']
+        self.envelope = MotorEnvelope([key], *(params['motor'][field] for field in ENVELOPE_FIELDS))
+
+    @property
+    def speed(self):
+        return np.linspace(0.0, self.speed_max, self.params['n_speed'])
+
+    @property
+    def torque(self):
+        return np.linspace(-self.torque_max, self.torque_max, self.params['n_torque'])
+
+    def query(self, rpm, torque, fields='loss_kw'):
+        """
+        Bilinear interpolation of `fields` at motor speeds `rpm` and torques
+        `torque` (broadcastable arrays). Points the motor cannot reach (torque
+        magnitude above `MotorEnvelope.torque_at`, or off the grid) give NaN.
+
+        Returns:
+            np.ndarray for a single field name, else a dict of arrays.
+        """
+        single = isinstance(fields, str)
+        names = (fields,) if single else tuple(fields)
+        planes = [self.data[FIELDS.index(name)].reshape(-1) for name in names]
+
+        rpm, torque = np.broadcast_arrays(np.asarray(rpm, dtype=float), np.asarray(torque, dtype=float))
+        shape = rpm.shape
+        rpm, torque = rpm.reshape(-1), torque.reshape(-1)
+        out = [np.empty(rpm.size) for _ in names]
+
+        n_speed, n_torque = self.params['n_speed'], self.params['n_torque']
+        x_scale = (n_speed - 1) / self.speed_max if self.speed_max > 0 else 0.0
+        y_scale = (n_torque - 1) / (2 * self.torque_max) if self.torque_max > 0 else 0.0
+        for start in range(0, rpm.size, QUERY_BLOCK_SIZE):
+            stop = start + QUERY_BLOCK_SIZE
+            x = rpm[start:stop] * x_scale
+            y = (torque[start:stop] + self.torque_max) * y_scale
+            outside = ~((x >= 0) & (x <= n_speed - 1) & (y >= 0) & (y <= n_torque - 1))
+            outside |= np.abs(torque[start:stop]) > self.envelope.torque_at(rpm[start:stop])[0]
+            i = np.clip(np.floor(x), 0, max(n_speed - 2, 0)).astype(np.intp)
+            j = np.clip(np.floor(y), 0, max(n_torque - 2, 0)).astype(np.intp)
+            fx = x - i
+            fy = y - j
+            k = i * n_torque + j
+            for plane, result in zip(planes, out):
+                v00, v01 = plane[k], plane[k + 1]
+                v10, v11 = plane[k + n_torque], plane[k + n_torque + 1]
+                low = v00 + fy * (v01 - v00)
+                high = v10 + fy * (v11 - v10)
+                block = low + fx * (high - low)
+                block[outside] = np.nan
+                result[start:stop] = block
+
+        out = [result.reshape(shape) for result in out]
+        return out[0] if single else dict(zip(names, out))
+
+    def energy(self, rpm, torque, dt=1.0):
+        """
+        Drive-cycle energy from motor-side speed/torque samples.
+
+        Returns:
+            dict: 'mechanical_kwh', 'loss_kwh', 'dc_kwh' (net energy drawn
+            from the DC link; regeneration counts negative) and 'outside_s',
+            the time spent beyond the motor envelope, which the sums leave out.
+        """
+        rpm = np.asarray(rpm, dtype=float)
+        torque = np.asarray(torque, dtype=float)
+        p_mech = torque * rpm * (2 * np.pi / 60) / 1000
+        loss = self.query(rpm, torque, 'loss_kw')
+        inside = ~np.isnan(loss)
+        to_kwh = dt / 3600
+        return {
+            'mechanical_kwh': float(np.sum(p_mech, where=inside) * to_kwh),
+            'loss_kwh': float(np.sum(loss, where=inside) * to_kwh),
+            'dc_kwh': float(np.sum(p_mech + loss, where=inside) * to_kwh),
+            'outside_s': float(np.count_nonzero(~inside) * dt),
+        }
+
+
+def drive_cycle_energy(loss_map, speed, gear_ratio, gradient=0.0, mass=2000, dt=1.0, efficiency=1.0):
+    """
+    Drive-cycle energy of one motor + inverter pair in a fixed gear, from the
+    loss map instead of a constant motor efficiency.
+
+    Args:
+        loss_map (LossMap): Map of the motor + inverter pair.
+        speed (np.ndarray): Vehicle speed samples in km/h.
+        gear_ratio (float): Motor-to-wheel ratio.
+        gradient (float or np.ndarray): Road gradient in percentage (%).
+        mass (float): Vehicle mass in kg.
+        dt (float): Sample period in seconds.
+        efficiency (float): Driveline efficiency between motor and wheel.
+
+    Returns:
+        dict: See LossMap.energy.
+    """
+    from powertrain.dynamics import drive_cycle_dynamics
+
+    result = drive_cycle_dynamics(speed, gradient, mass, dt)
+    wheel_torque = result['Torque']
+    # The driveline loses torque on the way to the wheel when driving and on the way back when braking
+    motor_torque = np.where(wheel_torque > 0, wheel_torque / efficiency, wheel_torque * efficiency) / gear_ratio
+    return loss_map.energy(result['w_rpm'] * gear_ratio, motor_torque, dt)
+
+
+class LossMapStore:
+    """
+    Directory of cached loss maps. `get` returns the map for a motor +
+    inverter pair, building and saving it only when no map with the same
+    parameter hash exists yet; opened maps are kept for reuse.
+    """
+
+    def __init__(self, root=None, n_speed=DEFAULT_SPEED_POINTS, n_torque=DEFAULT_TORQUE_POINTS):
+        self.root = root or default_cache_dir()
+        self.n_speed = n_speed
+        self.n_torque = n_torque
+        self.builds = 0
+        self._open = {}
+
+    def _paths(self, key):
+        base = os.path.join(self.root, key)
+        return base + '.npy', base + '.json'
+
+    def get(self, motor, inverter):
+        """
+        Args:
+            motor (dict): Envelope fields (low_speed, high_speed, high_torque, low_torque).
+            inverter (dict): V_dc, f_sw, R_on, V_f, E_on, E_off and optionally
+                mod_index, pf.
+        """
+        params = _params(motor, inverter, self.n_speed, self.n_torque)
+        key = content_hash(params)
+        if key in self._open:
+            return self._open[key]
+
+        data_path, meta_path = self._paths(key)
+        if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+            os.makedirs(self.root, exist_ok=True)
+            data = compute_loss_map(params)
+            # Write to temporary names and rename, so readers never see partial files
+            tmp_data, tmp_meta = data_path + f'.{os.getpid()}.tmp', meta_path + f'.{os.getpid()}.tmp'
+            with open(tmp_data, 'wb') as f:
+                np.save(f, data)
+            with open(tmp_meta, 'w') as f:
+                json.dump(params, f)
+            os.replace(tmp_data, data_path)
+            os.replace(tmp_meta, meta_path)
+            self.builds += 1
+
+        loss_map = LossMap(np.load(data_path, mmap_mode='r'), params, key)
+        self._open[key] = loss_map
+        return loss_map
+
+    def get_many(self, motors, inverters):
+        """
+        Maps for every motor x inverter pair.
+
+        Args:
+            motors (dict): {motor name: envelope fields}.
+            inverters (dict): {inverter name: inverter parameters}.
+
+        Returns:
+            dict: {(motor name, inverter name): LossMap}.
+        """
+        return {(motor, inverter): self.get(motor_params, inverter_params)
+                for motor, motor_params in motors.items()
+                for inverter, inverter_params in inverters.items()}
+
+    def clear(self):
+        """Deletes the cached maps under `root`; other files there are left alone."""
+        self._open.clear()
+        if not os.path.isdir(self.root):
+            return
+        for name in os.listdir(self.root):
+            if _STORE_FILE.fullmatch(name):
+                os.remove(os.path.join(self.root, name))
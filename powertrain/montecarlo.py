@@ -0,0 +1,310 @@
+"""
+Monte Carlo robustness of scenario demand and inverter losses.
+
+Vehicle parameters (Cr, Caero, A_F, rho, r_wheel, mass) and inverter device
+tolerances are sampled in vectorized batches, each scenario's wheel power,
+wheel torque and inverter losses are evaluated for every sample, and the
+batch is folded into running statistics:
+
+- `RunningStats`: count, mean, variance (Welford/Chan pairwise merge), min, max.
+- `QuantileSketch`: log-bucketed histogram with bounded relative error
+  (DDSketch-style), so quantiles need no stored samples.
+
+Both have a fixed size and merge exactly, so batches can run on a process
+pool and 10^8 samples need no more memory than one batch. Every batch draws
+from its own `SeedSequence` child, so results do not depend on the worker
+count.
+"""
+
+import math
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from powertrain.dynamics import propulsion_demand
+from powertrain.inverter import inverter_model_batch
+
+DEFAULT_BATCH_SIZE = 1 << 16  # Samples per task
+DEFAULT_QUANTILES = (0.05, 0.5, 0.95, 0.99)
+
+# Distributions: ('uniform', low, high), ('normal', mean, std) or ('fixed', value)
+VEHICLE_DISTRIBUTIONS = {
+    'Cr': ('uniform', 0.008, 0.014),  # Tyre type and pressure
+    'Caero': ('normal', 0.30, 0.01),
+    'A_F': ('normal', 1.88, 0.02),  # m^2
+    'rho': ('uniform', 1.00, 1.25),  # kg/m^3, altitude 0-2000 m and ambient temperature
+    'r_wheel': ('uniform', 0.29, 0.31),  # m, tyre size and wear
+    'mass': ('uniform', 1800.0, 2400.0),  # kg, kerb mass plus payload
+}
+
+# Device tolerances as multipliers of the nominal device parameters
+DEVICE_TOLERANCES = {
+    'R_on': ('normal', 1.0, 0.05),
+    'V_f': ('normal', 1.0, 0.03),
+    'E_on': ('normal', 1.0, 0.10),
+    'E_off': ('normal', 1.0, 0.10),
+}
+
+# Inverter operating point of the app
+INVERTER_DEFAULTS = {'V_dc': 400.0, 'f_sw': 20e3, 'R_on': 0.01, 'V_f': 1.0, 'E_on': 1.5e-3, 'E_off': 1.0e-3,
+                     'mod_index': 0.85, 'pf': 0.9, 'motor_efficiency': 0.90}
+
+METRICS = ('power_kw', 'torque_nm', 'inverter_loss_w')
+
+
+# ---
+## Streaming statistics
+
+class RunningStats:
+    """Count, mean, variance, min and max of k columns, updated batch by batch."""
+
+    def __init__(self, k):
+        self.count = 0
+        self.mean = np.zeros(k)
+        self.m2 = np.zeros(k)
+        self.min = np.full(k, np.inf)
+        self.max = np.full(k, -np.inf)
+
+    def _combine(self, count, mean, m2):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (count / total)
+        self.m2 = self.m2 + m2 + delta ** 2 * (self.count * count / total)
+        self.count = total
+
+    def update(self, values):
+        """Folds in a (samples, k) batch."""
+        if len(values) == 0:
+            return
+        mean = values.mean(axis=0)
+        self._combine(len(values), mean, ((values - mean) ** 2).sum(axis=0))
+        np.minimum(self.min, values.min(axis=0), out=self.min)
+        np.maximum(self.max, values.max(axis=0), out=self.max)
+
+    def merge(self, other):
+        if other.count:
+            self._combine(other.count, other.mean, other.m2)
+            np.minimum(self.min, other.min, out=self.min)
+            np.maximum(self.max, other.max, out=self.max)
+        return self
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else np.full_like(self.m2, np.nan)
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+
+class QuantileSketch:
+    """
+    Quantile sketch of k columns with relative accuracy `alpha`.
+
+    Magnitudes between `min_value` and `max_value` fall into logarithmic
+    buckets of ratio gamma = (1 + alpha) / (1 - alpha), per sign; smaller
+    magnitudes count as zero and larger ones land in the last bucket. A
+    quantile is reported within a factor (1 +/- alpha) of a true sample value.
+    """
+
+    def __init__(self, k, alpha=0.01, min_value=1e-6, max_value=1e9):
+        self.alpha = alpha
+        self.min_value = min_value
+        self.log_gamma = math.log((1 + alpha) / (1 - alpha))
+        self.offset = math.ceil(math.log(min_value) / self.log_gamma)
+        n_buckets = math.ceil(math.log(max_value) / self.log_gamma) - self.offset + 1
+        self.positive = np.zeros((k, n_buckets), dtype=np.int64)
+        self.negative = np.zeros((k, n_buckets), dtype=np.int64)
+        self.zero = np.zeros(k, dtype=np.int64)
+
+    def _buckets(self, magnitude):
+        index = np.ceil(np.log(magnitude) / self.log_gamma) - self.offset
+        return np.clip(index, 0, self.positive.shape[1] - 1).astype(np.intp)
+
+    def update(self, values):
+        """Folds in a (samples, k) batch."""
+        k, n_buckets = self.positive.shape
+        column = np.broadcast_to(np.arange(k), values.shape)
+        magnitude = np.abs(values)
+        small = ~(magnitude >= self.min_value)  # NaN counts as zero
+        self.zero += small.sum(axis=0)
+        for counts, side in ((self.positive, values > 0), (self.negative, values < 0)):
+            side &= ~small
+            flat = column[side] * n_buckets + self._buckets(magnitude[side])
+            counts += np.bincount(flat, minlength=counts.size).reshape(counts.shape)
+
+    def merge(self, other):
+        self.positive += other.positive
+        self.negative += other.negative
+        self.zero += other.zero
+        return self
+
+    def _value(self, bucket):
+        gamma = math.exp(self.log_gamma)
+        return 2 * gamma ** (bucket + self.offset) / (gamma + 1)
+
+    def quantile(self, q):
+        """Estimated q-quantile (0-1) of every column."""
+        n_buckets = self.positive.shape[1]
+        # Ascending order: largest negatives first, then zero, then positives
+        counts = np.concatenate([self.negative[:, ::-1], self.zero[:, None], self.positive], axis=1)
+        cumulative = np.cumsum(counts, axis=1)
+        total = cumulative[:, -1]
+        rank = np.floor(q * (total - 1))
+        index = np.argmax(cumulative > rank[:, None], axis=1)
+        value = np.where(index > n_buckets, self._value(index - n_buckets - 1), 0.0)
+        value = np.where(index < n_buckets, -self._value(n_buckets - 1 - index), value)
+        return np.where(total > 0, value, np.nan)
+
+
+# ---
+## Sampling and evaluation
+
+def _sample(rng, spec, n):
+    kind, *params = spec
+    if kind == 'uniform':
+        return rng.uniform(params[0], params[1], n)
+    if kind == 'normal':
+        return np.maximum(rng.normal(params[0], params[1], n), 0.0)
+    if kind == 'fixed':
+        return np.full(n, float(params[0]))
+    raise ValueError(f"unknown distribution {kind!r}")
+
+
+SCENARIO_FIELDS = ('speed', 'gradient', 'acceleration')
+
+
+def _scenario_arrays(scenarios):
+    """
+    Scenario names and (speed km/h, gradient %, acceleration m/s^2) columns.
+    Every scenario must give all three; the app's gear-ratio scenarios
+    (wheel rpm, torque, power) are not vehicle states and are rejected.
+    """
+    if hasattr(scenarios, 'columns'):
+        scenarios = scenarios.to_dict('records')
+    for i, s in enumerate(scenarios):
+        missing = [field for field in SCENARIO_FIELDS if field not in s]
+        if missing:
+            raise ValueError(f"scenario {s.get('name', s.get('condition', i))!r} is missing {missing}; "
+                             f"Monte Carlo scenarios need {list(SCENARIO_FIELDS)}")
+    names = np.array([s.get('name', s.get('condition', str(i))) for i, s in enumerate(scenarios)])
+    get = lambda field: np.array([float(s[field]) for s in scenarios])
+    return names, get('speed'), get('gradient'), get('acceleration')
+
+
+def evaluate_batch(rng, n, scenarios, vehicle=None, tolerances=None, inverter=None):
+    """
+    One batch of samples.
+
+    Args:
+        rng (np.random.Generator): Random source of this batch.
+        n (int): Samples.
+        scenarios: List of dicts (or DataFrame) with 'speed' (km/h),
+            'gradient' (%) and 'acceleration' (m/s^2), named by 'name' or
+            'condition'.
+        vehicle, tolerances, inverter (dict, optional): Overrides of
+            VEHICLE_DISTRIBUTIONS, DEVICE_TOLERANCES and INVERTER_DEFAULTS.
+
+    Returns:
+        np.ndarray: (n, len(METRICS) * scenarios) values, metric-major.
+    """
+    vehicle = {**VEHICLE_DISTRIBUTIONS, **(vehicle or {})}
+    tolerances = {**DEVICE_TOLERANCES, **(tolerances or {})}
+    inverter = {**INVERTER_DEFAULTS, **(inverter or {})}
+    _, speed, gradient, acceleration = _scenario_arrays(scenarios)
+
+    draw = {name: _sample(rng, vehicle[name], n)[:, None] for name in VEHICLE_DISTRIBUTIONS}
+    mass = draw.pop('mass')
+    _, power, torque, _ = propulsion_demand(speed / 3.6, np.arctan(gradient / 100.0), acceleration, mass, **draw)
+
+    device = {name: inverter[name] * _sample(rng, tolerances[name], n)[:, None] for name in DEVICE_TOLERANCES}
+    v_out_rms = inverter['V_dc'] * inverter['mod_index'] / math.sqrt(2)
+    i_out_rms = np.abs(power) * 1000 / inverter['motor_efficiency'] / (math.sqrt(3) * v_out_rms * inverter['pf'])
+    losses = inverter_model_batch(inverter['V_dc'], i_out_rms, inverter['f_sw'], V_out_rms=v_out_rms,
+                                  pf=inverter['pf'], **device)['P_losses']
+    return np.hstack([power, torque, losses])
+
+
+def _run_task(task):
+    seed, n, scenarios, vehicle, tolerances, inverter, sketch_options = task
+    values = evaluate_batch(np.random.default_rng(seed), n, scenarios, vehicle, tolerances, inverter)
+    stats = RunningStats(values.shape[1])
+    sketch = QuantileSketch(values.shape[1], **sketch_options)
+    stats.update(values)
+    sketch.update(values)
+    return stats, sketch
+
+
+def run_monte_carlo(scenarios, n_samples, vehicle=None, tolerances=None, inverter=None, seed=0,
+                    batch_size=DEFAULT_BATCH_SIZE, workers=1, alpha=0.01, progress=None):
+    """
+    Monte Carlo distribution of wheel power, wheel torque and inverter losses
+    per scenario.
+
+    Args:
+        scenarios: See evaluate_batch.
+        n_samples (int): Total samples.
+        vehicle, tolerances, inverter (dict, optional): See evaluate_batch.
+        seed (int): Root seed; batch i draws from SeedSequence(seed).spawn()[i].
+        batch_size (int): Samples per task.
+        workers (int): Process count (0: one per CPU); at most 2 * workers
+            batches are in flight.
+        alpha (float): Relative accuracy of the quantile sketch.
+        progress (callable, optional): Called as progress(done, total) in samples.
+
+    Returns:
+        dict: 'scenarios' (names), 'metrics', 'samples', 'stats'
+        (RunningStats) and 'sketch' (QuantileSketch), columns metric-major.
+    """
+    names = _scenario_arrays(scenarios)[0]
+    if hasattr(scenarios, 'columns'):
+        scenarios = scenarios.to_dict('records')
+    sizes = [min(batch_size, n_samples - start) for start in range(0, n_samples, batch_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = ((s, n, scenarios, vehicle, tolerances, inverter, {'alpha': alpha}) for s, n in zip(seeds, sizes))
+
+    k = len(METRICS) * len(names)
+    stats, sketch = RunningStats(k), QuantileSketch(k, alpha=alpha)
+
+    def fold(result):
+        stats.merge(result[0])
+        sketch.merge(result[1])
+        if progress is not None:
+            progress(stats.count, n_samples)
+
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        for task in tasks:
+            fold(_run_task(task))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for task in tasks:
+                pending.append(pool.submit(_run_task, task))
+                if len(pending) >= 2 * workers:
+                    fold(pending.popleft().result())
+            while pending:
+                fold(pending.popleft().result())
+
+    return {'scenarios': names, 'metrics': METRICS, 'samples': stats.count, 'stats': stats, 'sketch': sketch}
+
+
+def monte_carlo_frame(result, quantiles=DEFAULT_QUANTILES):
+    """Tidy summary, one row per (scenario, metric)."""
+    import pandas as pd
+
+    stats, sketch = result['stats'], result['sketch']
+    n_scenarios = len(result['scenarios'])
+    frame = pd.DataFrame({
+        'scenario': np.tile(result['scenarios'], len(result['metrics'])),
+        'metric': np.repeat(result['metrics'], n_scenarios),
+        'mean': stats.mean,
+        'std': stats.std,
+        'min': stats.min,
+        'max': stats.max,
+    })
+    for q in quantiles:
+        frame[f'p{q * 100:g}'] = sketch.quantile(q)
+    return frame.sort_values(['scenario', 'metric'], kind='stable').reset_index(drop=True)
@@ -0,0 +1,220 @@
+"""Torque/power-speed figures. Plotly and SciPy are imported only when a figure is built."""
+
+import numpy as np
+
+from powertrain.envelope import MotorEnvelope
+from powertrain.profiling import stage
+
+COLORS = ['blue', 'orange', 'green', 'red', 'purple', 'brown', 'pink', 'gray']
+
+# Catalogs above this size switch to the large-catalog mode by default:
+# WebGL traces, one trace per color group and level-of-detail decimation.
+LARGE_CATALOG_THRESHOLD = 50
+
+# Points per figure the large-catalog mode aims for, shared by all motors
+DEFAULT_POINT_BUDGET = 20_000
+
+
+def trace_color(idx):
+    """Color of the torque and power traces of the `idx`-th motor."""
+    return COLORS[idx % len(COLORS)]
+
+
+def _curve_points(n_motors, point_budget, max_points=100, min_points=3):
+    """Field-weakening samples per motor so the whole figure fits `point_budget`."""
+    return int(np.clip(point_budget // max(n_motors, 1) - 2, min_points, max_points))
+
+
+def _grouped_traces(scatter, x, y, names, label):
+    """
+    One WebGL trace per color: each motor's curve is appended to its color
+    group, separated by NaN gaps, with the motor name as hover text.
+    """
+    traces = []
+    n_motors, n_points = x.shape
+    gap = np.full((n_motors, 1), np.nan)
+    x = np.concatenate((x, gap), axis=1)
+    y = np.concatenate((y, gap), axis=1)
+    text = np.repeat(names, n_points + 1)
+    for group in range(min(len(COLORS), n_motors)):
+        rows = slice(group, None, len(COLORS))
+        traces.append(scatter(
+            x=x[rows].ravel(), y=y[rows].ravel(), text=text.reshape(n_motors, -1)[rows].ravel(),
+            mode='lines', name=f"{label} ({len(names[rows])} motors)", line=dict(color=COLORS[group], width=1),
+            hovertemplate='%{text}<br>%{x:.0f} RPM, %{y:.1f}<extra></extra>', connectgaps=False,
+        ))
+    return traces
+
+
+# ---
+## Curve and trace builders, shared by the graphs and the incremental pipeline
+
+def torque_curves(envelope, large=False):
+    """(speed, torque) arrays of shape (n_motors, points) for the torque-speed graph."""
+    speed = envelope.speed_grid(2 if large else 3)
+    return speed, envelope.torque_at(speed, outer=False)
+
+
+def power_curves(envelope, gear_ratio, points_per_segment=100, base_points=None):
+    """
+    (speed, power) arrays for the power-speed graph. Power does not depend on
+    the gear ratio; `gear_ratio` (one per motor) only rescales the speed axis
+    to the gearbox output.
+    """
+    speed = envelope.speed_grid(points_per_segment, base_points=base_points)
+    power = envelope.power_at(speed, outer=False)
+    return speed / np.asarray(gear_ratio, dtype=float)[:, None], power
+
+
+def power_curve_points(n_motors, large, point_budget=DEFAULT_POINT_BUDGET):
+    """(points_per_segment, base_points) of `power_curves` for a catalog of `n_motors`."""
+    if large:
+        return _curve_points(n_motors, point_budget), 2
+    return 100, None
+
+
+def vehicle_curve(scenarios, points=300):
+    """
+    Spline through the scenarios' (speed, power) points, `points` samples.
+
+    Points are sorted by speed and duplicate speeds keep their largest
+    power; rows with missing values are skipped. The spline is quadratic,
+    or linear with two points; one point is returned as is and none give
+    empty arrays.
+    """
+    from scipy.interpolate import make_interp_spline
+
+    speed = np.array([scenario['max_speed_vehicle'] for scenario in scenarios], dtype=float)
+    power = np.array([scenario['power'] for scenario in scenarios], dtype=float)
+    valid = np.isfinite(speed) & np.isfinite(power)
+    speed, power = speed[valid], power[valid]
+
+    # Unique increasing speeds, each with its largest power
+    speed, inverse = np.unique(speed, return_inverse=True)
+    peak = np.full(len(speed), -np.inf)
+    np.maximum.at(peak, inverse, power)
+    if len(speed) < 2:
+        return speed, peak
+
+    with stage('power_speed.spline_fit'):
+        # Interpolate the points using spline interpolation
+        spl = make_interp_spline(speed, peak, k=min(2, len(speed) - 1))
+
+        # Generate a denser set of points for smoother curve
+        x_new = np.linspace(speed[0], speed[-1], points)
+        y_new = spl(x_new)
+    return x_new, y_new
+
+
+def torque_trace(go, speed, torque, engine, idx):
+    return go.Scatter(x=speed, y=torque, mode='lines', name=f"{engine} - Torque [Nm] ", line=dict(color=trace_color(idx)))
+
+
+def power_trace(go, speed, power, engine, idx):
+    return go.Scatter(x=speed, y=power, mode='lines', name=f"{engine} - Power [kW]", line=dict(color=trace_color(idx)))
+
+
+def vehicle_trace(go, x, y):
+    return go.Scatter(x=x, y=y, mode='lines', name="Vehicle", line=dict(dash='dash'))
+
+
+def combine_figures(fig_torque_speed, fig_power_speed):
+    """Torque-speed and power-speed figures side by side in one subplot figure."""
+    from plotly.subplots import make_subplots
+
+    with stage('combined_figure.copy_traces'):
+        # Combine the two graphs into a single subplot figure
+        combined_fig = make_subplots(rows=1, cols=2, subplot_titles=('Torque-Speed Graph', 'Power-Speed Graph'))
+
+        for trace in fig_torque_speed['data']:
+            combined_fig.add_trace(trace, row=1, col=1)
+
+        for trace in fig_power_speed['data']:
+            combined_fig.add_trace(trace, row=1, col=2)
+
+    combined_fig.update_xaxes(title_text='Speed (RPM)', row=1, col=1)
+    combined_fig.update_yaxes(title_text='Torque (Nm)', row=1, col=1)
+    combined_fig.update_xaxes(title_text='Speed (RPM)', row=1, col=2)
+    combined_fig.update_yaxes(title_text='Power (kW)', row=1, col=2)
+    return combined_fig
+
+
+class TorqueSpeedGraph:
+    def __init__(self, engines, scenarios, gear_ratios, envelope=None):
+        self.engines = engines
+        self.scenarios = scenarios
+        self.gear_ratios = gear_ratios
+        self.envelope = envelope if envelope is not None else MotorEnvelope.from_engines(engines)
+
+    def plot(self, webgl=None):
+        """
+        Torque-speed figure. `webgl` selects the large-catalog mode (default:
+        more than LARGE_CATALOG_THRESHOLD engines). The envelope is piecewise
+        linear, so that mode draws it exactly with two points per segment.
+        """
+        import plotly.graph_objs as go
+
+        large = len(self.envelope) > LARGE_CATALOG_THRESHOLD if webgl is None else webgl
+
+        # Init figure Torque[Nm]-Speed[rpm]
+        fig = go.Figure()
+        
+        # Torque envelopes of all engines in one array pass
+        speed, torque = torque_curves(self.envelope, large)
+
+        # Plot torque-speed graph for engines
+        if large:
+            fig.add_traces(_grouped_traces(go.Scattergl, speed, torque, self.envelope.names, "Torque [Nm]"))
+        else:
+            for idx, engine in enumerate(self.envelope.names.tolist()):
+                fig.add_trace(torque_trace(go, speed[idx], torque[idx], engine, idx))
+
+        fig.update_xaxes(title_text='Speed (RPM)')
+        fig.update_yaxes(title_text='Torque (Nm)')
+        return fig
+
+
+class PowerSpeedGraph:
+    def __init__(self, engines, scenarios, gear_ratios, envelope=None, demand=None):
+        self.engines = engines
+        self.scenarios = scenarios
+        self.gear_ratios = gear_ratios
+        self.envelope = envelope if envelope is not None else MotorEnvelope.from_engines(engines)
+        self.demand = demand  # DemandHistogram; its envelope replaces the scenario spline
+
+    def plot(self, webgl=None, point_budget=DEFAULT_POINT_BUDGET):
+        """
+        Power-speed figure. `webgl` selects the large-catalog mode (default:
+        more than LARGE_CATALOG_THRESHOLD engines), in which the linear
+        constant-torque segment uses two points and the field-weakening
+        segment is decimated to fit `point_budget` points overall.
+        """
+        import plotly.graph_objs as go
+
+        large = len(self.envelope) > LARGE_CATALOG_THRESHOLD if webgl is None else webgl
+
+        fig = go.Figure()
+        final_gear_ratio=3.5
+
+        names = self.envelope.names.tolist()
+
+        # Power envelopes of all engines in one array pass, on the speed axis
+        # of the gearbox output for the first scenario's ratio
+        gear_ratio = np.array([self.gear_ratios[engine][0]['Gear Ratio'] for engine in names])
+        speed, power = power_curves(self.envelope, gear_ratio, *power_curve_points(len(names), large, point_budget))
+
+        # Plot power vs speed for engines
+        if large:
+            fig.add_traces(_grouped_traces(go.Scattergl, speed, power, self.envelope.names, "Power [kW]"))
+        else:
+            for idx, engine in enumerate(names):
+                fig.add_trace(power_trace(go, speed[idx], power[idx], engine, idx))
+
+        if self.demand is not None:
+            fig.add_trace(vehicle_trace(go, *self.demand.demand_curve()))
+        else:
+            fig.add_trace(vehicle_trace(go, *vehicle_curve(self.scenarios)))
+        fig.update_xaxes(title_text='Speed (RPM)')
+        fig.update_yaxes(title_text='Power (kW)')
+        fig.update_layout(title_text='Power-Speed Graph')
+        return fig
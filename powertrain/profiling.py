@@ -0,0 +1,193 @@
+"""
+Stage-level profiling: wall time, call counts and (optionally) allocations
+per named stage, exportable as JSON or as a Chrome trace (chrome://tracing,
+Perfetto).
+
+Instrumented code uses `with stage('name'):`, which records into the active
+profiler: the shared PROFILER, or the one `use_profiler` installed for the
+current thread (e.g. one per app session). While that profiler is disabled,
+`stage` returns one pre-built no-op context manager, so the cost is a
+context-variable lookup, a method call and an attribute check.
+"""
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+import weakref
+from collections import deque
+from contextvars import ContextVar
+from functools import wraps
+
+MAX_EVENTS = 100_000  # Trace events kept per profiler (oldest dropped first)
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+# tracemalloc is process-wide: profilers tracing allocations share it, and it
+# is stopped only when profilers started it and the last of them is done
+_tracing_lock = threading.Lock()
+_tracing_profilers = weakref.WeakSet()
+_tracing_started = False
+
+
+def _trace_allocations(profiler, enabled):
+    global _tracing_started
+    with _tracing_lock:
+        if enabled:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _tracing_started = True
+            _tracing_profilers.add(profiler)
+        else:
+            _tracing_profilers.discard(profiler)
+            if _tracing_started and not _tracing_profilers:
+                tracemalloc.stop()
+                _tracing_started = False
+
+
+class _Stage:
+    __slots__ = ('profiler', 'name', 'start', 'mem_start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        if self.profiler.trace_allocations:
+            self.mem_start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        allocated = peak = 0
+        if self.profiler.trace_allocations:
+            current, peak_total = tracemalloc.get_traced_memory()
+            allocated = current - self.mem_start
+            peak = peak_total - self.mem_start
+        self.profiler._record(self.name, self.start, end, allocated, peak)
+        return False
+
+
+class Profiler:
+    """
+    Collects per-stage statistics and trace events.
+
+    With `trace_allocations`, tracemalloc runs while the profiler is enabled
+    and each stage records its net allocation and peak above its start. The
+    peak of an outer stage restarts when a nested stage begins, so peaks are
+    exact for leaf stages only. Tracing that was already running (started
+    outside any profiler) is left running.
+    """
+
+    def __init__(self, enabled=False, trace_allocations=False):
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self.stats = {}
+        self.events = deque(maxlen=MAX_EVENTS)
+        self.enabled = False
+        self.trace_allocations = False
+        self.configure(enabled, trace_allocations)
+
+    def configure(self, enabled, trace_allocations=False):
+        self.enabled = bool(enabled)
+        self.trace_allocations = self.enabled and bool(trace_allocations)
+        _trace_allocations(self, self.trace_allocations)
+
+    def reset(self):
+        with self._lock:
+            self._origin = time.perf_counter()
+            self.stats = {}
+            self.events.clear()
+
+    def stage(self, name):
+        """Context manager timing one execution of stage `name`."""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def profiled(self, name):
+        """Decorator form of `stage`."""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _record(self, name, start, end, allocated, peak):
+        duration = end - start
+        with self._lock:
+            s = self.stats.get(name)
+            if s is None:
+                s = self.stats[name] = {'calls': 0, 'total_s': 0.0, 'max_s': 0.0,
+                                        'allocated_bytes': 0, 'peak_bytes': 0}
+            s['calls'] += 1
+            s['total_s'] += duration
+            s['max_s'] = max(s['max_s'], duration)
+            s['allocated_bytes'] += allocated
+            s['peak_bytes'] = max(s['peak_bytes'], peak)
+            self.events.append((name, start - self._origin, duration, threading.get_ident(), allocated))
+
+    # ---
+    ## Export
+
+    def summary(self):
+        """One dict per stage, slowest total first."""
+        rows = [{'stage': name, **s, 'mean_s': s['total_s'] / s['calls']} for name, s in self.stats.items()]
+        return sorted(rows, key=lambda r: r['total_s'], reverse=True)
+
+    def to_json(self):
+        return json.dumps({'stages': self.summary()}, indent=2)
+
+    def chrome_trace(self):
+        """Trace Event Format dict with one complete ('X') event per stage execution."""
+        pid = os.getpid()
+        events = [
+            {'name': name, 'cat': 'stage', 'ph': 'X', 'ts': start * 1e6, 'dur': duration * 1e6,
+             'pid': pid, 'tid': tid, 'args': {'allocated_bytes': allocated}}
+            for name, start, duration, tid, allocated in list(self.events)
+        ]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write_chrome_trace(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+
+
+# Process-wide profiler used by the instrumented models unless a thread installs its own
+PROFILER = Profiler()
+
+_active_profiler = ContextVar('active_profiler', default=PROFILER)
+
+
+def use_profiler(profiler):
+    """
+    Routes `stage` in the current thread to `profiler` (None: back to
+    PROFILER), so concurrent app sessions each profile their own reruns.
+    """
+    _active_profiler.set(PROFILER if profiler is None else profiler)
+
+
+def active_profiler():
+    """The profiler `stage` records into in the current thread."""
+    return _active_profiler.get()
+
+
+def stage(name):
+    """`active_profiler().stage(name)`; a shared no-op while it is disabled."""
+    return _active_profiler.get().stage(name)
@@ -0,0 +1,164 @@
+"""
+Time-domain sinusoidal-PWM inverter losses (no UI dependencies).
+
+Higher-fidelity alternative to `inverter_model_batch`: every operating point
+is simulated over one fundamental period, one carrier period at a time
+(regular sampling at the carrier centre). Per carrier period the phase-leg
+duty cycle follows the modulation index, the load current follows the power
+factor angle, and the conducting transistor/diode pair, its conduction energy
+(including triangular current ripple when a phase inductance is given) and
+its switching energy are accumulated. Phase b and c are phase a shifted by
+120 degrees, so phase a is simulated and the leg losses are tripled.
+
+Operating points are sorted by carrier periods per fundamental and evaluated
+in blocks of at most `PWM_BLOCK_ELEMENTS` (point, carrier period) cells, also
+splitting the fundamental period itself when one point alone is larger, so
+memory stays bounded at any switching frequency.
+"""
+
+import math
+
+import numpy as np
+
+from powertrain.inverter import INVERTER_RESULT_DTYPE, _check_device_parameters
+
+# Batched result: the analytic fields plus the loss of one transistor and of
+# one diode (all six of each are equally loaded over a fundamental period)
+PWM_RESULT_DTYPE = np.dtype(INVERTER_RESULT_DTYPE.descr + [
+    ("P_transistor", np.float64),
+    ("P_diode", np.float64),
+])
+
+PWM_BLOCK_ELEMENTS = 1 << 17  # (point, carrier period) cells evaluated per block
+DEFAULT_F_OUT = 50.0  # Fundamental output frequency (Hz)
+
+
+def _leg_energy(theta, m, phi, i_peak, V_dc, T, R_on, V_f, E_on, E_off, L_phase, I_ref, T_j, device=None):
+    """
+    Transistor conduction, transistor switching and diode conduction energy
+    (J) of one phase leg in the carrier periods at angles `theta`
+    (points x periods); the other arguments are (points, 1). A `device`
+    replaces R_on, V_f, E_on and E_off by its curves at each period's current.
+    """
+    duty = np.clip(0.5 * (1 + m * np.sin(theta)), 0.0, 1.0)
+    current = i_peak * np.sin(theta - phi)
+    magnitude = np.abs(current)
+
+    # Peak-to-peak ripple of a half bridge feeding an inductor at its mean voltage
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ripple = np.where(L_phase > 0, V_dc * duty * (1 - duty) * T / L_phase, 0.0)
+        scale_on = np.where(I_ref > 0, np.maximum(magnitude - ripple / 2, 0.0) / I_ref, 1.0)
+        scale_off = np.where(I_ref > 0, (magnitude + ripple / 2) / I_ref, 1.0)
+    if device is not None:
+        curves = device.curves
+        R_on = curves['R_on'](magnitude, T_j)
+        V_f = curves['V_f'](magnitude, T_j)
+        E_on = curves['E_on'](np.maximum(magnitude - ripple / 2, 0.0), T_j)
+        E_off = curves['E_off'](magnitude + ripple / 2, T_j)
+        scale_on = scale_off = V_dc / device.V_ref if device.V_ref else 1.0
+
+    # Positive current: upper transistor for d*T, lower diode for the rest;
+    # negative current: lower transistor for (1-d)*T, upper diode for the rest
+    t_transistor = np.where(current >= 0, duty, 1 - duty) * T
+    t_diode = T - t_transistor
+    e_transistor = R_on * (current ** 2 + ripple ** 2 / 12) * t_transistor
+    e_diode = V_f * magnitude * t_diode
+
+    # One hard turn-on and turn-off of the active transistor per carrier period,
+    # at the ripple valley and peak; fixed energies unless I_ref scales them
+    switching = (duty > 0) & (duty < 1) & (magnitude > 0)
+    e_switching = np.where(switching, E_on * scale_on + E_off * scale_off, 0.0)
+    return e_transistor, e_switching, e_diode
+
+
+def inverter_model_pwm(
+    V_dc,                  # DC link voltage (V)
+    I_out_rms,             # RMS output phase current (A)
+    f_sw,                  # Switching frequency (Hz)
+    R_on=None,             # On-state resistance per switch (ohms)
+    V_f=None,              # Diode forward voltage drop (V)
+    E_on=None,             # Energy loss per switch-on event (J)
+    E_off=None,            # Energy loss per switch-off event (J)
+    V_out_rms=None,        # RMS output voltage (V), V_dc * mod_index / sqrt(2) as in the app
+    pf=0.9,                # Power Factor (assumed)
+    f_out=DEFAULT_F_OUT,   # Fundamental output frequency (Hz)
+    L_phase=0.0,           # Phase inductance for current ripple (H); 0 ignores ripple
+    I_ref=0.0,             # Current E_on/E_off were measured at (A); 0 keeps them fixed per event
+    as_frame: bool = False,
+    device=None,           # SemiconductorDevice; its curves are read at each period's current
+    T_j=25.0               # Junction temperature for the device curves (C)
+):
+    """
+    Time-domain `inverter_model_batch` over broadcastable arrays of parameters.
+
+    The modulation index is recovered from V_out_rms with the app's
+    convention (mod_index = sqrt(2) * V_out_rms / V_dc) and clipped duty
+    cycles model over-modulation. The carrier is rounded to a whole number of
+    periods per fundamental. Unlike the analytic model, only the transistor
+    carrying the current switches in each carrier period, so switching loss
+    is about half of 6 * (E_on + E_off) * f_sw.
+
+    Returns:
+        np.ndarray: Structured array (PWM_RESULT_DTYPE) with the broadcast
+        shape, or a flat pandas DataFrame if `as_frame` is True.
+    """
+    _check_device_parameters(device, R_on, V_f, E_on, E_off)
+    if device is not None:
+        R_on = V_f = E_on = E_off = 0.0  # Read from the device curves per carrier period
+    if V_out_rms is None:
+        raise TypeError("inverter_model_pwm() missing required argument: 'V_out_rms'")
+    params = [np.asarray(p, dtype=float) for p in
+              (V_dc, I_out_rms, f_sw, R_on, V_f, E_on, E_off, V_out_rms, pf, f_out, L_phase, I_ref, T_j)]
+    shape = np.broadcast_shapes(*(p.shape for p in params))
+    (V_dc, I_out_rms, f_sw, R_on, V_f, E_on, E_off, V_out_rms, pf, f_out, L_phase, I_ref, T_j) = (
+        np.broadcast_to(p, shape).reshape(-1) for p in params)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        m = np.where(V_dc > 0, math.sqrt(2) * V_out_rms / V_dc, 0.0)
+    phi = np.arccos(np.clip(pf, -1.0, 1.0))
+    i_peak = math.sqrt(2) * I_out_rms
+    T = 1.0 / f_sw
+    periods = np.maximum(np.rint(f_sw / f_out), 1).astype(np.int64)
+
+    energy = np.zeros((3, periods.size))  # transistor conduction, switching, diode conduction
+    order = np.argsort(periods, kind='stable')
+    start = 0
+    while start < order.size:
+        # Longest run of points (sorted by period count) that fits one block;
+        # a single larger point is split along its carrier periods instead
+        stop = start + 1
+        while stop < order.size and (stop - start + 1) * periods[order[stop]] <= PWM_BLOCK_ELEMENTS:
+            stop += 1
+        idx = order[start:stop]
+        n = periods[idx][:, None]
+        n_max = int(n.max())
+        step = max(1, PWM_BLOCK_ELEMENTS // len(idx))
+        args = [p[idx][:, None] for p in (m, phi, i_peak, V_dc, T, R_on, V_f, E_on, E_off, L_phase, I_ref, T_j)]
+        for k0 in range(0, n_max, step):
+            k = np.arange(k0, min(k0 + step, n_max))[None, :]
+            inside = k < n
+            theta = 2 * np.pi * (k + 0.5) / n
+            for total, part in zip(energy, _leg_energy(theta, *args, device=device)):
+                total[idx] += np.sum(part, axis=1, where=inside)
+        start = stop
+
+    # Energy of one leg per fundamental period -> average power of one device;
+    # each leg has two transistors and two diodes, and there are three legs
+    per_device = energy / (periods * T) / 2
+    result = np.empty(periods.size, dtype=PWM_RESULT_DTYPE)
+    result["P_transistor"] = per_device[0] + per_device[1]
+    result["P_diode"] = per_device[2]
+    result["P_conduction"] = 6 * (per_device[0] + per_device[2])
+    result["P_switching"] = 6 * per_device[1]
+    result["P_losses"] = result["P_conduction"] + result["P_switching"]
+    result["P_out_ac"] = math.sqrt(3) * V_out_rms * I_out_rms * pf
+    result["P_in_dc"] = result["P_out_ac"] + result["P_losses"]
+    efficiency = np.zeros(periods.size)
+    np.divide(result["P_out_ac"], result["P_in_dc"], out=efficiency, where=result["P_in_dc"] > 0)
+    result["efficiency_percent"] = efficiency * 100
+    result = result.reshape(shape)
+
+    if as_frame:
+        import pandas as pd
+        return pd.DataFrame(result.reshape(-1))
+    return result
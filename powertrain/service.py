@@ -0,0 +1,441 @@
+"""
+Local HTTP/JSON evaluation service for the powertrain models (asyncio, stdlib only).
+
+    python -m powertrain.service --port 8765 --workers 2
+
+Endpoints (JSON in, JSON out):
+
+    POST /v1/inverter      inverter_model arguments -> inverter_model result
+    POST /v1/dynamics      speed, gradient, acceleration, mass (+ optional Cr,
+                           Caero, A_F, rho, r_wheel) -> longitudinal_dynamics
+                           fields F_prop, Power, Torque, w_rpm, v_ms
+    POST /v1/gear-ratios   {"engines": {...}, "scenarios": [...]} -> gear-ratio table
+    GET  /v1/metrics       request, cache, batch and latency counters
+    GET  /v1/health
+
+Requests to the point models arriving within `max_delay` of each other are
+gathered into one micro-batch (up to `max_batch` points) and evaluated with
+the vectorized model on a worker pool, so the event loop only parses and
+routes. Identical requests are answered from an LRU cache, and identical
+requests already in flight share one evaluation.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from powertrain.cache import ContentCache, content_hash
+
+DEFAULT_PORT = 8765
+DEFAULT_MAX_BATCH = 1024  # Points per micro-batch
+DEFAULT_MAX_DELAY = 0.002  # Seconds a batch waits for more requests
+DEFAULT_CACHE_SIZE = 65536  # Cached results
+LATENCY_WINDOW = 10000  # Recent latencies kept per endpoint for percentiles
+MAX_BODY = 1 << 24  # Largest accepted request body (bytes)
+
+INVERTER_FIELDS = ('V_dc', 'I_out_rms', 'f_sw', 'R_on', 'V_f', 'E_on', 'E_off', 'V_out_rms')
+DYNAMICS_FIELDS = ('speed', 'gradient', 'acceleration', 'mass')
+VEHICLE_FIELDS = ('Cr', 'Caero', 'A_F', 'rho', 'r_wheel')
+
+
+class RequestError(Exception):
+    """Client error, answered with `status` and the message."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+    def __reduce__(self):  # Crosses the worker-process boundary
+        return type(self), (self.status, str(self))
+
+
+# ---
+## Batched models (run on the worker pool)
+
+def _column(items, field, default=None):
+    try:
+        return np.array([float(item[field]) if default is None else float(item.get(field, default))
+                         for item in items])
+    except KeyError:
+        raise RequestError(422, f"missing field {field!r}") from None
+    except (TypeError, ValueError):
+        raise RequestError(422, f"field {field!r} must be a number") from None
+
+
+def inverter_batch(items):
+    """inverter_model results of a list of argument dicts, one vectorized pass."""
+    from powertrain.inverter import inverter_model_batch
+
+    params = {field: _column(items, field) for field in INVERTER_FIELDS}
+    params['pf'] = _column(items, 'pf', 0.9)
+    result = inverter_model_batch(**params)
+    return [dict(zip(result.dtype.names, map(float, row))) for row in result.tolist()]
+
+
+def dynamics_batch(items):
+    """longitudinal_dynamics results of a list of argument dicts, one vectorized pass."""
+    from powertrain import dynamics
+
+    columns = {field: _column(items, field) for field in DYNAMICS_FIELDS}
+    vehicle = {field: _column(items, field, getattr(dynamics, field)) for field in VEHICLE_FIELDS}
+    v = columns['speed'] / 3.6
+    theta = np.arctan(columns['gradient'] / 100.0)
+    values = dynamics.propulsion_demand(v, theta, columns['acceleration'], columns['mass'], **vehicle) + (v,)
+    names = ('F_prop', 'Power', 'Torque', 'w_rpm', 'v_ms')
+    rows = np.round(np.column_stack(values), 2).tolist()
+    return [dict(zip(names, row)) for row in rows]
+
+
+def gear_ratio_table(items):
+    """Gear-ratio tables, one per request (each request brings its own catalog)."""
+    from powertrain.gearing import EngineGearRatioCalculator
+
+    tables = []
+    for item in items:
+        try:
+            frame = EngineGearRatioCalculator(item['engines'], item['scenarios']).create_table_frame()
+        except KeyError as error:
+            raise RequestError(422, f"missing field {error.args[0]!r}") from None
+        except (AttributeError, TypeError, ValueError) as error:
+            raise RequestError(422, f"invalid engines or scenarios: {error}") from None
+        frame = frame.astype({'Engine': str, 'Condition': str})
+        tables.append({'headers': list(frame.columns), 'rows': frame.to_numpy().tolist()})
+    return tables
+
+
+# Route -> (batched model, batchable across requests)
+MODELS = {
+    '/v1/inverter': (inverter_batch, True),
+    '/v1/dynamics': (dynamics_batch, True),
+    '/v1/gear-ratios': (gear_ratio_table, False),
+}
+
+
+def _run_isolated(model, items):
+    """Runs `model`; on a client error, retries item by item so one bad request fails alone."""
+    try:
+        return model(items)
+    except RequestError:
+        if len(items) == 1:
+            raise
+    results = []
+    for item in items:
+        try:
+            results.append(model([item])[0])
+        except RequestError as error:
+            results.append(error)
+    return results
+
+
+# ---
+## Metrics
+
+class EndpointMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.batched_points = 0
+        self.max_batch = 0
+        self.compute_s = 0.0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.finished = deque(maxlen=LATENCY_WINDOW)
+
+    def record(self, latency, ok=True):
+        self.requests += 1
+        self.errors += not ok
+        self.latencies.append(latency)
+        self.finished.append(time.perf_counter())
+
+    def snapshot(self):
+        latencies = np.array(self.latencies) * 1000
+        p50, p95, p99 = np.percentile(latencies, (50, 95, 99)) if latencies.size else (math.nan,) * 3
+        span = self.finished[-1] - self.finished[0] if len(self.finished) > 1 else 0.0
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'cache_hits': self.cache_hits,
+            'coalesced': self.coalesced,
+            'batches': self.batches,
+            'mean_batch': self.batched_points / self.batches if self.batches else 0.0,
+            'max_batch': self.max_batch,
+            'compute_s': self.compute_s,
+            'latency_ms': {'p50': float(p50), 'p95': float(p95), 'p99': float(p99)},
+            'recent_rps': (len(self.finished) - 1) / span if span > 0 else 0.0,
+        }
+
+
+# ---
+## Micro-batching
+
+class MicroBatcher:
+    """
+    Collects items submitted within `max_delay` of the first one (up to
+    `max_batch`) and evaluates them with one call of `model` on `executor`.
+    """
+
+    def __init__(self, model, executor, metrics, max_batch=DEFAULT_MAX_BATCH, max_delay=DEFAULT_MAX_DELAY):
+        self.model = model
+        self.executor = executor
+        self.metrics = metrics
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = asyncio.Queue()
+        self._task = None
+        self._evaluations = set()  # The loop only keeps weak references to tasks
+
+    async def submit(self, item):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Evaluate without blocking the next batch from being collected
+            task = asyncio.ensure_future(self._evaluate(batch))
+            self._evaluations.add(task)
+            task.add_done_callback(self._evaluations.discard)
+
+    async def _evaluate(self, batch):
+        items, futures = zip(*batch)
+        start = time.perf_counter()
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.executor, _run_isolated, self.model, list(items))
+        except asyncio.CancelledError:
+            for future in futures:
+                future.cancel()
+            raise
+        except Exception as error:
+            results = [error] * len(batch)
+        self.metrics.batches += 1
+        self.metrics.batched_points += len(batch)
+        self.metrics.max_batch = max(self.metrics.max_batch, len(batch))
+        self.metrics.compute_s += time.perf_counter() - start
+        for future, result in zip(futures, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def close(self):
+        if self._task is not None:
+            self._task.cancel()
+        for task in list(self._evaluations):
+            task.cancel()
+
+
+# ---
+## Service
+
+class EvaluationService:
+    """
+    Routes requests through the result cache and the per-model micro-batchers.
+
+    Args:
+        workers (int): Worker processes (0: one per CPU).
+        max_batch (int), max_delay (float): Micro-batch limits.
+        cache_size (int): LRU result-cache entries.
+        threads (bool): Evaluate on one background thread instead of processes.
+    """
+
+    def __init__(self, workers=1, max_batch=DEFAULT_MAX_BATCH, max_delay=DEFAULT_MAX_DELAY,
+                 cache_size=DEFAULT_CACHE_SIZE, threads=False):
+        if not threads:
+            # Fork the workers now: forked later, they would inherit (and hold
+            # open) the client sockets accepted so far
+            self.executor = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+            self.executor.submit(int).result()
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=1)
+        self.cache = ContentCache('service', cache_size)
+        self.metrics = {route: EndpointMetrics() for route in MODELS}
+        self.batchers = {
+            route: MicroBatcher(model, self.executor, self.metrics[route],
+                                max_batch if batchable else 1, max_delay if batchable else 0.0)
+            for route, (model, batchable) in MODELS.items()
+        }
+        self.started = time.time()
+        self._inflight = {}
+
+    async def evaluate(self, route, payload):
+        """Result of one request to a model route."""
+        metrics = self.metrics[route]
+        if MODELS[route][1]:
+            # Flat point-model arguments: field order carries no meaning, so
+            # the same request from any client shares one cache entry
+            key = content_hash(route, json.dumps(payload, sort_keys=True))
+        else:
+            # Engine and scenario order set the order of the table rows
+            key = content_hash(route, payload)
+        cached = self.cache.get(key)
+        if cached is not None:
+            metrics.cache_hits += 1
+            return cached
+        shared = self._inflight.get(key)
+        if shared is not None:
+            metrics.coalesced += 1
+            return await asyncio.shield(shared)
+
+        future = asyncio.ensure_future(self.batchers[route].submit(payload))
+        self._inflight[key] = future
+        try:
+            result = await asyncio.shield(future)
+        finally:
+            self._inflight.pop(key, None)
+        self.cache.put(key, result)
+        return result
+
+    def metrics_snapshot(self):
+        return {
+            'uptime_s': time.time() - self.started,
+            'cache': self.cache.stats(),
+            'endpoints': {route: metrics.snapshot() for route, metrics in self.metrics.items()},
+        }
+
+    async def dispatch(self, method, path, body):
+        """(status, JSON-able response) of one HTTP request."""
+        if path == '/v1/health':
+            return 200, {'status': 'ok'}
+        if path == '/v1/metrics':
+            return 200, self.metrics_snapshot()
+        if path not in MODELS:
+            raise RequestError(404, f"unknown path {path!r}")
+        if method != 'POST':
+            raise RequestError(405, f"{path} expects POST")
+        try:
+            payload = json.loads(body or b'null')
+        except ValueError:
+            raise RequestError(400, "body is not valid JSON") from None
+        if not isinstance(payload, dict):
+            raise RequestError(400, "body must be a JSON object")
+
+        start = time.perf_counter()
+        try:
+            result = await self.evaluate(path, payload)
+        except Exception:
+            self.metrics[path].record(time.perf_counter() - start, ok=False)
+            raise
+        self.metrics[path].record(time.perf_counter() - start)
+        return 200, result
+
+    # HTTP/1.1 with keep-alive, one request at a time per connection
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._respond(writer, 400, {'error': 'malformed request line'}, False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = headers.get('content-length', '0')
+                if not (length.isascii() and length.isdigit()):  # Digits only: no sign, spaces or words
+                    await self._respond(writer, 400, {'error': 'invalid Content-Length'}, False)
+                    break
+                length = int(length)
+                if length > MAX_BODY:
+                    await self._respond(writer, 413, {'error': 'body too large'}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                keep_alive = (headers.get('connection', '').lower() != 'close'
+                              and version.upper() == 'HTTP/1.1')
+
+                try:
+                    status, response = await self.dispatch(method.upper(), target.split('?', 1)[0], body)
+                except RequestError as error:
+                    status, response = error.status, {'error': str(error)}
+                except Exception as error:  # Model failure: report, keep serving
+                    status, response = 500, {'error': f"{type(error).__name__}: {error}"}
+                await self._respond(writer, status, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status, response, keep_alive):
+        body = json.dumps(response).encode()
+        reason = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                  413: 'Payload Too Large', 422: 'Unprocessable Entity', 500: 'Internal Server Error'}[status]
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                     .encode() + body)
+        await writer.drain()
+
+    async def serve(self, host='127.0.0.1', port=DEFAULT_PORT, ready=None):
+        server = await asyncio.start_server(self.handle, host, port)
+        if ready is not None:
+            ready(server)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.close()
+
+    def close(self):
+        for batcher in self.batchers.values():
+            batcher.close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m powertrain.service', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=1, help='worker processes (0: one per CPU)')
+    parser.add_argument('--threads', action='store_true', help='evaluate on a background thread instead')
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH, help='points per micro-batch')
+    parser.add_argument('--max-delay-ms', type=float, default=DEFAULT_MAX_DELAY * 1000,
+                        help='how long a micro-batch waits for more requests')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE, help='LRU result-cache entries')
+    args = parser.parse_args(argv)
+
+    service = EvaluationService(args.workers, args.max_batch, args.max_delay_ms / 1000, args.cache_size,
+                                threads=args.threads)
+    ready = lambda server: print(f"serving on http://{args.host}:{args.port}", flush=True)
+    try:
+        asyncio.run(service.serve(args.host, args.port, ready))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
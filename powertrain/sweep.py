@@ -0,0 +1,286 @@
+"""
+Design-space sweep over motor x gear ratio x inverter device x DC voltage x
+switching frequency, keeping only the Pareto-optimal designs.
+
+System efficiency is inverter x motor x driveline efficiency, each a mean over
+the scenarios: the inverter part depends on (device, v_dc, f_sw), the motor
+part on (motor, gear ratio) through the motor loss model at every scenario's
+motor operating point.
+
+Candidates are numbered in C order over that grid and evaluated in chunks on a
+process pool. Each chunk is reduced to its own non-dominated set before it is
+merged into the running front, so memory depends on the size of the front and
+not on the number of candidates.
+"""
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from powertrain.gearbox import motor_loss_proxy
+from powertrain.gearing import EngineGearRatioCalculator
+from powertrain.inverter import inverter_model_batch
+
+DEFAULT_CHUNK_SIZE = 1 << 16  # Candidates per task
+
+# Objective name -> 'max' or 'min'
+DEFAULT_SENSES = {
+    'system_efficiency': 'max',
+    'peak_power_kw': 'min',
+    'gear_ratio': 'min',
+}
+
+FRONT_DTYPE = np.dtype([
+    ('candidate', np.int64),
+    ('motor', np.int64),
+    ('gear', np.int64),
+    ('device', np.int64),
+    ('v_dc', np.int64),
+    ('f_sw', np.int64),
+    ('system_efficiency', np.float64),
+    ('peak_power_kw', np.float64),
+    ('gear_ratio', np.float64),
+])
+
+_OBJECTIVES = ('system_efficiency', 'peak_power_kw', 'gear_ratio')
+
+
+def pareto_mask(points):
+    """
+    Boolean mask of the non-dominated rows of `points` (all objectives minimized).
+
+    Rows are visited in lexicographic order, in which a point can only be
+    dominated by points before it, so each block only has to be checked
+    against the front found so far and against itself.
+    """
+    points = np.asarray(points, dtype=float)
+    n = len(points)
+    mask = np.zeros(n, dtype=bool)
+    if n == 0:
+        return mask
+
+    order = np.lexsort(points.T[::-1])
+    front = np.empty((0, points.shape[1]))
+    block = 512
+    for start in range(0, n, block):
+        idx = order[start:start + block]
+        cand = points[idx]
+
+        # Dominated by the front found so far
+        if len(front):
+            le = (front[None, :, :] <= cand[:, None, :]).all(-1)
+            lt = (front[None, :, :] < cand[:, None, :]).any(-1)
+            keep = ~(le & lt).any(1)
+            idx, cand = idx[keep], cand[keep]
+
+        # Dominated within the block
+        le = (cand[None, :, :] <= cand[:, None, :]).all(-1)
+        lt = (cand[None, :, :] < cand[:, None, :]).any(-1)
+        keep = ~(le & lt).any(1)
+        mask[idx[keep]] = True
+        front = np.concatenate((front, cand[keep]))
+    return mask
+
+
+class SweepSpace:
+    """
+    Candidate grid and the per-axis data every worker needs.
+
+    Args:
+        engines: Engine characteristics (dict of dicts or DataFrame), as for
+            EngineGearRatioCalculator.
+        scenarios: Vehicle scenarios (list of dicts or DataFrame).
+        devices (dict): Device name -> {'R_on', 'V_f', 'E_on', 'E_off'}.
+        v_dc (array): DC link voltages (V).
+        f_sw (array): Switching frequencies (Hz).
+        gear_ratios (array, optional): Candidate ratios; defaults to the
+            distinct finite ratios EngineGearRatioCalculator selects.
+        mod_index, pf, driveline_efficiency (float): Operating assumptions,
+            as in the app.
+        motor_efficiency (float): Motor efficiency assumed when sizing the
+            inverter current, as in the app.
+        loss_model (callable): loss_model(motor_fields, rpm, torque) -> kW,
+            the motor loss behind the motor part of system efficiency.
+    """
+
+    def __init__(self, engines, scenarios, devices, v_dc, f_sw, gear_ratios=None,
+                 mod_index=0.85, pf=0.9, motor_efficiency=0.90, driveline_efficiency=1.0,
+                 loss_model=motor_loss_proxy):
+        calculator = EngineGearRatioCalculator(engines, scenarios)
+        self.envelope = calculator.envelope
+        self.motor_names = self.envelope.names
+        self.scenarios = calculator.scenario_arrays()
+
+        if gear_ratios is None:
+            ratios = calculator.calculate_gear_ratio_matrix()['Gear Ratio']
+            gear_ratios = np.unique(ratios[np.isfinite(ratios) & (ratios > 0)])
+        self.gear_ratios = np.asarray(gear_ratios, dtype=float)
+
+        self.device_names = np.array(list(devices.keys()))
+        self.devices = {key: np.array([float(d[key]) for d in devices.values()])
+                        for key in ('R_on', 'V_f', 'E_on', 'E_off')}
+        self.v_dc = np.asarray(v_dc, dtype=float).reshape(-1)
+        self.f_sw = np.asarray(f_sw, dtype=float).reshape(-1)
+        self.mod_index = mod_index
+        self.pf = pf
+        self.motor_efficiency = motor_efficiency
+        self.driveline_efficiency = driveline_efficiency
+        self.loss_model = loss_model
+
+    @property
+    def shape(self):
+        return (len(self.motor_names), len(self.gear_ratios), len(self.device_names),
+                len(self.v_dc), len(self.f_sw))
+
+    @property
+    def size(self):
+        return math.prod(self.shape)
+
+    def inverter_efficiency(self):
+        """Mean inverter efficiency (0-1) over scenarios, shape (devices, v_dc, f_sw)."""
+        d = {key: value[:, None, None, None] for key, value in self.devices.items()}
+        v_dc = self.v_dc[None, :, None, None]
+        f_sw = self.f_sw[None, None, :, None]
+        v_out_rms = v_dc * self.mod_index / math.sqrt(2)
+        power_w = self.scenarios['power'][None, None, None, :] * 1000 / self.motor_efficiency
+        i_out_rms = power_w / (math.sqrt(3) * v_out_rms * self.pf)
+        result = inverter_model_batch(v_dc, i_out_rms, f_sw, d['R_on'], d['V_f'], d['E_on'], d['E_off'],
+                                      v_out_rms, self.pf)
+        return result['efficiency_percent'].mean(axis=-1) / 100
+
+    def motor_efficiency_at(self, motor, gear):
+        """
+        Mean motor efficiency (0-1) over scenarios of (motor, gear) index
+        pairs, from `loss_model` at each scenario's motor speed and torque.
+        """
+        ratio = self.gear_ratios[gear][:, None]
+        rpm = self.scenarios['max_speed_vehicle'][None, :] * ratio
+        torque = self.scenarios['torque'][None, :] / (ratio * self.driveline_efficiency)
+        fields = {field: values[motor][:, None] for field, values in self.envelope.columns().items()}
+        power = torque * rpm * (2 * np.pi / 60) / 1000
+        input_power = power + self.loss_model(fields, rpm, torque)
+        efficiency = np.ones_like(input_power)
+        np.divide(power, input_power, out=efficiency, where=input_power > 0)
+        return efficiency.mean(axis=-1)
+
+    def peak_power_kw(self):
+        """Motor peak power over the whole envelope in kW."""
+        return self.envelope.peak_power_kw
+
+
+# Per-process evaluation context, set once by the pool initializer
+_context = {}
+
+
+def _init_worker(space, senses):
+    _context['space'] = space
+    _context['senses'] = senses
+    _context['inverter_efficiency'] = space.inverter_efficiency()
+    _context['peak_power_kw'] = space.peak_power_kw()
+
+
+def _evaluate_chunk(bounds):
+    """Evaluates candidates [start, stop) and returns their local Pareto front."""
+    start, stop = bounds
+    space = _context['space']
+    candidate = np.arange(start, stop, dtype=np.int64)
+    m, g, d, v, f = np.unravel_index(candidate, space.shape)
+
+    # Every scenario must be reachable: motor speed within the envelope and
+    # enough wheel torque at that speed. This depends only on (motor, gear),
+    # which is constant over runs of consecutive candidates, so it is
+    # evaluated once per distinct pair in the chunk.
+    pair = candidate // math.prod(space.shape[2:])
+    pairs = np.arange(pair[0], pair[-1] + 1) if len(pair) else pair
+    pm, pg = np.unravel_index(pairs, space.shape[:2])
+    ratio = space.gear_ratios[pg]
+    motor_rpm = space.scenarios['max_speed_vehicle'][None, :] * ratio[:, None]
+    torque = space.envelope[pm].torque_at(motor_rpm, outer=False)
+    wheel_torque = torque * ratio[:, None] * space.driveline_efficiency
+    pair_feasible = (wheel_torque >= space.scenarios['torque'][None, :]).all(axis=1)
+    pair_efficiency = space.motor_efficiency_at(pm, pg)
+    sel = pair_feasible[pair - pairs[0]] if len(pair) else np.zeros(0, dtype=bool)
+    ratio = space.gear_ratios[g]
+
+    rows = np.empty(int(sel.sum()), dtype=FRONT_DTYPE)
+    for name, index in zip(('candidate', 'motor', 'gear', 'device', 'v_dc', 'f_sw'), (candidate, m, g, d, v, f)):
+        rows[name] = index[sel]
+    rows['system_efficiency'] = (_context['inverter_efficiency'][d[sel], v[sel], f[sel]]
+                                 * pair_efficiency[pair[sel] - pairs[0]] * space.driveline_efficiency)
+    rows['peak_power_kw'] = _context['peak_power_kw'][m[sel]]
+    rows['gear_ratio'] = ratio[sel]
+    return _reduce(rows, _context['senses'])
+
+
+def _reduce(rows, senses):
+    """Keeps the non-dominated rows, ordered by candidate index."""
+    if len(rows) == 0:
+        return rows
+    objectives = np.column_stack([
+        -rows[name] if senses[name] == 'max' else rows[name] for name in _OBJECTIVES
+    ])
+    rows = rows[pareto_mask(objectives)]
+    return rows[np.argsort(rows['candidate'], kind='stable')]
+
+
+def run_sweep(space, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, senses=None, progress=None):
+    """
+    Sweeps every candidate in `space` and returns the Pareto front.
+
+    Args:
+        space (SweepSpace): Candidate grid.
+        workers (int, optional): Process count; defaults to os.cpu_count().
+            With 1 the sweep runs in the calling process.
+        chunk_size (int): Candidates per task.
+        senses (dict, optional): Overrides of DEFAULT_SENSES ('max'/'min').
+        progress (callable, optional): Called as progress(done, total) after
+            each chunk, with counts in candidates.
+
+    Returns:
+        np.ndarray: FRONT_DTYPE rows of the non-dominated feasible designs,
+        sorted by candidate index (independent of worker count and timing).
+    """
+    senses = {**DEFAULT_SENSES, **(senses or {})}
+    total = space.size
+    bounds = [(start, min(start + chunk_size, total)) for start in range(0, total, chunk_size)]
+    workers = workers or os.cpu_count() or 1
+
+    front = np.empty(0, dtype=FRONT_DTYPE)
+    done = 0
+
+    def merge(chunk_front, chunk_bounds):
+        nonlocal front, done
+        front = _reduce(np.concatenate((front, chunk_front)), senses)
+        done += chunk_bounds[1] - chunk_bounds[0]
+        if progress is not None:
+            progress(done, total)
+
+    if workers == 1 or len(bounds) <= 1:
+        _init_worker(space, senses)
+        for chunk_bounds in bounds:
+            merge(_evaluate_chunk(chunk_bounds), chunk_bounds)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(space, senses)) as pool:
+            # map() yields in submission order, so the merge order is fixed
+            for chunk_front, chunk_bounds in zip(pool.map(_evaluate_chunk, bounds), bounds):
+                merge(chunk_front, chunk_bounds)
+    return front
+
+
+def front_to_frame(space, front):
+    """Pareto front as a DataFrame with motor/device names and axis values."""
+    import pandas as pd
+
+    return pd.DataFrame({
+        'candidate': front['candidate'],
+        'motor': space.motor_names[front['motor']],
+        'gear_ratio': front['gear_ratio'],
+        'device': space.device_names[front['device']],
+        'V_dc': space.v_dc[front['v_dc']],
+        'f_sw': space.f_sw[front['f_sw']],
+        'system_efficiency': front['system_efficiency'],
+        'peak_power_kw': front['peak_power_kw'],
+    })
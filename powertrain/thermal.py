@@ -0,0 +1,322 @@
+"""
+Junction-temperature transients of many inverter devices over a drive cycle.
+
+Per-timestep losses (W, steps x devices) are fed through each device's
+junction-to-coolant thermal network in Foster form,
+Z_th(t) = sum_i R_i * (1 - exp(-t / tau_i)). Every RC stage is advanced with
+its exact zero-order-hold update, so any time step is stable. Cauer ladders
+are converted to the equivalent Foster network.
+
+The losses arrive in chunks and only the network state, running peaks and a
+rainflow counter are kept between chunks, so cycle length does not matter.
+The temperature cycles are rainflow-counted per device (4-point method, with
+a hysteresis gate that drops reversals smaller than `hysteresis`) into a
+histogram of cycle ranges.
+"""
+
+import math
+
+import numpy as np
+
+from powertrain.inverter import inverter_model_batch
+
+DEFAULT_CHUNK_SIZE = 1024  # Time steps per chunk
+DEFAULT_HYSTERESIS = 1.0  # Smallest temperature reversal counted (K)
+DEFAULT_RANGE_BINS = np.arange(0.0, 102.0, 2.0)  # Cycle-range histogram edges (K); last bin open-ended
+
+
+class FosterNetwork:
+    """
+    Foster thermal network of one or many devices.
+
+    Args:
+        R (array-like): Stage resistances (K/W), shape (stages,) or (devices, stages).
+        tau (array-like): Stage time constants (s), same shape as `R`.
+            Unused stages of a device can be padded with R = 0.
+    """
+
+    def __init__(self, R, tau):
+        self.R = np.atleast_1d(np.asarray(R, dtype=float))
+        self.tau = np.atleast_1d(np.asarray(tau, dtype=float))
+        if self.R.shape != self.tau.shape:
+            raise ValueError("R and tau must have the same shape")
+
+    @classmethod
+    def from_cauer(cls, R, C):
+        """
+        Foster network with the same junction impedance as a Cauer ladder.
+
+        Args:
+            R (array-like): Ladder resistances (K/W), junction first; the last
+                one connects to the coolant. Shape (stages,) or (devices, stages).
+            C (array-like): Node heat capacities (J/K), same shape as `R`.
+        """
+        shared = np.ndim(R) == 1
+        R = np.atleast_2d(np.asarray(R, dtype=float))
+        C = np.atleast_2d(np.asarray(C, dtype=float))
+        n_devices, n_stages = R.shape
+        foster_R = np.empty_like(R)
+        foster_tau = np.empty_like(R)
+        for device in range(n_devices):
+            # Node conductance matrix of the ladder, coolant as reference
+            g = 1.0 / R[device]
+            G = np.diag(g + np.append(0.0, g[:-1]))
+            G -= np.diag(g[:-1], 1) + np.diag(g[:-1], -1)
+            # Symmetric form of C dT/dt = -G T + e0 P; its modes are the Foster stages
+            scale = 1.0 / np.sqrt(C[device])
+            rates, vectors = np.linalg.eigh(scale[:, None] * G * scale[None, :])
+            weights = scale[0] * vectors[0]
+            foster_tau[device] = 1.0 / rates
+            foster_R[device] = weights ** 2 / rates
+        if shared:
+            return cls(foster_R[0], foster_tau[0])
+        return cls(foster_R, foster_tau)
+
+    @property
+    def R_th(self):
+        """Steady-state junction-to-coolant resistance (K/W) per device."""
+        return self.R.sum(axis=-1)
+
+    def impedance(self, t):
+        """Step response Z_th(t) (K/W) at times `t`, shape t.shape + devices."""
+        t = np.asarray(t, dtype=float).reshape(np.shape(t) + (1,) * self.R.ndim)
+        return np.sum(self.R * -np.expm1(-t / self.tau), axis=-1)
+
+
+# ---
+## Losses
+
+def _chunks(values, chunk_size):
+    return (values[start:start + chunk_size] for start in range(0, len(values), chunk_size))
+
+
+def inverter_cycle_losses(power_kw, devices, chunk_size=DEFAULT_CHUNK_SIZE, motor_efficiency=0.90,
+                          mod_index=0.85, pf=0.9, per_switch=True):
+    """
+    Yields per-timestep inverter losses (W, steps x devices) of a power trace.
+
+    The operating point follows the app: I_out from the electrical power
+    |power_kw| / motor_efficiency at V_out = V_dc * mod_index / sqrt(2).
+    Regeneration loads the inverter like traction; at zero current the
+    inverter does not switch.
+
+    Args:
+        power_kw (np.ndarray or iterable): Power trace (kW), whole or as chunks.
+        devices (dict or DataFrame): Per-device V_dc, f_sw, R_on, V_f, E_on, E_off.
+        per_switch (bool): Divide by the six switch positions, for networks
+            describing one switch.
+    """
+    params = {name: np.asarray(devices[name], dtype=float)[None, :]
+              for name in ('V_dc', 'f_sw', 'R_on', 'V_f', 'E_on', 'E_off')}
+    v_out_rms = params['V_dc'] * mod_index / math.sqrt(2)
+    if isinstance(power_kw, np.ndarray):
+        power_kw = _chunks(power_kw, chunk_size)
+
+    for chunk in power_kw:
+        power_w = np.abs(np.asarray(chunk, dtype=float))[:, None] * 1000 / motor_efficiency
+        i_out_rms = power_w / (math.sqrt(3) * v_out_rms * pf)
+        losses = inverter_model_batch(I_out_rms=i_out_rms, V_out_rms=v_out_rms, pf=pf, **params)['P_losses']
+        losses = np.where(i_out_rms > 0, losses, 0.0)
+        yield losses / 6 if per_switch else losses
+
+
+# ---
+## Rainflow counting
+
+class _Rainflow:
+    """
+    Streaming 4-point rainflow counter, vectorized across devices. Ranges of
+    closed cycles are buffered and binned by `flush`.
+    """
+
+    def __init__(self, start, hysteresis, bins):
+        n = start.size
+        self.hysteresis = hysteresis
+        self.bins = bins
+        self.counts = np.zeros((n, len(bins)))
+        self.max_range = np.zeros(n)
+        self.stack = np.empty((n, 16))
+        self.stack[:, 0] = start
+        self.depth = np.ones(n, dtype=np.intp)
+        self.extreme = start.astype(float).copy()
+        self.direction = np.zeros(n)
+        self._rows = np.arange(n)
+        self._range_rows, self._ranges = [], []
+        self._unstarted = True
+
+    def _push(self, rows, values):
+        depth = self.depth[rows]
+        if depth.max() >= self.stack.shape[1]:
+            self.stack = np.pad(self.stack, ((0, 0), (0, self.stack.shape[1])))
+        flat = self.stack.reshape(-1)
+        top = rows * self.stack.shape[1] + depth
+        flat[top] = values
+        depth += 1
+        # Close every cycle the new turning point completes
+        active = np.flatnonzero(depth >= 4)
+        while active.size:
+            t = top[active]
+            a, b, c, e = flat[t - 3], flat[t - 2], flat[t - 1], flat[t]
+            inner = np.abs(c - b)
+            closed = (inner <= np.abs(e - c)) & (inner <= np.abs(b - a))
+            active = active[closed]
+            if not active.size:
+                break
+            self._ranges.append(inner[closed])
+            self._range_rows.append(rows[active])
+            flat[t[closed] - 2] = e[closed]
+            top[active] -= 2
+            depth[active] -= 2
+            active = active[depth[active] >= 4]
+        self.depth[rows] = depth
+
+    def feed(self, values):
+        """
+        Next sample of every device. Repeating a device's previous sample is
+        a no-op, which is how devices with fewer samples are padded.
+        """
+        ext, direction = self.extreme, self.direction
+        if self._unstarted:
+            # Direction is set by the first move of at least `hysteresis`
+            move = values - ext
+            started = (direction == 0) & (np.abs(move) >= self.hysteresis)
+            np.copyto(ext, values, where=started)
+            np.copyto(direction, np.sign(move), where=started)
+            self._unstarted = not direction.all()
+        # Movement against the current direction; a reversal of `hysteresis`
+        # confirms the extreme as a turning point
+        back = (ext - values) * direction
+        turned = back >= self.hysteresis
+        if turned.any():
+            rows = self._rows[turned]
+            self._push(rows, ext[rows])
+            np.negative(direction, out=direction, where=turned)
+            turned |= back < 0
+            np.copyto(ext, values, where=turned)
+        else:
+            np.copyto(ext, values, where=back < 0)
+
+    def flush(self, weight=1.0):
+        """Bins the cycles closed since the last flush, each counted `weight` times."""
+        if not self._ranges:
+            return
+        rows, ranges = np.concatenate(self._range_rows), np.concatenate(self._ranges)
+        self._range_rows, self._ranges = [], []
+        n_bins = len(self.bins)
+        bins = np.clip(np.searchsorted(self.bins, ranges, side='right') - 1, 0, n_bins - 1)
+        self.counts += weight * np.bincount(rows * n_bins + bins, minlength=self.counts.size).reshape(self.counts.shape)
+        np.maximum.at(self.max_range, rows, ranges)
+
+    def finish(self):
+        """Half cycles of the residue, including the pending extreme."""
+        pending = np.abs(self.extreme - self.stack[self._rows, self.depth - 1]) >= self.hysteresis
+        if pending.any():
+            rows = self._rows[pending]
+            self._push(rows, self.extreme[rows])
+        self.flush()
+        for k in range(1, int(self.depth.max())):
+            rows = self._rows[self.depth > k]
+            self._range_rows.append(rows)
+            self._ranges.append(np.abs(self.stack[rows, k] - self.stack[rows, k - 1]))
+        self.flush(weight=0.5)
+        return self.counts, self.max_range
+
+
+# ---
+## Transient
+
+def simulate_junction_temperature(losses, network, T_coolant=40.0, dt=0.1,
+                                  hysteresis=DEFAULT_HYSTERESIS, range_bins=DEFAULT_RANGE_BINS):
+    """
+    Streams per-timestep device losses through the thermal networks.
+
+    Args:
+        losses (np.ndarray or iterable): Losses (W), a (steps, devices) array
+            or an iterable of such chunks (see inverter_cycle_losses).
+        network (FosterNetwork): Per-device or shared thermal network.
+        T_coolant (float or np.ndarray): Coolant temperature (C), per device or shared.
+        dt (float): Time step (s).
+        hysteresis (float): Smallest temperature reversal counted (K).
+        range_bins (np.ndarray): Left edges of the cycle-range histogram (K).
+
+    Returns:
+        dict: Per-device 'peak_tj' (C), 'peak_time_s', 'mean_tj', 'final_tj',
+        'max_range' (K), 'cycles' (total full-cycle equivalents) and
+        'range_counts' (devices x bins), plus 'range_bins' and 'steps'.
+    """
+    if isinstance(losses, np.ndarray):
+        losses = _chunks(losses, DEFAULT_CHUNK_SIZE)
+
+    with np.errstate(divide='ignore', over='ignore'):
+        decay = np.exp(-dt / network.tau)
+    gain = network.R * (1 - decay)
+    # State is (stages, devices) so one time step touches contiguous rows
+    decay, gain = np.atleast_2d(decay).T.copy(), np.atleast_2d(gain).T.copy()
+
+    state = tj_prev = counter = peak = peak_step = total = None
+    steps = 0
+    for chunk in losses:
+        chunk = np.asarray(chunk, dtype=float)
+        if chunk.ndim == 1:
+            chunk = chunk[:, None]
+        n_steps, n_devices = chunk.shape
+        if state is None:
+            state = np.zeros((decay.shape[0], n_devices))
+            coolant = np.broadcast_to(np.asarray(T_coolant, dtype=float), (n_devices,))
+            tj_prev = coolant.copy()
+            counter = _Rainflow(tj_prev, hysteresis, np.asarray(range_bins, dtype=float))
+            peak = tj_prev.copy()
+            peak_step = np.zeros(n_devices, dtype=np.int64)
+            total = np.zeros(n_devices)
+
+        # Exact update of every stage, one time step per row: (steps, stages, devices)
+        stages = gain[None, :, :] * chunk[:, None, :]
+        stages[0] += decay * state
+        scratch = np.empty_like(state)
+        for n in range(1, n_steps):
+            np.multiply(stages[n - 1], decay, out=scratch)
+            stages[n] += scratch
+        state = stages[-1].copy()
+        tj = stages.sum(axis=1)
+        tj += coolant
+
+        # Running statistics
+        chunk_peak = tj.argmax(axis=0)
+        chunk_max = tj[chunk_peak, np.arange(n_devices)]
+        higher = chunk_max > peak
+        peak = np.where(higher, chunk_max, peak)
+        peak_step = np.where(higher, steps + chunk_peak, peak_step)
+        total += tj.sum(axis=0)
+
+        # Rainflow input: local extrema of each device (plus the chunk's last
+        # sample), taken in order per device but in parallel across devices
+        slope = np.diff(np.vstack([tj_prev, tj]), axis=0)
+        candidate = np.empty_like(tj, dtype=bool)
+        candidate[:-1] = slope[:-1] * slope[1:] <= 0
+        candidate[-1] = True
+        device, step = np.nonzero(candidate.T)
+        counts = np.bincount(device, minlength=n_devices)
+        rank = np.arange(device.size) - np.repeat(np.cumsum(counts) - counts, counts)
+        values = np.repeat(tj[-1:], counts.max(), axis=0)
+        values[rank, device] = tj[step, device]
+        for row in values:
+            counter.feed(row)
+        counter.flush()
+
+        tj_prev = tj[-1]
+        steps += n_steps
+
+    if state is None:
+        raise ValueError("no losses to simulate")
+    range_counts, max_range = counter.finish()
+    return {
+        'peak_tj': peak,
+        'peak_time_s': peak_step * dt,
+        'mean_tj': total / steps,
+        'final_tj': tj_prev.copy(),
+        'max_range': max_range,
+        'cycles': range_counts.sum(axis=1),
+        'range_counts': range_counts,
+        'range_bins': np.asarray(range_bins, dtype=float),
+        'steps': steps,
+    }
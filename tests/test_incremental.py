@@ -0,0 +1,96 @@
+"""IncrementalPipeline.update must leave the same table and figure as a full rebuild."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from powertrain.incremental import IncrementalPipeline
+
+ENGINES = {
+    'Engine1': {'low_speed': 2000, 'high_speed': 8000, 'high_torque': 1000, 'low_torque': 200},
+    'Engine2': {'low_speed': 2300, 'high_speed': 8900, 'high_torque': 500, 'low_torque': 110},
+    'Engine3': {'low_speed': 3000, 'high_speed': 10000, 'high_torque': 1000, 'low_torque': 60},
+    'Engine4': {'low_speed': 2500, 'high_speed': 8500, 'high_torque': 465, 'low_torque': 110},
+    'Engine5': {'low_speed': 2000, 'high_speed': 10000, 'high_torque': 510, 'low_torque': 100},
+}
+
+SCENARIOS = [
+    {'max_speed_vehicle': 1768.39, 'torque': 352, 'power': 65.167, 'max_speed_gearbox': 6, 'condition': 'high_speed'},
+    {'max_speed_vehicle': 88.42, 'torque': 6530, 'power': 60.467, 'max_speed_gearbox': 6, 'condition': 'low_speed'},
+    {'max_speed_vehicle': 442.1, 'torque': 3020, 'power': 139.81, 'max_speed_gearbox': 6, 'condition': 'idle'},
+]
+
+
+def _edit_engine(engines, scenarios):
+    engines = {name: dict(row) for name, row in engines.items()}
+    engines['Engine2']['high_torque'] = 650
+    return engines, scenarios
+
+
+def _add_engine(engines, scenarios):
+    engines = dict(engines)
+    engines['Engine6'] = {'low_speed': 4000, 'high_speed': 8000, 'high_torque': 200, 'low_torque': 115}
+    return engines, scenarios
+
+
+def _remove_engine(engines, scenarios):
+    return {name: row for name, row in engines.items() if name != 'Engine2'}, scenarios
+
+
+def _reorder_engines(engines, scenarios):
+    return dict(reversed(list(engines.items()))), scenarios
+
+
+def _edit_scenario(engines, scenarios):
+    scenarios = [dict(scenario) for scenario in scenarios]
+    scenarios[1]['torque'] = 5000
+    return engines, scenarios
+
+
+def _add_scenario(engines, scenarios):
+    return engines, scenarios + [dict(SCENARIOS[0], max_speed_vehicle=1200.0, condition='cruise')]
+
+
+EDITS = [_edit_engine, _add_engine, _remove_engine, _reorder_engines, _edit_scenario, _add_scenario]
+
+
+def _assert_same_figure(actual, expected):
+    assert len(actual.data) == len(expected.data)
+    for got, want in zip(actual.data, expected.data):
+        assert got.name == want.name
+        assert got.line.color == want.line.color
+        np.testing.assert_allclose(np.asarray(got.x, dtype=float), np.asarray(want.x, dtype=float))
+        np.testing.assert_allclose(np.asarray(got.y, dtype=float), np.asarray(want.y, dtype=float))
+
+
+@pytest.mark.parametrize('webgl', [False, True])
+def test_edit_sequence_matches_full_rebuild(webgl):
+    pipeline = IncrementalPipeline(webgl=webgl)
+    engines, scenarios = ENGINES, SCENARIOS
+    pipeline.update(engines, scenarios)
+    for edit in EDITS:
+        engines, scenarios = edit(engines, scenarios)
+        pipeline.update(engines, scenarios)
+
+        rebuilt = IncrementalPipeline(webgl=webgl)
+        rebuilt.update(engines, scenarios)
+        pd.testing.assert_frame_equal(pipeline.table, rebuilt.table)
+        _assert_same_figure(pipeline.figure, rebuilt.figure)
+
+
+def test_single_edit_is_not_a_rebuild():
+    pipeline = IncrementalPipeline(webgl=False)
+    pipeline.update(ENGINES, SCENARIOS)
+    summary = pipeline.update(*_edit_engine(ENGINES, SCENARIOS))
+    assert not summary['full_rebuild']
+    assert summary['engines_changed'] == 1
+    assert summary['cells_recomputed'] == len(SCENARIOS)
+
+
+def test_unchanged_tables_recompute_nothing():
+    pipeline = IncrementalPipeline()
+    pipeline.update(ENGINES, SCENARIOS)
+    summary = pipeline.update(ENGINES, pd.DataFrame(SCENARIOS))
+    assert not summary['full_rebuild']
+    assert summary['cells_recomputed'] == 0
+    assert summary['traces_replaced'] == 0
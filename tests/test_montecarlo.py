@@ -0,0 +1,86 @@
+"""Streaming Monte Carlo statistics: exact merges, sketch accuracy and worker-count independence."""
+
+import numpy as np
+import pytest
+
+from powertrain.montecarlo import METRICS, QuantileSketch, RunningStats, run_monte_carlo
+
+SCENARIOS = [
+    {'name': 'cruise', 'speed': 100.0, 'gradient': 0.0, 'acceleration': 0.0},
+    {'name': 'hill', 'speed': 40.0, 'gradient': 12.0, 'acceleration': 0.5},
+    {'name': 'braking', 'speed': 60.0, 'gradient': -2.0, 'acceleration': -3.0},
+]
+
+
+def _values(n=20_000, seed=0):
+    rng = np.random.default_rng(seed)
+    # Columns of different shape and sign, including exact zeros
+    values = np.column_stack([
+        rng.lognormal(3.0, 1.0, n),
+        rng.normal(-50.0, 20.0, n),
+        rng.exponential(1e4, n),
+    ])
+    values[::97, 1] = 0.0
+    return values
+
+
+def _batches(values, sizes=(1, 999, 5000, 14_000)):
+    return np.split(values, np.cumsum(sizes)[:-1])
+
+
+def test_running_stats_merge_matches_single_pass():
+    values = _values()
+    merged = RunningStats(values.shape[1])
+    for batch in _batches(values):
+        part = RunningStats(values.shape[1])
+        part.update(batch)
+        merged.merge(part)
+    merged.merge(RunningStats(values.shape[1]))  # An empty partial changes nothing
+
+    assert merged.count == len(values)
+    np.testing.assert_allclose(merged.mean, values.mean(axis=0), rtol=1e-12)
+    np.testing.assert_allclose(merged.variance, values.var(axis=0, ddof=1), rtol=1e-10)
+    np.testing.assert_array_equal(merged.min, values.min(axis=0))
+    np.testing.assert_array_equal(merged.max, values.max(axis=0))
+
+
+@pytest.mark.parametrize('alpha', [0.01, 0.05])
+def test_sketch_error_within_alpha(alpha):
+    values = _values()
+    sketch = QuantileSketch(values.shape[1], alpha=alpha)
+    sketch.update(values)
+    for q in (0.0, 0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99, 1.0):
+        # The sketch reports the sample of rank floor(q * (n - 1)) within a factor 1 +/- alpha
+        exact = np.quantile(values, q, axis=0, method='lower')
+        error = np.abs(sketch.quantile(q) - exact)
+        assert (error <= alpha * np.abs(exact) * (1 + 1e-9)).all(), (q, error / np.abs(exact))
+
+
+def test_sketch_merge_matches_single_pass():
+    values = _values()
+    single = QuantileSketch(values.shape[1])
+    single.update(values)
+    merged = QuantileSketch(values.shape[1])
+    for batch in _batches(values):
+        part = QuantileSketch(values.shape[1])
+        part.update(batch)
+        merged.merge(part)
+
+    np.testing.assert_array_equal(merged.positive, single.positive)
+    np.testing.assert_array_equal(merged.negative, single.negative)
+    np.testing.assert_array_equal(merged.zero, single.zero)
+    for q in (0.05, 0.5, 0.95):
+        np.testing.assert_array_equal(merged.quantile(q), single.quantile(q))
+
+
+def test_results_do_not_depend_on_worker_count():
+    kwargs = dict(n_samples=5000, seed=7, batch_size=600)
+    serial = run_monte_carlo(SCENARIOS, workers=1, **kwargs)
+    parallel = run_monte_carlo(SCENARIOS, workers=4, **kwargs)
+
+    assert serial['samples'] == parallel['samples'] == 5000
+    for field in ('mean', 'm2', 'min', 'max'):
+        np.testing.assert_array_equal(getattr(parallel['stats'], field), getattr(serial['stats'], field))
+    for field in ('positive', 'negative', 'zero'):
+        np.testing.assert_array_equal(getattr(parallel['sketch'], field), getattr(serial['sketch'], field))
+    assert len(serial['stats'].mean) == len(METRICS) * len(SCENARIOS)
@@ -0,0 +1,121 @@
+"""Micro-batcher and HTTP error paths of the evaluation service."""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from powertrain.service import EndpointMetrics, EvaluationService, MicroBatcher, RequestError, inverter_batch
+
+POINT = {'V_dc': 400, 'I_out_rms': 100, 'f_sw': 20e3, 'R_on': 0.01, 'V_f': 1.0,
+         'E_on': 1.5e-3, 'E_off': 1.0e-3, 'V_out_rms': 230}
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        yield pool
+
+
+def _batcher(model, executor, max_delay=0.05):
+    return MicroBatcher(model, executor, EndpointMetrics(), max_batch=64, max_delay=max_delay)
+
+
+async def _submit_all(batcher, items):
+    return await asyncio.gather(*(batcher.submit(item) for item in items), return_exceptions=True)
+
+
+def test_bad_item_fails_alone(executor):
+    items = [dict(POINT, I_out_rms=50 * (i + 1)) for i in range(5)]
+    items[2] = {k: v for k, v in POINT.items() if k != 'R_on'}
+    items[3] = dict(POINT, f_sw='fast')
+    batcher = _batcher(inverter_batch, executor)
+
+    results = asyncio.run(_submit_all(batcher, items))
+
+    assert batcher.metrics.batches == 1  # One batch, retried item by item after the failure
+    for i in (2, 3):
+        assert isinstance(results[i], RequestError) and results[i].status == 422
+    assert "'R_on'" in str(results[2]) and "'f_sw'" in str(results[3])
+    for i in (0, 1, 4):
+        assert results[i] == inverter_batch([items[i]])[0]
+
+
+def test_model_failure_reaches_every_caller_and_batcher_recovers(executor):
+    calls = []
+
+    def model(items):
+        calls.append(len(items))
+        if len(calls) == 1:
+            raise ZeroDivisionError("model bug")
+        return [item['x'] * 2 for item in items]
+
+    async def scenario():
+        batcher = _batcher(model, executor)
+        failed = await _submit_all(batcher, [{'x': i} for i in range(3)])
+        recovered = await _submit_all(batcher, [{'x': i} for i in range(3)])
+        batcher.close()
+        return failed, recovered
+
+    failed, recovered = asyncio.run(scenario())
+    assert calls == [3, 3]  # Not retried per item: only client errors are isolated
+    assert all(isinstance(result, ZeroDivisionError) for result in failed)
+    assert recovered == [0, 2, 4]
+
+
+def test_close_cancels_in_flight_batches(executor):
+    started, release = threading.Event(), threading.Event()
+
+    def model(items):
+        started.set()
+        release.wait(5)
+        return items
+
+    async def scenario():
+        batcher = _batcher(model, executor, max_delay=0.0)
+        pending = [asyncio.ensure_future(batcher.submit({'x': i})) for i in range(2)]
+        while not started.is_set():
+            await asyncio.sleep(0.001)
+        assert batcher._evaluations  # Referenced while running
+        batcher.close()
+        results = await asyncio.gather(*pending, return_exceptions=True)
+        await asyncio.sleep(0)  # Let the cancelled evaluation finish unwinding
+        return results, len(batcher._evaluations)
+
+    try:
+        results, left = asyncio.run(scenario())
+    finally:
+        release.set()
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
+    assert left == 0
+
+
+async def _http(port, request):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(request)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return int(response.split()[1]), response.partition(b'\r\n\r\n')[2]
+
+
+@pytest.mark.parametrize('length, status', [('abc', 400), ('-3', 400), ('+2', 400), ('2x', 400),
+                                            (str(1 << 30), 413)])
+def test_http_rejects_bad_content_length(length, status):
+    async def scenario():
+        service = EvaluationService(threads=True)
+        ready = asyncio.get_running_loop().create_future()
+        server = asyncio.ensure_future(service.serve(port=0, ready=ready.set_result))
+        port = (await ready).sockets[0].getsockname()[1]
+        try:
+            bad = await _http(port, f"POST /v1/inverter HTTP/1.1\r\nContent-Length: {length}\r\n"
+                                    f"Connection: close\r\n\r\n{{}}".encode())
+            health = await _http(port, b"GET /v1/health HTTP/1.1\r\nConnection: close\r\n\r\n")
+        finally:
+            server.cancel()
+        return bad, health
+
+    (bad_status, _), (health_status, _) = asyncio.run(scenario())
+    assert bad_status == status
+    assert health_status == 200
@@ -0,0 +1,135 @@
+"""Streaming rainflow counting: chunk invariance and parity with a brute-force count."""
+
+import numpy as np
+import pytest
+
+from powertrain.thermal import DEFAULT_RANGE_BINS, FosterNetwork, _Rainflow, simulate_junction_temperature
+
+HYSTERESIS = 1.0
+NETWORK = FosterNetwork([0.05, 0.15, 0.3], [0.02, 0.5, 5.0])
+DT = 0.1
+
+
+def _losses(n_steps=3000, n_devices=6, seed=0):
+    rng = np.random.default_rng(seed)
+    # Bursty load: a random walk between idle and full power, plus noise
+    level = np.clip(np.cumsum(rng.normal(0, 15, (n_steps, n_devices)), axis=0), -200, 200) + 200
+    return level + rng.uniform(0, 40, (n_steps, n_devices)) * rng.integers(0, 2, (n_steps, n_devices))
+
+
+def _reference_temperature(losses, T_coolant=40.0):
+    """Plain time-step loop over the Foster stages of one device."""
+    decay = np.exp(-DT / NETWORK.tau)
+    gain = NETWORK.R * (1 - decay)
+    state = np.zeros_like(NETWORK.R)
+    tj = np.empty(len(losses))
+    for n, p in enumerate(losses):
+        state = gain * p + decay * state
+        tj[n] = state.sum() + T_coolant
+    return tj
+
+
+def _reference_rainflow(series, start, hysteresis=HYSTERESIS):
+    """Scalar 4-point rainflow count: (full-cycle ranges, half-cycle ranges)."""
+    points, extreme, direction = [start], start, 0.0
+    for x in series:
+        if direction == 0:
+            if abs(x - extreme) >= hysteresis:
+                direction, extreme = np.sign(x - extreme), x
+        elif (extreme - x) * direction >= hysteresis:
+            points.append(extreme)
+            direction, extreme = -direction, x
+        elif (x - extreme) * direction > 0:
+            extreme = x
+    if abs(extreme - points[-1]) >= hysteresis:
+        points.append(extreme)
+
+    stack, full = [], []
+    for point in points:
+        stack.append(point)
+        while len(stack) >= 4:
+            a, b, c, d = stack[-4:]
+            if abs(c - b) <= abs(d - c) and abs(c - b) <= abs(b - a):
+                full.append(abs(c - b))
+                del stack[-3:-1]
+            else:
+                break
+    half = [abs(stack[k] - stack[k - 1]) for k in range(1, len(stack))]
+    return full, half
+
+
+def _histogram(full, half, bins=DEFAULT_RANGE_BINS):
+    counts = np.zeros(len(bins))
+    for ranges, weight in ((full, 1.0), (half, 0.5)):
+        index = np.clip(np.searchsorted(bins, np.asarray(ranges), side='right') - 1, 0, len(bins) - 1)
+        np.add.at(counts, index, weight)
+    return counts
+
+
+def _count(samples, start, flush_every=None):
+    counter = _Rainflow(start.copy(), HYSTERESIS, DEFAULT_RANGE_BINS)
+    for n, row in enumerate(samples, 1):
+        counter.feed(row)
+        if flush_every and n % flush_every == 0:
+            counter.flush()
+    return counter.finish()
+
+
+def test_counter_matches_brute_force():
+    rng = np.random.default_rng(1)
+    samples = np.cumsum(rng.normal(0, 3, (2000, 5)), axis=0)
+    start = np.zeros(5)
+    counts, max_range = _count(samples, start)
+    for device in range(samples.shape[1]):
+        full, half = _reference_rainflow(samples[:, device], start[device])
+        np.testing.assert_array_equal(counts[device], _histogram(full, half))
+        assert max_range[device] == max(full + half)
+
+
+@pytest.mark.parametrize('flush_every', [1, 7, 500])
+def test_counter_flush_points_do_not_change_counts(flush_every):
+    rng = np.random.default_rng(2)
+    samples = np.cumsum(rng.normal(0, 3, (1500, 4)), axis=0)
+    start = np.zeros(4)
+    counts, max_range = _count(samples, start)
+    flushed_counts, flushed_max = _count(samples, start, flush_every)
+    np.testing.assert_array_equal(flushed_counts, counts)
+    np.testing.assert_array_equal(flushed_max, max_range)
+
+
+def test_simulation_matches_brute_force():
+    losses = _losses()
+    result = simulate_junction_temperature(losses, NETWORK, dt=DT, hysteresis=HYSTERESIS)
+    for device in range(losses.shape[1]):
+        tj = _reference_temperature(losses[:, device])
+        full, half = _reference_rainflow(tj, 40.0)
+        np.testing.assert_array_equal(result['range_counts'][device], _histogram(full, half))
+        assert result['max_range'][device] == pytest.approx(max(full + half))
+        assert result['peak_tj'][device] == pytest.approx(tj.max())
+        assert result['mean_tj'][device] == pytest.approx(tj.mean())
+        assert result['final_tj'][device] == pytest.approx(tj[-1])
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 37, 1000, 3000])
+def test_simulation_is_chunk_invariant(chunk_size):
+    losses = _losses()
+    whole = simulate_junction_temperature(losses, NETWORK, dt=DT, hysteresis=HYSTERESIS)
+    chunks = (losses[start:start + chunk_size] for start in range(0, len(losses), chunk_size))
+    chunked = simulate_junction_temperature(chunks, NETWORK, dt=DT, hysteresis=HYSTERESIS)
+    assert chunked['steps'] == whole['steps']
+    for key in ('range_counts', 'max_range', 'cycles', 'peak_time_s'):
+        np.testing.assert_array_equal(chunked[key], whole[key])
+    for key in ('peak_tj', 'mean_tj', 'final_tj'):
+        np.testing.assert_allclose(chunked[key], whole[key], rtol=1e-12)
+
+
+def test_turning_point_on_chunk_boundary():
+    # Constant load then none: the junction peaks exactly at the boundary of a 100-step chunk
+    losses = np.concatenate([np.full((100, 1), 400.0), np.zeros((100, 1))])
+    whole = simulate_junction_temperature(losses, NETWORK, dt=DT, hysteresis=HYSTERESIS)
+    chunked = simulate_junction_temperature(iter([losses[:100], losses[100:]]), NETWORK, dt=DT,
+                                            hysteresis=HYSTERESIS)
+    np.testing.assert_array_equal(chunked['range_counts'], whole['range_counts'])
+    tj = _reference_temperature(losses[:, 0])
+    np.testing.assert_array_equal(whole['range_counts'][0], _histogram(*_reference_rainflow(tj, 40.0)))
+    assert whole['cycles'][0] == 1.0  # Rise and fall: two half cycles